@@ -0,0 +1,247 @@
+import numpy as np
+import pandas as pd
+import h5py
+
+from psctsimpipe.CalculateTriggerRate import (
+    NSB_GROUP_KEYS,
+    aggregate_NSB_trigger_rates,
+    calculate_proton_trigger_rates,
+    cone_solid_angle
+)
+from psctsimpipe.Helpers import read_hdf5_column, write_hdf5_table
+
+# A grid point of a bias curve
+BIAS_CURVE_KEYS = ["trigger_pixels", "discriminator_threshold"]
+
+def proton_rates_on_grid(proton_files,
+                         area=np.pi*(833)**2,
+                         solid_angle=cone_solid_angle(10),
+                         deltaE=None,
+                         flux_model="DAMPE_proton",
+                         n_workers=None
+                         ):
+    """
+    Proton trigger rates of a (threshold, multiplicity) grid,
+    all computed in one vectorised pass.
+
+    Parameters
+    ----------
+    proton_files : dict
+        (discriminator_threshold, trigger_pixels) as keys and
+        histogram files (1007/1006 exports or .hdata.gz) as values
+    area : float, optional
+        area over which events were generated, by default np.pi*(833)**2
+    solid_angle : float, optional
+        solid angle over which events were generated, by default cone_solid_angle(10)
+    deltaE : float, optional
+        width of the energy bins in log10(E), by default None:
+        inferred from the bins, see calculate_proton_trigger_rates
+    flux_model : str, optional
+        registered flux model name, by default "DAMPE_proton"
+    n_workers : int, optional
+        number of processes used to read the files, by default os.cpu_count()
+
+    Returns
+    -------
+    pandas.DataFrame
+        trigger_pixels, discriminator_threshold,
+        proton_file and proton_rate [Hz]
+    """
+    keys = list(proton_files)
+    files = [proton_files[key] for key in keys]
+    totals, _ = calculate_proton_trigger_rates(
+        files, area, solid_angle, deltaE, flux_model, n_workers
+    )
+
+    return pd.DataFrame({
+        "trigger_pixels": [int(multiplicity) for _, multiplicity in keys],
+        "discriminator_threshold": [float(threshold) for threshold, _ in keys],
+        "proton_file": files,
+        "proton_rate": totals["trigger_rate"].to_numpy(),
+    })
+
+def compute_bias_curves(nsb_rates,
+                        proton_files,
+                        area=np.pi*(833)**2,
+                        solid_angle=cone_solid_angle(10),
+                        deltaE=None,
+                        flux_model="DAMPE_proton",
+                        n_workers=None
+                        ):
+    """
+    Combines NSB and proton trigger rates over a grid
+    of discriminator thresholds and multiplicities.
+
+    Parameters
+    ----------
+    nsb_rates : pandas.DataFrame or string
+        output of aggregate_NSB_trigger_rates, or a directory
+        of trigger rate logs to aggregate
+    proton_files : dict
+        (discriminator_threshold, trigger_pixels) as keys and
+        histogram files as values, see proton_rates_on_grid
+    area, solid_angle, deltaE, flux_model : optional
+        see calculate_proton_trigger_rates
+    n_workers : int, optional
+        number of processes, by default os.cpu_count()
+
+    Returns
+    -------
+    pandas.DataFrame
+        one row per NSB configuration and grid point with the
+        NSB rate and its interval (nsb_rate, nsb_rate_low,
+        nsb_rate_high) and the proton rate [Hz]. Grid points
+        missing in one of the two families are kept with NaN.
+    """
+    if isinstance(nsb_rates, str):
+        nsb_rates = aggregate_NSB_trigger_rates(nsb_rates, n_workers=n_workers)
+
+    nsb = nsb_rates.rename(columns={
+        "trigger_rate": "nsb_rate",
+        "trigger_rate_low": "nsb_rate_low",
+        "trigger_rate_high": "nsb_rate_high",
+    })
+    protons = proton_rates_on_grid(proton_files, area, solid_angle, deltaE, flux_model, n_workers)
+
+    # Thresholds are floats parsed from names, match them after rounding
+    for table in (nsb, protons):
+        table["discriminator_threshold"] = table["discriminator_threshold"].astype(float).round(6)
+        table["trigger_pixels"] = table["trigger_pixels"].astype(int)
+
+    curves = nsb.merge(protons, on=BIAS_CURVE_KEYS, how="outer")
+    other_keys = [key for key in NSB_GROUP_KEYS if key in curves and key not in BIAS_CURVE_KEYS]
+    curves = curves.sort_values(other_keys + BIAS_CURVE_KEYS, na_position="first").reset_index(drop=True)
+
+    return curves
+
+def _log_crossing(threshold, log_ratio):
+    """
+    First threshold where log_ratio changes sign,
+    linearly interpolated, with the index of the grid
+    interval and the position inside it. NaN if it never does.
+    """
+    sign_change = np.nonzero(np.diff(np.sign(log_ratio)) != 0)[0]
+    if len(sign_change) == 0:
+        return np.nan, None, np.nan
+    i = sign_change[0]
+    fraction = log_ratio[i]/(log_ratio[i] - log_ratio[i+1])
+    return threshold[i] + fraction*(threshold[i+1] - threshold[i]), i, fraction
+
+def find_bias_crossover(curves, nsb_fraction=1.0):
+    """
+    Operating point of each bias curve: the threshold where
+    the NSB rate drops to nsb_fraction times the proton rate.
+    Rates are interpolated linearly in log space between
+    grid points.
+
+    Parameters
+    ----------
+    curves : pandas.DataFrame
+        output of compute_bias_curves
+    nsb_fraction : float, optional
+        NSB to proton rate ratio defining the operating point,
+        by default 1.0 (crossover)
+
+    Returns
+    -------
+    pandas.DataFrame
+        one row per multiplicity and NSB configuration with the
+        crossover threshold and the NSB and proton rates there [Hz].
+        NaN if the curves do not cross in the grid.
+    """
+    group_keys = [key for key in NSB_GROUP_KEYS if key in curves and key != "discriminator_threshold"]
+    valid = curves[(curves["nsb_rate"] > 0) & (curves["proton_rate"] > 0)]
+
+    rows = []
+    for group, curve in valid.groupby(group_keys, sort=True):
+        curve = curve.sort_values("discriminator_threshold")
+        threshold = curve["discriminator_threshold"].to_numpy()
+        log_nsb = np.log10(curve["nsb_rate"].to_numpy())
+        log_proton = np.log10(curve["proton_rate"].to_numpy())
+
+        crossover, i, fraction = _log_crossing(threshold, log_nsb - log_proton - np.log10(nsb_fraction))
+
+        row = dict(zip(group_keys, group if isinstance(group, tuple) else (group,)))
+        row["crossover_threshold"] = crossover
+        if i is None:
+            row["nsb_rate"] = row["proton_rate"] = np.nan
+        else:
+            row["nsb_rate"] = 10**(log_nsb[i] + fraction*(log_nsb[i+1] - log_nsb[i]))
+            row["proton_rate"] = 10**(log_proton[i] + fraction*(log_proton[i+1] - log_proton[i]))
+        rows.append(row)
+
+    return pd.DataFrame(rows, columns=group_keys + ["crossover_threshold", "nsb_rate", "proton_rate"])
+
+def _read_table(group, start=None, stop=None):
+    return pd.DataFrame({
+        column: read_hdf5_column(group[column], start, stop)
+        for column in group.attrs["columns"]
+    })
+
+def bias_curves_to_hdf5(curves, crossovers, output_file):
+    """
+    Stores the full bias curve grid and the operating
+    points in one HDF5 file. The grid is sorted by its
+    keys so any curve is a contiguous row range, listed
+    in the index group (key values, start, stop).
+
+    Parameters
+    ----------
+    curves : pandas.DataFrame
+        output of compute_bias_curves
+    crossovers : pandas.DataFrame
+        output of find_bias_crossover
+    output_file : string
+        output HDF5 path
+    """
+    group_keys = [key for key in NSB_GROUP_KEYS if key in curves and key != "discriminator_threshold"]
+    curves = curves.sort_values(group_keys + ["discriminator_threshold"]).reset_index(drop=True)
+
+    ranges = curves.groupby(group_keys, sort=True, dropna=False).indices
+    index = pd.DataFrame([
+        dict(zip(group_keys, key if isinstance(key, tuple) else (key,)),
+             start=rows.min(), stop=rows.max() + 1)
+        for key, rows in ranges.items()
+    ])
+
+    with h5py.File(output_file, "w") as f:
+        for name, table in [("grid", curves), ("index", index), ("crossover", crossovers)]:
+            group = f.create_group(name)
+            group.attrs["columns"] = list(table.columns)
+            write_hdf5_table(group, table)
+
+def read_bias_curves(input_file, **selection):
+    """
+    Reads bias curves written by bias_curves_to_hdf5.
+
+    Parameters
+    ----------
+    input_file : string
+        HDF5 file
+    **selection : optional
+        values of the index keys (e.g. trigger_pixels=3,
+        NSB="150MHz") to read only the matching curves
+
+    Returns
+    -------
+    tuple
+        (pandas.DataFrame, pandas.DataFrame)
+        grid rows and operating points
+    """
+    with h5py.File(input_file, "r") as f:
+        index = _read_table(f["index"])
+        crossovers = _read_table(f["crossover"])
+
+        mask = np.ones(len(index), dtype=bool)
+        for key, value in selection.items():
+            mask &= (index[key] == value).to_numpy()
+            crossovers = crossovers[crossovers[key] == value]
+
+        tables = [
+            _read_table(f["grid"], start, stop)
+            for start, stop in zip(index["start"][mask], index["stop"][mask])
+        ]
+
+    curves = pd.concat(tables, ignore_index=True) if tables else pd.DataFrame()
+
+    return curves, crossovers.reset_index(drop=True)
@@ -0,0 +1,261 @@
+import os
+import re
+
+import numpy as np
+import pandas as pd
+
+from psctsimpipe.Helpers import find_files, open_log_file
+
+# Patterns for the lines CORSIKA writes to standard output.
+# Per-shower blocks are only printed for the first MAXPRT showers,
+# the run block is always printed after END OF RUN.
+NUMBER = r"([-+]?(?:\d+\.?\d*|\.\d+)(?:[EeDd][-+]?\d+)?)"
+
+CORSIKA_CARD_PATTERNS = {
+    "run_number": re.compile(r"^\s*RUNNR\s+(\d+)"),
+    "particle_id": re.compile(r"^\s*PRMPAR\s+(\d+)"),
+    "n_showers": re.compile(r"^\s*NSHOW\s+(\d+)"),
+    "energy_range": re.compile(r"^\s*ERANGE\s+" + NUMBER + r"\s+" + NUMBER),
+    "spectral_slope": re.compile(r"^\s*ESLOPE\s+" + NUMBER),
+}
+
+CORSIKA_SHOWER_PATTERNS = {
+    "energy": re.compile(r"PRIMARY ENERGY\s*=\s*" + NUMBER + r"\s*GEV"),
+    "first_interaction_height": re.compile(
+        r"(?:HEIGHT OF FIRST INTERACTION|FIRST INTERACTION HEIGHT)\s*[=:]?\s*" + NUMBER
+    ),
+    "cpu_time": re.compile(r"TIME NEEDED FOR THIS EVENT\s*[=:(SEC.)\s]*" + NUMBER),
+}
+
+CORSIKA_END_OF_EVENT = "END OF EVENT"
+CORSIKA_END_OF_RUN = "END OF RUN"
+
+CORSIKA_RUN_PATTERNS = {
+    "n_generated": re.compile(r"NUMBER OF GENERATED EVENTS\s*=\s*(\d+)"),
+    "run_cpu_time": re.compile(r"TIME NEEDED FOR THIS RUN\s*[=:(SEC.)\s]*" + NUMBER),
+}
+
+def _to_float(value):
+    """
+    Fortran style exponents (1.0D+03) are also accepted.
+    """
+    return float(value.replace("D", "E").replace("d", "e"))
+
+def parse_corsika_log(file_path):
+    """
+    Parses a CORSIKA standard output log into
+    per-shower rows and a per-run summary.
+
+    Parameters
+    ----------
+    file_path : string
+        CORSIKA .out log, plain or compressed
+
+    Returns
+    -------
+    tuple
+        (list of dict, dict)
+        One dictionary per printed shower with
+        energy [GeV], first_interaction_height [cm]
+        and cpu_time [s] (NaN when not printed),
+        and one dictionary summarising the run.
+    """
+    showers = []
+    shower = {}
+    run = {
+        "log_file": file_path,
+        "run_number": None,
+        "particle_id": None,
+        "n_showers": None,
+        "emin": np.nan,
+        "emax": np.nan,
+        "spectral_slope": np.nan,
+        "n_generated": None,
+        "run_cpu_time": np.nan,
+        "finished": False,
+    }
+
+    with open_log_file(file_path, "r") as f:
+        for line in f:
+            for key, pattern in CORSIKA_CARD_PATTERNS.items():
+                match = pattern.match(line)
+                if match:
+                    if key == "energy_range":
+                        run["emin"] = _to_float(match.group(1))
+                        run["emax"] = _to_float(match.group(2))
+                    elif key == "spectral_slope":
+                        run[key] = _to_float(match.group(1))
+                    else:
+                        run[key] = int(match.group(1))
+
+            for key, pattern in CORSIKA_SHOWER_PATTERNS.items():
+                match = pattern.search(line)
+                if match:
+                    # A new energy line means the previous shower block is complete
+                    if key == "energy" and "energy" in shower:
+                        showers.append(shower)
+                        shower = {}
+                    shower[key] = _to_float(match.group(1))
+
+            if CORSIKA_END_OF_EVENT in line and shower:
+                showers.append(shower)
+                shower = {}
+
+            if CORSIKA_END_OF_RUN in line:
+                run["finished"] = True
+
+            for key, pattern in CORSIKA_RUN_PATTERNS.items():
+                match = pattern.search(line)
+                if match:
+                    run[key] = _to_float(match.group(1)) if key == "run_cpu_time" else int(match.group(1))
+
+    if shower:
+        showers.append(shower)
+
+    for i, shower in enumerate(showers):
+        shower.setdefault("energy", np.nan)
+        shower.setdefault("first_interaction_height", np.nan)
+        shower.setdefault("cpu_time", np.nan)
+        shower["shower"] = i + 1
+        shower["run_number"] = run["run_number"]
+        shower["log_file"] = file_path
+
+    n_done = run["n_generated"] if run["n_generated"] is not None else run["n_showers"]
+    if n_done:
+        run["cpu_time_per_shower"] = run["run_cpu_time"]/n_done
+    else:
+        run["cpu_time_per_shower"] = np.nan
+
+    return showers, run
+
+def parse_corsika_log_files(directory, search_pattern="*.out*"):
+    """
+    Parses every CORSIKA log in a directory.
+
+    Parameters
+    ----------
+    directory : string
+        directory where CORSIKA logs live
+    search_pattern : str, optional
+        pattern for log files, plain or compressed, by default "*.out*"
+
+    Returns
+    -------
+    tuple
+        (pandas.DataFrame, pandas.DataFrame)
+        Per-shower rows and per-run summaries.
+    """
+    shower_rows = []
+    run_rows = []
+
+    for file_path in find_files(directory, search_pattern):
+        try:
+            showers, run = parse_corsika_log(file_path)
+        except Exception as e:
+            print(f"[!] {os.path.basename(file_path)} - Unable to read file: {e}")
+            continue
+        shower_rows.extend(showers)
+        run_rows.append(run)
+
+    shower_columns = [
+        "log_file", "run_number", "shower", "energy",
+        "first_interaction_height", "cpu_time"
+    ]
+    showers = pd.DataFrame(shower_rows, columns=shower_columns)
+    runs = pd.DataFrame(run_rows)
+
+    return showers, runs
+
+def fit_corsika_cpu_time(showers, runs=None):
+    """
+    Fits CPU seconds per shower as a power law in
+    primary energy, cpu_time = norm*(E/1 TeV)**index.
+
+    Per-shower timings are used when CORSIKA printed them.
+    Otherwise finished runs are used, assigning their
+    mean time per shower to the ESLOPE weighted mean
+    energy of their ERANGE.
+
+    Parameters
+    ----------
+    showers : pandas.DataFrame
+        per-shower rows from parse_corsika_log_files
+    runs : pandas.DataFrame, optional
+        per-run rows from parse_corsika_log_files
+
+    Returns
+    -------
+    dict
+        norm [s], index, and number of points used
+    """
+    data = showers.dropna(subset=["energy", "cpu_time"])
+    data = data[(data["energy"] > 0) & (data["cpu_time"] > 0)]
+
+    if len(data) >= 2:
+        energy = data["energy"].to_numpy()/1000.  # GeV to TeV
+        cpu_time = data["cpu_time"].to_numpy()
+    elif runs is not None:
+        data = runs[runs["finished"]].dropna(
+            subset=["emin", "emax", "spectral_slope", "cpu_time_per_shower"]
+        )
+        energy = np.array([
+            _mean_energy(emin, emax, slope)
+            for emin, emax, slope in zip(data["emin"], data["emax"], data["spectral_slope"])
+        ])/1000.  # GeV to TeV
+        cpu_time = data["cpu_time_per_shower"].to_numpy()
+    else:
+        raise ValueError("Not enough showers with timing information to fit.")
+
+    if len(energy) < 2:
+        raise ValueError("Not enough showers with timing information to fit.")
+
+    index, log_norm = np.polyfit(np.log10(energy), np.log10(cpu_time), 1)
+
+    return {"norm": 10**log_norm, "index": index, "n_points": len(energy)}
+
+def _power_law_moment(emin, emax, exponent):
+    """
+    Integral of E**exponent between emin and emax.
+    """
+    if np.isclose(exponent, -1.):
+        return np.log(emax/emin)
+    return (emax**(exponent+1) - emin**(exponent+1))/(exponent+1)
+
+def _mean_energy(emin, emax, slope):
+    """
+    Mean energy of a E**slope spectrum between emin and emax.
+    """
+    return _power_law_moment(emin, emax, slope+1)/_power_law_moment(emin, emax, slope)
+
+def predict_corsika_cpu_time(fit, emin, emax, n_showers, spectral_slope=-2.0):
+    """
+    Predicts the CPU time of a CORSIKA run from a
+    fit_corsika_cpu_time result. Use it to size
+    NSHOW and ERANGE chunks for the walltime requested.
+
+    Parameters
+    ----------
+    fit : dict
+        output of fit_corsika_cpu_time
+    emin : float
+        lower edge of ERANGE in GeV
+    emax : float
+        upper edge of ERANGE in GeV
+    n_showers : int
+        NSHOW
+    spectral_slope : float, optional
+        ESLOPE, by default -2.0
+
+    Returns
+    -------
+    float
+        expected CPU time in seconds
+    """
+    emin = emin/1000.  # GeV to TeV
+    emax = emax/1000.
+    mean_time = fit["norm"]*(
+        _power_law_moment(emin, emax, spectral_slope + fit["index"])
+        / _power_law_moment(emin, emax, spectral_slope)
+    )
+
+    return n_showers*mean_time
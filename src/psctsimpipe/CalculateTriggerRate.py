@@ -1,15 +1,26 @@
+import os
+import re
 import pandas as pd
 import numpy as np
 import h5py
 import astropy.units as u
-import importlib.resources
-from scipy.interpolate import CubicSpline
+from concurrent.futures import ProcessPoolExecutor
+from scipy.stats import chi2
+
+from psctsimpipe.EnergyBinning import DEFAULT_LOG_BIN_WIDTH, bin_edges_from_centers, table_bin_edges
+from psctsimpipe.EventIOReader import count_simtel_triggers, trigger_fraction_from_hdata
+from psctsimpipe.FluxModels import read_DAMPE_flux, get_flux_model, evaluate_flux
+from psctsimpipe.Helpers import COMPRESSED_LOG_SUFFIXES, count_phrases_in_file, find_files, open_log_file
+from psctsimpipe.pSCTTriggerRate import extract_trigger_rate_log_params
 
 # NSB functions 
 
 def count_phrase_in_file(file_path: str, phrase: str) -> int:
     """
     Counts the number of times a specific phrase appears in a file.
+    The file may be gzip (.gz) or zstandard (.zst) compressed.
+    It is streamed in chunks so memory stays constant
+    even for list=all logs of several hundred MB.
 
     Parameters
     ----------
@@ -25,9 +36,7 @@ def count_phrase_in_file(file_path: str, phrase: str) -> int:
     """  
     
     try:
-        with open(file_path, 'r', encoding='utf-8') as file:
-            content = file.read()
-            return content.count(phrase)
+        return count_phrases_in_file(file_path, [phrase])[phrase]
     except FileNotFoundError:
         print(f"Error: The file '{file_path}' was not found.")
         return -1
@@ -75,6 +84,211 @@ def calculate_NSB_trigger_rate(file_path,
 
     return trigger_rate
 
+# Parameters identifying a trigger configuration in the log names
+NSB_GROUP_KEYS = [
+    "trigger_pixels",
+    "discriminator_threshold",
+    "fadc_bins",
+    "fadc_sum_bins",
+    "disc_bins",
+    "night_type",
+    "NSB",
+]
+
+def poisson_rate_interval(counts, exposure, confidence=0.6827):
+    """
+    Central (Garwood) Poisson confidence interval
+    for a rate counts/exposure.
+
+    Parameters
+    ----------
+    counts : array like
+        number of observed triggers
+    exposure : array like
+        total time window in seconds
+    confidence : float, optional
+        confidence level, by default 0.6827 (1 sigma)
+
+    Returns
+    -------
+    tuple
+        (lower, upper) rate bounds in Hz
+    """
+    counts = np.asarray(counts, dtype=float)
+    alpha = 1 - confidence
+    lower = np.where(counts > 0, chi2.ppf(alpha/2, 2*counts)/2, 0.)
+    upper = chi2.ppf(1 - alpha/2, 2*counts + 2)/2
+    return lower/exposure, upper/exposure
+
+def _NSB_log_counts(file_path, n_events=None, head_bytes=65536):
+    """
+    Trigger count and number of simulated events of a
+    single trigger rate log. Unless given, the number of
+    events is read from the CORSIKA dummy file name
+    (DATDummy<n_events>.seed#) echoed at the top of the log.
+    """
+    params = extract_trigger_rate_log_params(file_path)
+    if params is None:
+        return None
+
+    try:
+        if n_events is None:
+            with open_log_file(file_path, "rb") as f:
+                match = re.search(rb"DATDummy(\d+)\.seed", f.read(head_bytes))
+            n_events = int(match.group(1)) if match else np.nan
+
+        params["triggers"] = count_phrases_in_file(file_path, ["has triggered!"])["has triggered!"]
+    except Exception as e:
+        print(f"[!] {os.path.basename(file_path)} - Unable to read file: {e}")
+        return None
+
+    params["n_events"] = n_events
+    params["log_file"] = file_path
+
+    return params
+
+def _NSB_simtel_counts(file_path, n_events=None, head_bytes=65536):
+    """
+    Trigger count and number of simulated events of a
+    single trigger rate .simtel output, read from its event
+    stream (see EventIOReader.count_simtel_triggers), with
+    the telescope triggers per trigger type ({type}_triggers)
+    and per telescope (tel{id}_triggers).
+    Unless given, the number of events is the number of
+    MC event blocks or, if there are none, the CORSIKA dummy
+    file name echoed at the top of the matching log.
+    """
+    params = extract_trigger_rate_log_params(file_path)
+    if params is None:
+        return None
+
+    try:
+        counts = count_simtel_triggers(file_path)
+        if n_events is None and counts["mc_events"] > 0:
+            n_events = counts["mc_events"]
+        elif n_events is None:
+            log_file = re.sub(r"\.simtel(\.gz|\.zst)?$", ".log", file_path)
+            n_events = np.nan
+            for candidate in [log_file] + [log_file + suffix for suffix in COMPRESSED_LOG_SUFFIXES]:
+                if os.path.exists(candidate):
+                    with open_log_file(candidate, "rb") as f:
+                        match = re.search(rb"DATDummy(\d+)\.seed", f.read(head_bytes))
+                    n_events = int(match.group(1)) if match else np.nan
+                    break
+    except Exception as e:
+        print(f"[!] {os.path.basename(file_path)} - Unable to read file: {e}")
+        return None
+
+    params["triggers"] = counts["events"]
+    for name, value in counts["trigger_types"].items():
+        params[f"{name}_triggers"] = value
+    for tel_id, value in sorted(counts["telescope_triggers"].items()):
+        params[f"tel{tel_id}_triggers"] = value
+    params["n_events"] = n_events
+    params["log_file"] = file_path
+
+    return params
+
+# Readers of the trigger counts of one run
+NSB_COUNT_SOURCES = {
+    "log": (_NSB_log_counts, "*.log*"),
+    "simtel": (_NSB_simtel_counts, "*.simtel*"),
+}
+
+def aggregate_NSB_trigger_rates(directory,
+                                search_pattern=None,
+                                n_events=None,
+                                ns_per_bin=1.0,
+                                window_bins="fadc_bins",
+                                confidence=0.6827,
+                                n_workers=None,
+                                source="log"
+                                ):
+    """
+    Scans a directory of trigger rate logs (or .simtel
+    outputs) in parallel, groups them by the trigger
+    configuration encoded in their names (see
+    trigger_rate_command) and computes one NSB trigger
+    rate per configuration.
+
+    Parameters
+    ----------
+    directory : string
+        directory where trigger rate logs live
+    search_pattern : str, optional
+        pattern for log files, by default "*.log*",
+        or "*.simtel*" when source is "simtel"
+    n_events : int, optional
+        events simulated per log, by default read from 
+        the CORSIKA dummy file name in each log
+    ns_per_bin : float, optional
+        duration of a time interval in ns, by default 1.0
+    window_bins : str, optional
+        which number of intervals defines the time window
+        per event, "fadc_bins" or "disc_bins", by default "fadc_bins"
+    confidence : float, optional
+        confidence level of the Poisson interval, by default 0.6827
+    n_workers : int, optional
+        number of processes, by default os.cpu_count()
+    source : str, optional
+        "log" counts "has triggered!" lines in the logs
+        (requires runs with -C list=all), "simtel" counts
+        triggered events in the .simtel outputs, by default "log"
+
+    Returns
+    -------
+    pandas.DataFrame
+        one row per configuration with the number of logs,
+        summed triggers and exposure [s], trigger rate [Hz]
+        and its confidence interval [Hz]. With source "simtel"
+        also the summed triggers per trigger type
+        ({type}_triggers) and per telescope (tel{id}_triggers).
+    """
+    count_function, default_pattern = NSB_COUNT_SOURCES[source]
+    log_files = find_files(directory, search_pattern or default_pattern)
+
+    with ProcessPoolExecutor(max_workers=n_workers) as executor:
+        rows = [
+            row for row in executor.map(
+                count_function,
+                log_files,
+                [n_events]*len(log_files),
+                chunksize=max(1, len(log_files)//(4*(n_workers or os.cpu_count() or 1)))
+            )
+            if row is not None
+        ]
+
+    logs = pd.DataFrame(rows)
+    if logs.empty:
+        return logs
+
+    unknown = logs["n_events"].isna()
+    if unknown.any():
+        print(f"Warning: number of events unknown for {unknown.sum()} logs, they are skipped. Pass n_events.")
+        logs = logs[~unknown]
+
+    logs["exposure"] = logs["n_events"]*logs[window_bins]*ns_per_bin*1e-9 # Converting from ns to second
+
+    # Per trigger type and per telescope counts, zero
+    # for telescopes that never triggered in a run
+    count_columns = [column for column in logs.columns if column.endswith("_triggers")]
+    logs[count_columns] = logs[count_columns].fillna(0).astype(int)
+
+    table = logs.groupby(NSB_GROUP_KEYS, sort=True).agg(
+        n_logs=("log_file", "size"),
+        triggers=("triggers", "sum"),
+        n_events=("n_events", "sum"),
+        exposure=("exposure", "sum"),
+        **{column: (column, "sum") for column in count_columns}
+    ).reset_index()
+
+    table["trigger_rate"] = table["triggers"]/table["exposure"] # Hz
+    table["trigger_rate_low"], table["trigger_rate_high"] = poisson_rate_interval(
+        table["triggers"], table["exposure"], confidence
+    )
+
+    return table
+
 
 # Proton trigger rate functions
 
@@ -115,12 +329,24 @@ def powlaw_integral(E1,E2,gamma=2.0, E_0=1.0):
 
 def read_histo_output(input_histo_output):
     """
+    Reads the 1007/1006 y projection of a sim_telarray 
+    histogram file. Either the text export of the projection
+    or the .hdata.gz file itself, which is read natively
+    (see EventIOReader.trigger_fraction_from_hdata).
 
     Parameters
     ----------
-    input_histo_output : _type_
-        _description_
+    input_histo_output : string
+        text export or .hdata(.gz) histogram file
+
+    Returns
+    -------
+    pandas.DataFrame
+        LogE, N_frac, N_trigg and N_total per energy bin
     """    
+    if str(input_histo_output).endswith((".hdata", ".hdata.gz", ".hdata.zst")):
+        return trigger_fraction_from_hdata(str(input_histo_output))
+
     temp_data = pd.read_csv(
         input_histo_output, 
         sep='\t', 
@@ -134,44 +360,12 @@ def read_histo_output(input_histo_output):
     return data
 
 
-def read_DAMPE_flux(input_table):
-    """
-    Used to read in cosmic proton flux
-    measured by DAMPE stored in
-    psctsimpipe/data/
-
-    Parameters
-    ----------
-    input_table : string
-        table with proton fluxes
-        as measured by DAMPE
-    """    
-    columns = ["E",         # ith energy bin center
-               "Emin",      # ith lower energy bin edge
-               "Emax",      # ith upper energy bin edge
-               "F_invGeV_invsqmeter_inversec_invsr", 
-               "F_err_stat", 
-               "F_err_ana", 
-               "F_err_had"
-               ]
-
-    temp_data = pd.read_csv(
-        input_table, 
-        sep='\s+',
-        # delim_whitespace=True, # will be deprecated in future versions
-        names=columns,
-        dtype=float,
-        skiprows=1
-        )
-    
-    data = temp_data.dropna()
-
-    return data
-
 def interpolated_DAMPE_flux(Energy):
     """
     Will return a flux value for a given energy
     by interpolating the DAMPE flux measurements.
+    The table is read and the spline fitted only once
+    per process (see FluxModels.get_flux_model).
     Expected units are
     Energy [=] TeV
     Flux [=]  TeV^-1 m^-2 sr^-1 s^-1
@@ -185,23 +379,9 @@ def interpolated_DAMPE_flux(Energy):
     ----------
         numpy.array
     """
+    interp_flux = evaluate_flux("DAMPE_proton", Energy)
 
-    with importlib.resources.open_binary("psctsimpipe.data", "DAMPE_proton_flux.txt") as f:
-        data = read_DAMPE_flux(f)   
-        DAMPE_energy = data["E"]/1000 # GeV to TeV
-        DAMPE_flux = data['F_invGeV_invsqmeter_inversec_invsr']*1000 #GeV^-1 to TeV^-1 m^-2 sr^-1 s^-1
-
-        # Interpolate in log space since relationship is linear
-        logE = np.log10(DAMPE_energy)
-        logF = np.log10(DAMPE_flux)
-        interpolated_flux = CubicSpline(logE,logF)
-
-        input_logE = np.log10(Energy)
-        log_interp_flux = interpolated_flux(input_logE)
-        # Convert back to linear space
-        interp_flux = (10**log_interp_flux)*(u.m**(-2))*(u.sr**(-1))*(u.s**(-1))*(u.TeV**(-1))
-
-        return interp_flux
+    return interp_flux*(u.m**(-2))*(u.sr**(-1))*(u.s**(-1))*(u.TeV**(-1))
 
 
 def display_DAMPE_flux():
@@ -209,10 +389,9 @@ def display_DAMPE_flux():
     Displays the information contained in 
     psctsimpipe/data/DAMPE_proton_flux.txt
     """
-    with importlib.resources.open_binary("psctsimpipe.data", "DAMPE_proton_flux.txt") as f:
-        data = read_DAMPE_flux(f)    
-        print("The DAMPE flux table reads as follows: \n")
-        print(data.to_string())
+    data = get_flux_model("DAMPE_proton").table
+    print("The DAMPE flux table reads as follows: \n")
+    print(data.to_string())
 
 
 def return_DAMPE_flux_table():
@@ -221,13 +400,109 @@ def return_DAMPE_flux_table():
     psctsimpipe/data/DAMPE_proton_flux.txt
     in a pandas dataframe
     """
-    with importlib.resources.open_binary("psctsimpipe.data", "DAMPE_proton_flux.txt") as f:
-        data = read_DAMPE_flux(f)   
-        return data
+    return get_flux_model("DAMPE_proton").table.copy()
     
+# Units of the arrays returned by proton_trigger_rate_arrays
+# and of the columns of proton_trigger_rate_pdtable
+PROTON_RATE_UNITS = {
+    "flux": u.TeV**(-1)*u.m**(-2)*u.sr**(-1)*u.s**(-1),
+    "integral_flux": u.m**(-2)*u.sr**(-1)*u.s**(-1),
+    "Energy": u.TeV,
+    "low_Ebin_edge": u.TeV,
+    "high_Ebin_edge": u.TeV,
+    "E_bin_width": u.TeV,
+    "trigger_rate": u.Hz,
+    "Aeff": u.m**2*u.sr,
+    "N_frac": u.dimensionless_unscaled,
+}
+
+# Units of the per-bin tables, stored in DataFrame.attrs["units"]
+PROTON_TABLE_UNITS = {
+    **{key: unit.to_string() for key, unit in PROTON_RATE_UNITS.items()},
+    "N_triggered": "events",
+    "N_total": "events",
+}
+
+def proton_trigger_rate_arrays(logE,
+                               N_frac,
+                               area=np.pi*(833)**2,
+                               solid_angle=cone_solid_angle(10),
+                               deltaE=None,
+                               flux_model="DAMPE_proton",
+                               logE_low=None,
+                               logE_high=None
+                               ):
+    """
+    Unit-free core of the proton trigger rate calculation:
+    Effective Area * Solid Angle * Flux * Energy-bin width
+    per energy bin, on plain numpy arrays.
+
+    Units are those of PROTON_RATE_UNITS, attach them
+    with with_units=True in the calling functions if needed.
+
+    Parameters
+    ----------
+    logE : array like
+        log10 of the energy bin centers in TeV
+    N_frac : array like
+        triggered fraction per energy bin
+    area : float, optional
+        area over which events were generated in m^2, by default np.pi*(833)**2
+    solid_angle : float, optional
+        solid angle over which events were generated in sr, by default cone_solid_angle(10)
+    deltaE : float, optional
+        width of uniform energy bins in log10(E), by default
+        None: taken from logE_low/logE_high, or inferred from
+        the bin centers (see EnergyBinning.bin_edges_from_centers),
+        0.05 for a single bin
+    flux_model : str, optional
+        registered flux model name, by default "DAMPE_proton"
+    logE_low : array like, optional
+        log10 of the lower bin edges in TeV
+    logE_high : array like, optional
+        log10 of the upper bin edges in TeV
+
+    Returns
+    -------
+    dict
+        numpy arrays keyed as PROTON_RATE_UNITS
+    """
+    logE = np.asarray(logE, dtype=float)
+    N_frac = np.asarray(N_frac, dtype=float)
+
+    if logE_low is None or logE_high is None:
+        if deltaE is not None:
+            logE_low, logE_high = logE-deltaE/2, logE+deltaE/2
+        else:
+            logE_low, logE_high = bin_edges_from_centers(logE, default_width=DEFAULT_LOG_BIN_WIDTH)
+
+    Energy = 10**logE
+    Elow = 10**np.asarray(logE_low, dtype=float)
+    Ehigh = 10**np.asarray(logE_high, dtype=float)
+    E_bin_widths = Ehigh-Elow
+
+    flux = evaluate_flux(flux_model, Energy)
+    integral_flux = E_bin_widths*flux
+
+    Aeff = area*N_frac*solid_angle
+    trigger_rate_per_Ebin = Aeff*integral_flux
+
+    return {
+        "flux": flux,
+        "integral_flux": integral_flux,
+        "Energy": Energy,
+        "low_Ebin_edge": Elow,
+        "high_Ebin_edge": Ehigh,
+        "E_bin_width": E_bin_widths,
+        "trigger_rate": trigger_rate_per_Ebin,
+        "Aeff": Aeff,
+        "N_frac": N_frac,
+    }
+
 def calculate_proton_trigger_rate(input_file,
                            area=np.pi*(833)**2,
                            solid_angle=cone_solid_angle(10),
+                           with_units=False
                         ):
     """
     Calculates trigger rate doing the following:
@@ -243,6 +518,9 @@ def calculate_proton_trigger_rate(input_file,
         area over which events were generated, by default np.pi*(833)**2
     solid_angle : float, optional
         solid angle over which events were generated, by default cone_solid_angle(10)
+    with_units : bool, optional
+        return an astropy Quantity instead of a float, by default False
+
     Returns
     -------
     float
@@ -250,20 +528,44 @@ def calculate_proton_trigger_rate(input_file,
     """    
     data = read_histo_output(input_file)
 
-    deltaE=0.05
+    rates = proton_trigger_rate_arrays(
+        data["LogE"], data["N_frac"], area, solid_angle,
+        logE_low=data.get("LogE_low"), logE_high=data.get("LogE_high")
+    )
 
-    logE = data["LogE"]
-    Elow = u.TeV*10**(logE-deltaE/2)
-    Ehigh = u.TeV*10**(logE+deltaE/2)
-    E_bin_widths = Ehigh-Elow
+    total_trigger_rate = np.sum(rates["trigger_rate"])
 
-    interp_flux = interpolated_DAMPE_flux(10**logE)
+    if with_units:
+        return total_trigger_rate*u.Hz
 
-    trigger_rate_per_Ebin = (area*(u.m**2))*data["N_frac"]*(solid_angle*u.sr)*interp_flux*E_bin_widths
+    return total_trigger_rate
 
-    total_trigger_rate = np.sum(trigger_rate_per_Ebin)
+def _proton_trigger_rate_table(data, area, solid_angle):
+    """
+    Per energy bin table of proton_trigger_rate_pdtable
+    from the output of read_histo_output.
+    """
+    rates = proton_trigger_rate_arrays(
+        data["LogE"], data["N_frac"], area, solid_angle,
+        logE_low=data.get("LogE_low"), logE_high=data.get("LogE_high")
+    )
 
-    return total_trigger_rate
+    table_dict = {
+        "flux": rates["flux"],
+        "integral_flux": rates["integral_flux"],
+        "Energy": rates["Energy"],
+        "low_Ebin_edge": rates["low_Ebin_edge"],
+        "high_Ebin_edge": rates["high_Ebin_edge"],
+        "trigger_rate": rates["trigger_rate"],
+        "Aeff": rates["Aeff"],
+        "N_frac": data['N_frac'].to_numpy(),
+        "N_triggered": data['N_trigg'].to_numpy(),
+        "N_total": data['N_total'].to_numpy(),
+    }
+
+    table = pd.DataFrame(table_dict)
+    table.attrs["units"] = dict(PROTON_TABLE_UNITS)
+    return table
 
 def proton_trigger_rate_pdtable(input_file,
                               area=np.pi*(833)**2,
@@ -277,6 +579,8 @@ def proton_trigger_rate_pdtable(input_file,
     trigger rate.
 
     It assumes the units used in sim_telarray.
+    They are listed in table.attrs["units"]
+    (see PROTON_TABLE_UNITS).
 
     Parameters
     ----------
@@ -295,56 +599,7 @@ def proton_trigger_rate_pdtable(input_file,
     pandas.dataframe
 
     """
-    data = read_histo_output(input_file)
-
-    deltaE=0.05
-
-    logE = data["LogE"]
-    Energy = u.TeV*10**logE
-
-    Elow = u.TeV*10**(logE-deltaE/2)
-    Ehigh = u.TeV*10**(logE+deltaE/2)
-    E_bin_widths = Ehigh-Elow
-    
-    interp_flux = interpolated_DAMPE_flux(10**logE)
-    integral_flux = E_bin_widths*interp_flux
-    
-    trigger_rate_per_Ebin = (area*(u.m**2))*data["N_frac"]*(solid_angle*u.sr)*integral_flux
-    Aeff = (area*(u.m**2))*data["N_frac"]*(solid_angle*u.sr)
-    
-    N_frac = data['N_frac']
-    N_trigg = data['N_trigg']
-    N_total = data['N_total']
-
-
-    table_dict = {
-        "flux": interp_flux,
-        "integral_flux": integral_flux,
-        "Energy": Energy,
-        "low_Ebin_edge":Elow,
-        "high_Ebin_edge": Ehigh,
-        "trigger_rate": trigger_rate_per_Ebin,
-        "Aeff": Aeff,
-        "N_frac": N_frac,
-        "N_triggered": N_trigg,
-        "N_total": N_total,
-    }
-
-    trigger_rate_table = pd.DataFrame(table_dict)
-    
-    print("The units for the table area:")    
-    print("flux [=] TeV^-1 m^-2 sr^-1 s^-1")
-    print("integral_flux [=] m^-2 sr^-1 s^-1")
-    print("Energy [=] TeV")
-    print("low_Ebin_edge [=] TeV")
-    print("high_Ebin_edge [=] TeV")
-    print("trigger_rate [=] Hz")
-    print("Aeff [=] m^2 sr")
-    print("N_frac [=] unitless")
-    print("N_triggered [=] events")
-    print("N_total [=] events")
-
-    return trigger_rate_table
+    return _proton_trigger_rate_table(read_histo_output(input_file), area, solid_angle)
 
 def proton_trigger_rate_to_hdf5(input_file,
                                 output_file,
@@ -352,13 +607,15 @@ def proton_trigger_rate_to_hdf5(input_file,
                               solid_angle=cone_solid_angle(10)
                               ):
     """
-    Returns a pandas data frame with the
-    trigger rate per energy bin as well as
-    other useful parameters listed below:
-    Energy bin center, edges, assumed flux
+    Writes the trigger rate per energy bin as well
+    as other useful parameters listed below to an
+    HDF5 file: Energy bin center, edges, assumed flux
     trigger rate.
 
-    It assumes the units used in sim_telarray.
+    It assumes the units used in sim_telarray,
+    stored in the "unit" attribute of every dataset.
+    To collect many configurations in a single file
+    use TriggerRateStore.append_proton_trigger_rate.
 
     Parameters
     ----------
@@ -366,6 +623,8 @@ def proton_trigger_rate_to_hdf5(input_file,
         Output of division of histogram 1007/1006
         y projection. In other words
         Triggered/Number-of-total-events
+    output_file : string
+        output HDF5 file
     area : float, optional
         area over which events were generated, by default np.pi*(833)**2
     solid_angle : float, optional
@@ -377,40 +636,230 @@ def proton_trigger_rate_to_hdf5(input_file,
     hdf5 file
 
     """
-    data = read_histo_output(input_file)
+    table = _proton_trigger_rate_table(read_histo_output(input_file), area, solid_angle)
+    units = table.attrs["units"]
 
-    deltaE=0.05
+    with h5py.File(output_file, 'w') as f:
+        for column in table.columns:
+            name = "N_trigg" if column == "N_triggered" else column
+            dataset = f.create_dataset(name, data=table[column].to_numpy(), compression="gzip")
+            dataset.attrs["unit"] = units[column]
 
-    logE = data["LogE"]
-    Energy = u.TeV*10**logE
 
-    Elow = u.TeV*10**(logE-deltaE/2)
-    Ehigh = u.TeV*10**(logE+deltaE/2)
-    E_bin_widths = Ehigh-Elow
-    
-    interp_flux = interpolated_DAMPE_flux(10**logE)
-    integral_flux = E_bin_widths*interp_flux
-    
-    trigger_rate_per_Ebin = (area*(u.m**2))*data["N_frac"]*(solid_angle*u.sr)*integral_flux
-    Aeff = (area*(u.m**2))*data["N_frac"]*(solid_angle*u.sr)
-    
-    N_frac = data['N_frac']
-    N_trigg = data['N_trigg']
-    N_total = data['N_total']
 
-    with h5py.File(output_file, 'w') as f:
-        f.create_dataset("flux", data=interp_flux)
-        f.create_dataset("integral_flux", data=integral_flux)
-        f.create_dataset("Energy", data=Energy)
-        f.create_dataset("low_Ebin_edge", Elow)
-        f.create_dataset("high_Ebin_edge", Ehigh)
-        f.create_dataset("trigger_rate", trigger_rate_per_Ebin)
-        f.create_dataset("Aeff", Aeff)
-        f.create_dataset("N_frac", N_frac)
-        f.create_dataset("N_trigg", N_trigg)
-        f.create_dataset("N_total", N_total)
+def stack_histo_outputs(input_files, n_workers=None, decimals=6):
+    """
+    Reads many histogram exports (see read_histo_output)
+    in parallel and stacks their columns on a shared
+    log10(E) grid, the union of the bin centers of all files.
+    Every file keeps its own bin edges (see
+    EnergyBinning.table_bin_edges), so files with different
+    binnings give the same rates as read one by one.
+    Bins missing in a file are filled with zeros and
+    have zero width, so they do not contribute to rates.
+
+    Parameters
+    ----------
+    input_files : list
+        outputs of division of histogram 1007/1006 y projection
+    n_workers : int, optional
+        number of processes, by default os.cpu_count()
+    decimals : int, optional
+        bin centers are matched after rounding to 
+        this many decimals, by default 6
+
+    Returns
+    -------
+    tuple
+        (logE, stacks, present)
+        logE is the shared grid (n_bins,),
+        stacks a dictionary of (n_files, n_bins) arrays with
+        N_frac, N_trigg, N_total and the log10 edges LogE_low
+        and LogE_high of each file, and present a boolean
+        (n_files, n_bins) array flagging bins found in each file.
+    """
+    input_files = list(input_files)
+    with ProcessPoolExecutor(max_workers=n_workers) as executor:
+        tables = list(executor.map(read_histo_output, input_files))
+
+    file_logE = [np.round(table["LogE"].to_numpy(dtype=float), decimals) for table in tables]
+    logE = np.unique(np.concatenate(file_logE)) if file_logE else np.array([])
+
+    shape = (len(tables), len(logE))
+    stacks = {column: np.zeros(shape) for column in ["N_frac", "N_trigg", "N_total"]}
+    stacks["LogE_low"] = np.tile(logE, (len(tables), 1))
+    stacks["LogE_high"] = stacks["LogE_low"].copy()
+    present = np.zeros(shape, dtype=bool)
+
+    for i, (table, bins) in enumerate(zip(tables, file_logE)):
+        index = np.searchsorted(logE, bins)
+        present[i, index] = True
+        for column in ["N_frac", "N_trigg", "N_total"]:
+            stacks[column][i, index] = table[column].to_numpy(dtype=float)
+        stacks["LogE_low"][i, index], stacks["LogE_high"][i, index] = table_bin_edges(table)
+
+    return logE, stacks, present
+
+def calculate_proton_trigger_rates(input_files,
+                                   area=np.pi*(833)**2,
+                                   solid_angle=cone_solid_angle(10),
+                                   deltaE=None,
+                                   flux_model="DAMPE_proton",
+                                   n_workers=None,
+                                   output_file=None
+                                   ):
+    """
+    Vectorised calculate_proton_trigger_rate/proton_trigger_rate_pdtable
+    for many histogram exports at once. The N_frac columns of all
+    files are stacked into one (n_files, n_bins) array and every
+    rate is computed in a single pass.
+
+    Parameters
+    ----------
+    input_files : list
+        outputs of division of histogram 1007/1006 y projection
+    area : float, optional
+        area over which events were generated, by default np.pi*(833)**2
+    solid_angle : float, optional
+        solid angle over which events were generated, by default cone_solid_angle(10)
+    deltaE : float, optional
+        width of the energy bins in log10(E), by default None:
+        the bin edges of each file (see stack_histo_outputs)
+    flux_model : str, optional
+        registered flux model name, by default "DAMPE_proton"
+    n_workers : int, optional
+        number of processes used to read the files, by default os.cpu_count()
+    output_file : string, optional
+        if given, the stacked arrays are also written to this HDF5 file
+
+    Returns
+    -------
+    tuple
+        (pandas.DataFrame, pandas.DataFrame)
+        total trigger rate [Hz] per input file, and a tidy
+        per-bin table (one row per file and energy bin present 
+        in that file) with the columns of proton_trigger_rate_pdtable.
+    """
+    input_files = list(input_files)
+    logE, stacks, present = stack_histo_outputs(input_files, n_workers)
 
+    if deltaE is None:
+        rates = proton_trigger_rate_arrays(
+            logE, stacks["N_frac"], area, solid_angle, flux_model=flux_model,
+            logE_low=stacks["LogE_low"], logE_high=stacks["LogE_high"]
+        )
+    else:
+        rates = proton_trigger_rate_arrays(logE, stacks["N_frac"], area, solid_angle, deltaE, flux_model)
+
+    total_trigger_rate = np.sum(rates["trigger_rate"], axis=1)
+    totals = pd.DataFrame({
+        "input_file": input_files,
+        "trigger_rate": total_trigger_rate,
+    })
+
+    file_index, bin_index = np.nonzero(present)
+    table = pd.DataFrame({
+        "input_file": np.asarray(input_files, dtype=object)[file_index],
+        "LogE": logE[bin_index],
+        "flux": rates["flux"][bin_index],
+        "integral_flux": np.broadcast_to(rates["integral_flux"], present.shape)[file_index, bin_index],
+        "Energy": rates["Energy"][bin_index],
+        "low_Ebin_edge": np.broadcast_to(rates["low_Ebin_edge"], present.shape)[file_index, bin_index],
+        "high_Ebin_edge": np.broadcast_to(rates["high_Ebin_edge"], present.shape)[file_index, bin_index],
+        "trigger_rate": rates["trigger_rate"][file_index, bin_index],
+        "Aeff": rates["Aeff"][file_index, bin_index],
+        "N_frac": stacks["N_frac"][file_index, bin_index],
+        "N_triggered": stacks["N_trigg"][file_index, bin_index],
+        "N_total": stacks["N_total"][file_index, bin_index],
+    })
+    table.attrs["units"] = dict(PROTON_TABLE_UNITS)
+
+    if output_file is not None:
+        with h5py.File(output_file, 'w') as f:
+            f.create_dataset("input_files", data=np.asarray(input_files, dtype=object), dtype=h5py.string_dtype())
+            f.create_dataset("LogE", data=logE)
+            f.create_dataset("total_trigger_rate", data=total_trigger_rate)
+            for key in ["flux", "Energy"]:
+                f.create_dataset(key, data=rates[key])
+            for key in ["integral_flux", "low_Ebin_edge", "high_Ebin_edge", "trigger_rate", "Aeff"]:
+                f.create_dataset(key, data=np.broadcast_to(rates[key], present.shape), compression="gzip")
+            for key, stack in stacks.items():
+                f.create_dataset(key, data=stack, compression="gzip")
+            f.create_dataset("present", data=present, compression="gzip")
+
+    return totals, table
+
+def calculate_cosmic_ray_trigger_rates(species,
+                                       deltaE=None,
+                                       n_workers=None
+                                       ):
+    """
+    Trigger rates of several cosmic ray species in one
+    batched computation. Histograms of every species are
+    read in parallel and stacked on a shared log10(E) grid,
+    each keeping its own bin edges (see stack_histo_outputs),
+    the fluxes of all species are tabulated on that grid and
+    every rate comes out of a single broadcast product
+    Area * Solid Angle * N_frac * Flux * Energy-bin width.
 
+    Parameters
+    ----------
+    species : dict
+        species name as keys, and as values dictionaries with
+        input_file (1007/1006 export or .hdata.gz), flux_model
+        (registered name, see FluxModels.register_flux_model),
+        and optionally area [m^2] and solid_angle [sr]
+        (by default np.pi*(833)**2 and cone_solid_angle(10)).
+        e.g. {"proton": {"input_file": "proton.hdata.gz",
+                          "flux_model": "DAMPE_proton"},
+              "helium": {"input_file": "helium.hdata.gz",
+                          "flux_model": "helium",
+                          "solid_angle": cone_solid_angle(8)}}
+    deltaE : float, optional
+        width of the energy bins in log10(E), by default None:
+        the bin edges of each file
+    n_workers : int, optional
+        number of processes used to read the files, by default os.cpu_count()
+
+    Returns
+    -------
+    tuple
+        (pandas.DataFrame, float)
+        species, input_file, flux_model, area, solid_angle
+        and trigger_rate [Hz] per species, and the total
+        trigger rate [Hz] of all species
+    """
+    names = list(species)
+    input_files = [species[name]["input_file"] for name in names]
+    flux_models = [species[name]["flux_model"] for name in names]
+    area = np.array([species[name].get("area", np.pi*(833)**2) for name in names], dtype=float)
+    solid_angle = np.array([species[name].get("solid_angle", cone_solid_angle(10)) for name in names], dtype=float)
+
+    logE, stacks, _ = stack_histo_outputs(input_files, n_workers)
+
+    if deltaE is not None:
+        logE_low, logE_high = logE-deltaE/2, logE+deltaE/2
+    else:
+        logE_low, logE_high = stacks["LogE_low"], stacks["LogE_high"]
+    Energy = 10**logE
+    E_bin_widths = 10**logE_high - 10**logE_low
+
+    # (n_species, n_bins), each model evaluated once on the whole grid
+    flux = np.stack([evaluate_flux(model, Energy) for model in flux_models])
+
+    trigger_rate_per_Ebin = (area*solid_angle)[:, None]*stacks["N_frac"]*flux*E_bin_widths
+    trigger_rate = trigger_rate_per_Ebin.sum(axis=1)
+
+    rates = pd.DataFrame({
+        "species": names,
+        "input_file": input_files,
+        "flux_model": flux_models,
+        "area": area,
+        "solid_angle": solid_angle,
+        "trigger_rate": trigger_rate,
+    })
+
+    return rates, trigger_rate.sum()
 
 # def calculate_proton_trigger_rate(input_file,
 #                            area=np.pi*(833)**2,
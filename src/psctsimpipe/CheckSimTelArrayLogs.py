@@ -1,16 +1,28 @@
 import os
 import re
+import sys
+import csv
+import json
 import glob
 import subprocess
 import textwrap
+import time
 
-from psctsimpipe.Helpers import extract_number_from_log
+from psctsimpipe.Helpers import (
+    extract_number_from_log,
+    is_log_file,
+    open_log_file,
+    strip_compression_suffix
+)
+from psctsimpipe.ClassifyFailedRuns import classify_log_records, count_failure_categories, print_failure_categories
+from psctsimpipe.LogCompaction import load_log_cache, read_log_last_line
 from psctsimpipe.SLURMScriptGen import submit_job
 
 def return_log_file_status(directory):
     """
     Checks all .out log files in the given directory 
     to ensure they end with "Sim_telarray finished".
+    Compressed logs (.out.gz, .out.zst) are read too.
 
     Parameters
     ----------
@@ -24,24 +36,128 @@ def return_log_file_status(directory):
         and values are True (valid) or False (invalid).
     """   
     results = {}
-    
-    for filename in os.listdir(directory):
-        if filename.endswith(".out"):  # Only process .out files
-            file_path = os.path.join(directory, filename)
-            
+
+    for record in iter_log_file_status(directory, SIMTEL_LOG_ENDING):
+        if record["status"] == "unreadable":
+            results[record["file"]] = f"Error reading file: {record['error']}"
+        else:
+            results[record["file"]] = record["status"] == "finished"
+
+    return results
+
+SIMTEL_LOG_ENDING = "Sim_telarray finished"
+CORSIKA_LOG_ENDING = " ========== END OF RUN ================================================"
+LOG_STATUS_FIELDS = ["file", "status", "error"]
+LOG_OUTPUT_FORMATS = ["text", "json", "csv", "summary"]
+
+def iter_log_file_status(directory, log_ending=SIMTEL_LOG_ENDING):
+    """
+    Yields the status of every .out log file in the
+    given directory, one at a time, so memory stays flat
+    however many logs there are. Compacted logs are
+    not decompressed, their last line is taken from
+    the log status cache (see LogCompaction).
+
+    Parameters
+    ----------
+    directory : string
+        directory where log files live
+    log_ending : str, optional
+        phrase expected in the last line of a finished
+        run, by default "Sim_telarray finished"
+
+    Yields
+    ------
+    dict
+        file (path), status ("finished", "failed" or 
+        "unreadable") and error (reason it was unreadable)
+    """
+    cache = load_log_cache(directory)
+    with os.scandir(directory) as entries:
+        for entry in entries:
+            if not is_log_file(entry.name):
+                continue
             try:
-                with open(file_path, "r") as f:
-                    lines = f.readlines()
-                    if lines and "Sim_telarray finished" in lines[-1]:  # Check last line
-                        results[file_path] = True
-                    else:
-                        results[file_path] = False
+                if log_ending in read_log_last_line(entry.path, cache, entry.stat()):  # Check last line
+                    yield {"file": entry.path, "status": "finished", "error": ""}
+                else:
+                    yield {"file": entry.path, "status": "failed", "error": ""}
             except Exception as e:
-                results[file_path] = f"Error reading file: {e}"
+                yield {"file": entry.path, "status": "unreadable", "error": str(e)}
 
-    return results
+def report_log_file_status(records, output_format="text", stream=None, fields=LOG_STATUS_FIELDS):
+    """
+    Writes log status records as they come.
+
+    Parameters
+    ----------
+    records : iterable
+        dictionaries from iter_log_file_status, optionally
+        with a failure category (see ClassifyFailedRuns.classify_log_records)
+    output_format : str, optional
+        "text" prints one human readable line per file and totals,
+        "json" one JSON object per line (JSON Lines),
+        "csv" a header and one row per file,
+        "summary" only the aggregate counts as one JSON object.
+        By default "text". Failure categories are part of each
+        record, counted per category in summary and text outputs.
+    stream : file object, optional
+        where to write, by default sys.stdout
+    fields : list, optional
+        csv columns, by default LOG_STATUS_FIELDS
+
+    Returns
+    -------
+    dict
+        aggregate counts per status
+    """
+    if output_format not in LOG_OUTPUT_FORMATS:
+        raise ValueError(f"Unknown output format {output_format}. Use one of {LOG_OUTPUT_FORMATS}.")
+    if stream is None:
+        stream = sys.stdout
+
+    counts = {"finished": 0, "failed": 0, "unreadable": 0}
+    classification = {}
+
+    if output_format == "csv":
+        writer = csv.DictWriter(stream, fieldnames=fields)
+        writer.writeheader()
+
+    for record in records:
+        counts[record["status"]] += 1
+        if record.get("category"):
+            classification[record["file"]] = record["category"]
+
+        if output_format == "text":
+            filename = os.path.basename(record["file"])
+            if record["status"] == "finished":
+                print(f"[✓] {filename} - Finished successfully", file=stream)
+            elif record["status"] == "failed":
+                print(f"[X] {filename} - Did NOT finish successfully", file=stream)
+            else:
+                print(f"[!] {filename} - Unable to read file: {record['error']}", file=stream)
+        elif output_format == "json":
+            stream.write(json.dumps(record) + "\n")
+        elif output_format == "csv":
+            writer.writerow(record)
 
-def check_simtelarray_log_files(directory):
+    if output_format == "text":
+        success = counts["finished"]
+        failed = counts["failed"] + counts["unreadable"]
+        print(f"Total runs submitted: {success+failed}", file=stream)
+        print(f"{success} successful runs.", file=stream)
+        print(f"{failed} failed runs.", file=stream)
+        if classification:
+            print_failure_categories(classification, stream)
+    elif output_format == "summary":
+        summary = dict(counts, total=sum(counts.values()))
+        if classification:
+            summary["failure_categories"] = dict(count_failure_categories(classification))
+        stream.write(json.dumps(summary) + "\n")
+
+    return counts
+
+def check_simtelarray_log_files(directory, output_format="text", stream=None, classify=False):
     """
     Checks all .out log files in the given directory 
     to ensure they end with "Sim_telarray finished".
@@ -50,73 +166,56 @@ def check_simtelarray_log_files(directory):
     ----------
     directory : string
         directory where log files live
+    output_format : str, optional
+        text, json, csv or summary, by default "text".
+        See report_log_file_status.
+    stream : file object, optional
+        where to write, by default sys.stdout
+    classify : bool, optional
+        add the failure category of every failed run
+        to the output (see ClassifyFailedRuns), by default False
 
     Returns
     -------
-    None
+    dict
+        Number of finished, failed and unreadable logs.
         Prints to terminal which files finished successfully
         and which ones didn't.
     """    
-    success=0
-    failed=0
-    for filename in os.listdir(directory):
-        if filename.endswith(".out"):  
-            file_path = os.path.join(directory, filename)
-
-            try:
-                with open(file_path, "r") as f:
-                    lines = f.readlines()
-                    if lines and "Sim_telarray finished" in lines[-1]:  # Check last line
-                        print(f"[✓] {filename} - Finished successfully")
-                        success+=1
-                    else:
-                        print(f"[X] {filename} - Did NOT finish successfully")
-                        failed+=1
-            except Exception as e:
-                print(f"[!] {filename} - Unable to read file: {e}")
-                failed+=1
-    print(f"Total runs submitted: {success+failed}")
-    print(f"{success} successful runs.")
-    print(f"{failed} failed runs.")
+    records = iter_log_file_status(directory, SIMTEL_LOG_ENDING)
+    if classify:
+        return report_log_file_status(
+            classify_log_records(records), output_format, stream, LOG_STATUS_FIELDS + ["category"]
+        )
+    return report_log_file_status(records, output_format, stream)
 
-def check_corsika_log_files(directory):
+def check_corsika_log_files(directory, output_format="text", stream=None):
     """
     Checks all .out log files in the given directory 
-    to ensure they end with "Sim_telarray finished".
+    to ensure they end with the CORSIKA END OF RUN banner.
 
     Parameters
     ----------
     directory : string
         directory where log files live
+    output_format : str, optional
+        text, json, csv or summary, by default "text".
+        See report_log_file_status.
+    stream : file object, optional
+        where to write, by default sys.stdout
 
     Returns
     -------
-    None
+    dict
+        Number of finished, failed and unreadable logs.
         Prints to terminal which files finished successfully
         and which ones didn't.
     """
-    log_ending = " ========== END OF RUN ================================================"    
-    success=0
-    failed=0
-    for filename in os.listdir(directory):
-        if filename.endswith(".out"):  
-            file_path = os.path.join(directory, filename)
-
-            try:
-                with open(file_path, "r") as f:
-                    lines = f.readlines()
-                    if lines and log_ending in lines[-1]:  # Check last line
-                        print(f"[✓] {filename} - Finished successfully")
-                        success+=1
-                    else:
-                        print(f"[X] {filename} - Did NOT finish successfully")
-                        failed+=1
-            except Exception as e:
-                print(f"[!] {filename} - Unable to read file: {e}")
-                failed+=1
-    print(f"Total runs submitted: {success+failed}")
-    print(f"{success} successful runs.")
-    print(f"{failed} failed runs.")
+    return report_log_file_status(
+        iter_log_file_status(directory, CORSIKA_LOG_ENDING),
+        output_format,
+        stream
+    )
 
 def extract_naming_convention_from_output_files(filename):
     """
@@ -200,7 +299,7 @@ def extract_simtel_run_params(directory):
                         submit_job(slurm_script_to_resub)
                         
                         # Finding standard error output associated with run to be deleted
-                        std_err_out_assoc_w_empty_log = os.path.splitext(file_path)[0] + ".error"
+                        std_err_out_assoc_w_empty_log = os.path.splitext(strip_compression_suffix(file_path))[0] + ".error"
                         if os.path.exists(std_err_out_assoc_w_empty_log):
                             print(textwrap.dedent(
                                 f"""
@@ -225,7 +324,7 @@ def extract_simtel_run_params(directory):
                     continue
                 
                 print(f"Extracting information from {file_path}")
-                with open(file_path, "r") as f:
+                with open_log_file(file_path, "r") as f:
                     for line in f:
                             match = re.search(pattern, line)
                             if match:
@@ -234,7 +333,7 @@ def extract_simtel_run_params(directory):
                                 event_output = match.group(3)  # Event output file
                                 corsika_input = match.group(4)  
                                 output_dir = os.path.dirname(file_path)  # Use log file directory
-                                std_err_file = os.path.splitext(file_path)[0] + ".error"
+                                std_err_file = os.path.splitext(strip_compression_suffix(file_path))[0] + ".error"
                                 
                                 # This part of the code extracts relevant parameters for naming
                                 run_name_info = extract_naming_convention_from_output_files(event_output)
@@ -278,4 +377,269 @@ def extract_simtel_run_params(directory):
             except Exception as e:
                 print(f"Error reading {file_path}: {e}")
 
-    return failed_jobs_info
\ No newline at end of file
+    return failed_jobs_info
+
+# Live watch mode
+
+SIMTEL_FINISHED_PHRASE = b"Sim_telarray finished"
+SIMTEL_EVENT_PATTERN = re.compile(rb"^\s*Event\s+\d+", re.MULTILINE)
+SIMTEL_FAILURE_PHRASES = (
+    b"Segmentation fault",
+    b"Fatal error",
+    b"Killed",
+    b"CANCELLED",
+    b"Abort",
+)
+
+def _new_log_watch_entry(now):
+    """
+    Empty per-file state used by the watch mode.
+    """
+    return {
+        "offset": 0,
+        "error_offset": 0,
+        "carry": b"",
+        "events": 0,
+        "finished": False,
+        "failed": False,
+        "last_growth": now,
+        "size": None,
+        "mtime_ns": None,
+    }
+
+def _read_new_bytes(file_path, offset):
+    """
+    Reads whatever was appended to a file since offset.
+
+    Parameters
+    ----------
+    file_path : string
+        file to tail
+    offset : int
+        number of bytes already consumed
+
+    Returns
+    -------
+    tuple
+        (new bytes, new offset). If the file shrank 
+        (e.g. it was rewritten by a resubmitted job)
+        it is read again from the beginning.
+    """    
+    try:
+        size = os.path.getsize(file_path)
+    except OSError:
+        return b"", offset
+    
+    if size < offset:
+        offset = 0
+    if size == offset:
+        return b"", offset
+
+    with open(file_path, "rb") as f:
+        f.seek(offset)
+        data = f.read(size - offset)
+
+    return data, offset + len(data)
+
+def update_log_watch_state(directory, state, now=None):
+    """
+    Tails every .out log in directory and updates 
+    the in-memory status table. Only bytes appended
+    since the previous call are read. Finished or failed
+    logs are not read again unless their size or
+    modification time changed (a resubmitted run).
+
+    Parameters
+    ----------
+    directory : string
+        directory where log files live
+    state : dict
+        status table returned by a previous call,
+        an empty dictionary on the first call
+    now : float, optional
+        current time, by default time.time()
+
+    Returns
+    -------
+    int
+        Number of new events seen in this update.
+    """
+    if now is None:
+        now = time.time()
+
+    new_events = 0
+    cache = None
+    with os.scandir(directory) as entries:
+        for entry in entries:
+            if not is_log_file(entry.name):
+                continue
+
+            log_path = strip_compression_suffix(entry.path)
+            if log_path != entry.path and os.path.exists(log_path):
+                # The plain log of a rerun is the one to follow
+                continue
+
+            # A finished or failed log only changes when its run is 
+            # resubmitted and rewrites it, it is then tracked again
+            log = state.get(log_path)
+            if log is not None and (log["finished"] or log["failed"]):
+                stat = entry.stat()
+                if (stat.st_size, stat.st_mtime_ns) == (log["size"], log["mtime_ns"]):
+                    continue
+                log = state[log_path] = _new_log_watch_entry(now)
+
+            # Compressed logs belong to finished runs and are read
+            # once, from the log status cache when possible
+            if log_path != entry.path:
+                if cache is None:
+                    cache = load_log_cache(directory)
+                stat = entry.stat()
+                log = state[log_path] = _new_log_watch_entry(now)
+                log["finished"] = SIMTEL_LOG_ENDING in read_log_last_line(entry.path, cache, stat)
+                log["failed"] = not log["finished"]
+                log["size"], log["mtime_ns"] = stat.st_size, stat.st_mtime_ns
+                continue
+
+            if log is None:
+                log = state[entry.path] = _new_log_watch_entry(now)
+
+            data, offset = _read_new_bytes(entry.path, log["offset"])
+            if offset < log["offset"]:
+                log.update(_new_log_watch_entry(now))
+            log["offset"] = offset
+
+            if data:
+                log["last_growth"] = now
+                # Only complete lines are parsed, the rest waits for the next update
+                buffer = log["carry"] + data
+                cut = buffer.rfind(b"\n") + 1
+                lines, log["carry"] = buffer[:cut], buffer[cut:]
+
+                events = len(SIMTEL_EVENT_PATTERN.findall(lines))
+                log["events"] += events
+                new_events += events
+
+                if SIMTEL_FINISHED_PHRASE in buffer:
+                    log["finished"] = True
+                elif any(phrase in lines for phrase in SIMTEL_FAILURE_PHRASES):
+                    log["failed"] = True
+
+            error_file = os.path.splitext(entry.path)[0] + ".error"
+            error_data, log["error_offset"] = _read_new_bytes(error_file, log["error_offset"])
+            if any(phrase in error_data for phrase in SIMTEL_FAILURE_PHRASES):
+                log["failed"] = True
+
+            if log["finished"] or log["failed"]:
+                stat = os.stat(entry.path)
+                log["size"], log["mtime_ns"] = stat.st_size, stat.st_mtime_ns
+
+    return new_events
+
+def log_watch_status(log, stall_time=1800., now=None):
+    """
+    Status of a single entry of the watch table.
+
+    Returns
+    -------
+    string
+        One of "finished", "failed", "stalled" or "running".
+    """
+    if now is None:
+        now = time.time()
+
+    if log["finished"]:
+        return "finished"
+    if log["failed"]:
+        return "failed"
+    if now - log["last_growth"] > stall_time:
+        return "stalled"
+    return "running"
+
+def summarize_log_watch_state(state, stall_time=1800., now=None):
+    """
+    Counts how many logs are running, finished, failed 
+    or stalled.
+
+    Parameters
+    ----------
+    state : dict
+        status table filled by update_log_watch_state
+    stall_time : float, optional
+        seconds without growth after which an unfinished
+        log is considered stalled, by default 1800.
+    now : float, optional
+        current time, by default time.time()
+
+    Returns
+    -------
+    dict
+        counts per status
+    """
+    if now is None:
+        now = time.time()
+
+    counts = {"running": 0, "finished": 0, "failed": 0, "stalled": 0}
+    for log in state.values():
+        counts[log_watch_status(log, stall_time, now)] += 1
+
+    return counts
+
+def watch_simtelarray_log_files(directory, interval=60., stall_time=1800.):
+    """
+    Keeps watching a production directory and prints a 
+    compact summary every interval seconds. Every log 
+    keeps its own read offset so each refresh only reads
+    the bytes appended since the previous one.
+
+    Stops when every log either finished or failed, 
+    or on Ctrl+C.
+
+    Parameters
+    ----------
+    directory : string
+        directory where log files live
+    interval : float, optional
+        seconds between refreshes, by default 60.
+    stall_time : float, optional
+        seconds without growth after which an unfinished
+        log is considered stalled, by default 1800.
+
+    Returns
+    -------
+    dict
+        Final status table. Keys are log file paths.
+    """
+    state = {}
+    last_update = None
+
+    try:
+        while True:
+            now = time.time()
+            new_events = update_log_watch_state(directory, state, now)
+            counts = summarize_log_watch_state(state, stall_time, now)
+            
+            # The first pass reads the existing backlog, not a rate
+            if last_update is None:
+                events_per_second = 0.
+            else:
+                events_per_second = new_events/(now - last_update)
+            last_update = now
+
+            print(
+                f"[{time.strftime('%H:%M:%S')}] "
+                f"running {counts['running']} | "
+                f"finished {counts['finished']} | "
+                f"failed {counts['failed']} | "
+                f"stalled {counts['stalled']} | "
+                f"{events_per_second:.1f} events/s",
+                flush=True
+            )
+
+            if state and counts["finished"] + counts["failed"] == len(state):
+                break
+
+            time.sleep(interval)
+    except KeyboardInterrupt:
+        pass
+
+    return state
@@ -0,0 +1,157 @@
+import os
+import re
+from collections import Counter
+
+from psctsimpipe.Helpers import read_file_tail, strip_compression_suffix
+
+# Rules are tried in order, the first one matching the
+# .out/.error tails decides the category of the failure.
+# (category, retryable, pattern)
+FAILURE_RULES = [
+    ("walltime_exceeded", True, re.compile(
+        rb"DUE TO TIME LIMIT|time limit exceeded", re.IGNORECASE)),
+    ("oom_killed", True, re.compile(
+        rb"out[- ]of[- ]memory|oom[-_ ]kill|exceeded memory limit|"
+        rb"Killed process|std::bad_alloc|Memory allocation failed|Not enough memory", re.IGNORECASE)),
+    ("node_failure", True, re.compile(
+        rb"DUE TO NODE FAILURE|DUE TO PREEMPTION")),
+    ("filesystem_error", True, re.compile(
+        rb"No space left on device|Disk quota exceeded|Input/output error|"
+        rb"Stale file handle|Read-only file system")),
+    ("corrupt_corsika_input", False, re.compile(
+        rb"unexpected end of file|Unexpected end of data|invalid compressed data|"
+        rb"crc error|Sync tag|not an eventio|Invalid item|Data block is corrupted", re.IGNORECASE)),
+    ("segfault", False, re.compile(
+        rb"Segmentation fault|SIGSEGV|core dumped|Bus error")),
+    ("missing_input", False, re.compile(
+        rb"No such file or directory|Cannot open|Can't open|File not found", re.IGNORECASE)),
+    ("config_error", False, re.compile(
+        rb"Configuration error|Unknown (?:configuration )?parameter|Syntax error|"
+        rb"Invalid configuration|Unknown option|Invalid value", re.IGNORECASE)),
+]
+
+UNKNOWN_FAILURE = "unknown"
+
+# Failures that may succeed when the same job runs again 
+# (possibly with more memory or walltime). Unknown failures
+# are kept retryable, as resubmitting everything was the
+# previous behaviour.
+RETRYABLE_FAILURES = {
+    category for category, retryable, _ in FAILURE_RULES if retryable
+} | {UNKNOWN_FAILURE}
+
+def classify_failure(log_file, error_file=None, tail_bytes=65536):
+    """
+    Sorts a failed run into a failure category
+    by matching FAILURE_RULES against the tail of its
+    standard output and standard error.
+
+    Parameters
+    ----------
+    log_file : string
+        .out log of the failed run
+    error_file : string, optional
+        .error file of the failed run, by default 
+        the .error file next to log_file
+    tail_bytes : int, optional
+        how many bytes at the end of each file are
+        inspected, by default 65536
+
+    Returns
+    -------
+    string
+        category of the failure, "unknown" if no rule matched
+    """
+    if error_file is None:
+        error_file = os.path.splitext(strip_compression_suffix(log_file))[0] + ".error"
+
+    text = read_file_tail(error_file, tail_bytes) + b"\n" + read_file_tail(log_file, tail_bytes)
+
+    for category, _, pattern in FAILURE_RULES:
+        if pattern.search(text):
+            return category
+
+    return UNKNOWN_FAILURE
+
+def is_retryable_failure(category, retry_categories=None):
+    """
+    Whether a failure category is worth resubmitting.
+
+    Parameters
+    ----------
+    category : string
+        output of classify_failure
+    retry_categories : iterable, optional
+        categories to resubmit, by default RETRYABLE_FAILURES
+    """
+    if retry_categories is None:
+        retry_categories = RETRYABLE_FAILURES
+    return category in retry_categories
+
+def classify_failed_runs(log_status):
+    """
+    Classifies every failed run of a log status dictionary.
+
+    Parameters
+    ----------
+    log_status : dict
+        output of CheckSimTelArrayLogs.return_log_file_status,
+        log file paths as keys and True/False as values
+
+    Returns
+    -------
+    dict
+        log file paths of failed runs as keys 
+        and failure categories as values
+    """
+    return {
+        file_path: classify_failure(file_path)
+        for file_path, status in log_status.items()
+        if status is not True
+    }
+
+def classify_log_records(records):
+    """
+    Adds the failure category of every run that did not
+    finish to log status records, as they come.
+
+    Parameters
+    ----------
+    records : iterable
+        dictionaries from CheckSimTelArrayLogs.iter_log_file_status
+
+    Yields
+    ------
+    dict
+        record with a category field, empty for finished runs
+    """
+    for record in records:
+        category = "" if record["status"] == "finished" else classify_failure(record["file"])
+        yield dict(record, category=category)
+
+def count_failure_categories(classification):
+    """
+    Number of failed runs per category.
+
+    Parameters
+    ----------
+    classification : dict
+        output of classify_failed_runs
+
+    Returns
+    -------
+    collections.Counter
+    """
+    return Counter(classification.values())
+
+def print_failure_categories(classification, stream=None):
+    """
+    Prints the number of failed runs per category
+    and whether each category is retryable, to stream
+    (by default sys.stdout).
+    """
+    counts = count_failure_categories(classification)
+    print(f"{sum(counts.values())} failed runs.", file=stream)
+    for category, count in counts.most_common():
+        retry = "retryable" if is_retryable_failure(category) else "not retryable"
+        print(f"  {category}: {count} ({retry})", file=stream)
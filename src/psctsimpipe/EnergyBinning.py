@@ -0,0 +1,188 @@
+import numpy as np
+import pandas as pd
+
+# Width in log10(E) of the sim_telarray proton histograms,
+# used when a single bin gives no spacing to infer it from
+DEFAULT_LOG_BIN_WIDTH = 0.05
+
+def bin_edges_from_centers(logE, rtol=1e-3, default_width=None):
+    """
+    Lower and upper edges of energy bins known only
+    by their centers. Uniform bins with gaps (empty bins
+    dropped from an export) keep their width: if all the
+    spacings are multiples of the smallest one, it is used
+    as bin width. Otherwise edges are put half-way between
+    neighbouring centers.
+
+    Parameters
+    ----------
+    logE : array like
+        increasing log10 bin centers
+    rtol : float, optional
+        relative tolerance of the uniform binning test,
+        by default 1e-3
+    default_width : float, optional
+        width used when there is a single bin,
+        by default None (raise)
+
+    Returns
+    -------
+    tuple
+        (low, high) arrays of log10 edges
+
+    Raises
+    ------
+    ValueError
+        If there are less than two bins and no default_width
+    """
+    logE = np.asarray(logE, dtype=float)
+    if len(logE) < 2:
+        if default_width is not None:
+            return logE - default_width/2, logE + default_width/2
+        raise ValueError("At least two bins are needed to infer bin edges, pass them explicitly.")
+
+    spacing = np.diff(logE)
+    width = spacing.min()
+    multiples = spacing/width
+    if np.allclose(multiples, np.round(multiples), rtol=0, atol=rtol*np.max(multiples)):
+        return logE - width/2, logE + width/2
+
+    middle = (logE[:-1] + logE[1:])/2
+    low = np.concatenate([[logE[0] - spacing[0]/2], middle])
+    high = np.concatenate([middle, [logE[-1] + spacing[-1]/2]])
+    return low, high
+
+def uniform_bin_edges(start, stop, width):
+    """
+    Contiguous edges from start to stop (included)
+    in steps of width, e.g. uniform_bin_edges(-1, 2, 0.1).
+    """
+    n_bins = int(round((stop - start)/width))
+    return np.linspace(start, start + n_bins*width, n_bins + 1)
+
+def rebinning_matrix(low, high, new_edges):
+    """
+    Overlap matrix between bins [low, high) and contiguous
+    new bins: fraction of each old bin falling in each new
+    bin, assuming counts are spread uniformly in log10(E)
+    within a bin.
+
+    Parameters
+    ----------
+    low, high : array like
+        (n_old,) log10 edges of the old bins
+    new_edges : array like
+        (n_new + 1,) increasing log10 edges of the new bins
+
+    Returns
+    -------
+    numpy.ndarray
+        (n_old, n_new) fractions. Rows of old bins fully
+        inside the new binning sum to one.
+    """
+    low = np.asarray(low, dtype=float)[:, None]
+    high = np.asarray(high, dtype=float)[:, None]
+    new_edges = np.asarray(new_edges, dtype=float)
+
+    overlap = np.clip(
+        np.minimum(high, new_edges[None, 1:]) - np.maximum(low, new_edges[None, :-1]),
+        0., None
+    )
+    return overlap/(high - low)
+
+def rebin_counts(low, high, counts, new_edges):
+    """
+    Merges or splits counts onto new bins in one matrix
+    product. Any leading axes of counts (e.g. one row per
+    file or bootstrap replica) are kept.
+
+    Parameters
+    ----------
+    low, high : array like
+        (n_old,) log10 edges of the old bins
+    counts : array like
+        (..., n_old) counts
+    new_edges : array like
+        (n_new + 1,) log10 edges of the new bins
+
+    Returns
+    -------
+    numpy.ndarray
+        (..., n_new) counts
+    """
+    return np.asarray(counts, dtype=float) @ rebinning_matrix(low, high, new_edges)
+
+def table_bin_edges(data, default_width=DEFAULT_LOG_BIN_WIDTH):
+    """
+    log10 bin edges of a trigger fraction table (see
+    read_histo_output): its LogE_low/LogE_high columns
+    (native .hdata reads) or, for text exports, edges
+    inferred from the bin centers, default_width
+    for a single bin.
+
+    Returns
+    -------
+    tuple
+        (low, high) arrays of log10 edges
+    """
+    if "LogE_low" in data and "LogE_high" in data:
+        return data["LogE_low"].to_numpy(dtype=float), data["LogE_high"].to_numpy(dtype=float)
+    return bin_edges_from_centers(data["LogE"].to_numpy(dtype=float), default_width=default_width)
+
+def rebin_trigger_table(data, new_edges):
+    """
+    Rebins a trigger fraction table (see read_histo_output)
+    by rebinning N_trigg and N_total and recomputing N_frac.
+
+    Parameters
+    ----------
+    data : pandas.DataFrame
+        LogE, N_trigg, N_total and optionally
+        LogE_low, LogE_high (inferred otherwise)
+    new_edges : array like
+        log10 edges of the new bins
+
+    Returns
+    -------
+    pandas.DataFrame
+        LogE, N_frac, N_trigg, N_total, LogE_low and LogE_high.
+        New bins without simulated events are dropped.
+    """
+    return combine_trigger_tables([data], new_edges)
+
+def combine_trigger_tables(tables, new_edges):
+    """
+    Adds trigger fraction tables of productions with
+    different binnings onto a common binning.
+
+    Parameters
+    ----------
+    tables : list
+        pandas.DataFrame from read_histo_output
+    new_edges : array like
+        log10 edges of the common bins
+
+    Returns
+    -------
+    pandas.DataFrame
+        see rebin_trigger_table
+    """
+    new_edges = np.asarray(new_edges, dtype=float)
+    N_trigg = np.zeros(len(new_edges) - 1)
+    N_total = np.zeros(len(new_edges) - 1)
+
+    for data in tables:
+        low, high = table_bin_edges(data)
+        matrix = rebinning_matrix(low, high, new_edges)
+        N_trigg += data["N_trigg"].to_numpy(dtype=float) @ matrix
+        N_total += data["N_total"].to_numpy(dtype=float) @ matrix
+
+    filled = N_total > 0
+    return pd.DataFrame({
+        "LogE": ((new_edges[:-1] + new_edges[1:])/2)[filled],
+        "N_frac": N_trigg[filled]/N_total[filled],
+        "N_trigg": N_trigg[filled],
+        "N_total": N_total[filled],
+        "LogE_low": new_edges[:-1][filled],
+        "LogE_high": new_edges[1:][filled],
+    })
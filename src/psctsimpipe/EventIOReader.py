@@ -0,0 +1,488 @@
+import gzip
+import struct
+
+import numpy as np
+import pandas as pd
+
+from psctsimpipe.Helpers import open_log_file
+
+# eventio files are a sequence of top-level objects, each starting
+# with a sync marker followed by a header:
+#   type/version word, identifier, length word (+ optional extension).
+# Objects may contain sub-objects, which have a header but no sync marker.
+SYNC_MARKER_LITTLE = b"\x37\x8a\x1f\xd4"
+SYNC_MARKER_BIG = b"\xd4\x1f\x8a\x37"
+
+IO_TYPE_HISTOGRAM = 100
+
+# sim_telarray event blocks
+IO_TYPE_CENTRAL_EVENT = 2009
+IO_TYPE_EVENT = 2010
+IO_TYPE_MC_EVENT = 2021
+
+# Bits of the telescope trigger type mask
+TRIGGER_TYPES = ("majority", "analog_sum", "digital_sum", "pattern")
+
+# Histogram types using real (float) bin limits, the others use integers.
+# F and D histograms also carry weighted contents.
+REAL_HISTOGRAM_TYPES = "RrFD"
+WEIGHTED_HISTOGRAM_TYPES = "FD"
+
+
+def open_eventio_file(filename):
+    """
+    Opens a plain, gzip or zstandard compressed eventio file
+    (e.g. .hdata.gz, .simtel.gz, .simtel.zst) as a byte stream.
+    """
+    if filename.endswith((".gz", ".zst")):
+        return open_log_file(filename, "rb")
+    with open(filename, "rb") as f:
+        magic = f.read(2)
+    if magic == b"\x1f\x8b":
+        return gzip.open(filename, "rb")
+    return open(filename, "rb")
+
+def _read_exact(stream, n_bytes):
+    data = stream.read(n_bytes)
+    if len(data) != n_bytes:
+        raise EOFError("Unexpected end of eventio stream.")
+    return data
+
+def parse_object_header(header_bytes, byteorder="<"):
+    """
+    Decodes the three header words of an eventio object.
+
+    Parameters
+    ----------
+    header_bytes : bytes
+        the 12 header bytes following the sync marker
+    byteorder : str, optional
+        "<" little or ">" big endian, by default "<"
+
+    Returns
+    -------
+    dict
+        type, version, user_bit, extended, id,
+        only_subobjects and length (of the payload in bytes,
+        without the extension word)
+    """
+    word0, ident, word2 = struct.unpack(byteorder + "IiI", header_bytes)
+    return {
+        "type": word0 & 0xffff,
+        "user_bit": bool(word0 & (1 << 16)),
+        "extended": bool(word0 & (1 << 17)),
+        "version": (word0 >> 20) & 0xfff,
+        "id": ident,
+        "only_subobjects": bool(word2 & (1 << 30)),
+        "length": word2 & 0x3fffffff,
+    }
+
+def _read_header(stream, byteorder):
+    header = parse_object_header(_read_exact(stream, 12), byteorder)
+    if header["extended"]:
+        extension, = struct.unpack(byteorder + "I", _read_exact(stream, 4))
+        header["length"] += (extension & 0xfff) << 30
+    return header
+
+def iter_eventio_objects(stream, types=None):
+    """
+    Iterates over the top-level objects of an eventio stream.
+    Payloads of objects not in types are skipped without
+    being kept in memory.
+
+    Parameters
+    ----------
+    stream : file object
+        binary stream, see open_eventio_file
+    types : iterable, optional
+        object types whose payload is returned,
+        by default all of them
+
+    Yields
+    ------
+    tuple
+        (header dict, payload bytes or None if skipped)
+    """
+    if types is not None:
+        types = set(types)
+
+    while True:
+        marker = stream.read(4)
+        if not marker:
+            return
+        if marker == SYNC_MARKER_LITTLE:
+            byteorder = "<"
+        elif marker == SYNC_MARKER_BIG:
+            byteorder = ">"
+        else:
+            raise ValueError("Sync tag not found, not an eventio stream or corrupted file.")
+
+        header = _read_header(stream, byteorder)
+        header["byteorder"] = byteorder
+
+        if types is None or header["type"] in types:
+            yield header, _read_exact(stream, header["length"])
+        else:
+            stream.seek(header["length"], 1)
+            yield header, None
+
+def iter_subobjects(payload, byteorder="<"):
+    """
+    Iterates over the sub-objects contained in the
+    payload of an object with only_subobjects set.
+
+    Yields
+    ------
+    tuple
+        (header dict, payload memoryview)
+    """
+    view = memoryview(payload)
+    position = 0
+    while position + 12 <= len(view):
+        header = parse_object_header(bytes(view[position:position+12]), byteorder)
+        position += 12
+        if header["extended"]:
+            extension, = struct.unpack(byteorder + "I", bytes(view[position:position+4]))
+            header["length"] += (extension & 0xfff) << 30
+            position += 4
+        header["byteorder"] = byteorder
+        yield header, view[position:position+header["length"]]
+        position += header["length"]
+
+
+class _PayloadReader:
+    """
+    Sequential reader of the basic eventio data types
+    (put_short, put_long, put_real, put_string, put_count, ...).
+    """
+    def __init__(self, payload, byteorder="<"):
+        self.data = memoryview(payload)
+        self.position = 0
+        self.byteorder = byteorder
+
+    def _unpack(self, fmt, size):
+        value, = struct.unpack_from(self.byteorder + fmt, self.data, self.position)
+        self.position += size
+        return value
+
+    def byte(self):
+        return self._unpack("B", 1)
+
+    def short(self):
+        return self._unpack("h", 2)
+
+    def long(self):
+        return self._unpack("i", 4)
+
+    def real(self):
+        return self._unpack("f", 4)
+
+    def double(self):
+        return self._unpack("d", 8)
+
+    def string(self):
+        length = self.short()
+        value = bytes(self.data[self.position:self.position+length])
+        self.position += length
+        return value.decode("utf-8", errors="replace")
+
+    def array(self, dtype, n):
+        dtype = np.dtype(dtype).newbyteorder(self.byteorder)
+        values = np.frombuffer(self.data, dtype=dtype, count=n, offset=self.position)
+        self.position += n*dtype.itemsize
+        return values.astype(dtype.newbyteorder("="))
+
+    def count(self):
+        """
+        Unsigned variable length integer (get_count):
+        the number of leading one bits of the first byte
+        gives the number of extra bytes.
+        """
+        first = self.byte()
+        n_extra = 0
+        while n_extra < 8 and first & (0x80 >> n_extra):
+            n_extra += 1
+        value = first & (0xff >> (n_extra + 1))
+        for _ in range(n_extra):
+            value = (value << 8) | self.byte()
+        return value
+
+    def scount(self):
+        """
+        Signed variable length integer (get_scount),
+        the sign is stored in the lowest bit.
+        """
+        value = self.count()
+        if value & 1:
+            return -(value >> 1) - 1
+        return value >> 1
+
+    def at_end(self):
+        return self.position >= len(self.data)
+
+
+def _read_limits(reader, real):
+    if real:
+        return reader.real(), reader.real(), reader.real(), reader.real()
+    return reader.long(), reader.long(), reader.long(), reader.long()
+
+def parse_histograms(payload, version=1, byteorder="<"):
+    """
+    Parses the payload of a histogram block (type 100),
+    as written by hessio write_histograms.
+
+    Parameters
+    ----------
+    payload : bytes
+        object payload
+    version : int, optional
+        object version, by default 1
+    byteorder : str, optional
+        "<" little or ">" big endian, by default "<"
+
+    Returns
+    -------
+    list of dict
+        one dictionary per histogram with its type, title,
+        id, number of bins, entries, under/overflows, limits,
+        bin edges and counts. 2D histograms have counts of
+        shape (n_bins_y, n_bins_x).
+
+    Raises
+    ------
+    ValueError
+        If the block layout is not understood.
+    """
+    if version > 2:
+        raise ValueError(f"Histogram block version {version} is not supported.")
+
+    reader = _PayloadReader(payload, byteorder)
+    histograms = []
+
+    for _ in range(reader.short()):
+        histo = {}
+        histo["type"] = chr(reader.byte())
+        histo["title"] = reader.string()
+        histo["id"] = reader.long()
+        histo["n_bins_x"] = reader.short()
+        histo["n_bins_y"] = reader.short()
+        histo["entries"] = reader.long()
+        histo["tentries"] = reader.long()
+        histo["underflow_x"] = reader.long()
+        histo["overflow_x"] = reader.long()
+
+        real = histo["type"] in REAL_HISTOGRAM_TYPES
+        (histo["lower_x"], histo["upper_x"],
+         histo["sum_x"], histo["tsum_x"]) = _read_limits(reader, real)
+
+        n_counts = histo["n_bins_x"]
+        if histo["n_bins_y"] > 0:
+            histo["underflow_y"] = reader.long()
+            histo["overflow_y"] = reader.long()
+            (histo["lower_y"], histo["upper_y"],
+             histo["sum_y"], histo["tsum_y"]) = _read_limits(reader, real)
+            n_counts *= histo["n_bins_y"]
+
+        if histo["type"] in WEIGHTED_HISTOGRAM_TYPES:
+            histo["content_all"] = reader.real()
+            histo["content_inside"] = reader.real()
+            histo["content_outside"] = reader.array("f4", 8)
+            dtype = "f8" if histo["type"] == "D" else "f4"
+            counts = reader.array(dtype, n_counts)
+        elif version >= 2:
+            # Differentially encoded variable length counts
+            deltas = np.fromiter((reader.scount() for _ in range(n_counts)), dtype=np.int64, count=n_counts)
+            counts = np.cumsum(deltas)
+        else:
+            counts = reader.array("i4", n_counts)
+
+        if histo["n_bins_y"] > 0:
+            counts = counts.reshape(histo["n_bins_y"], histo["n_bins_x"])
+            histo["y_edges"] = np.linspace(histo["lower_y"], histo["upper_y"], histo["n_bins_y"] + 1)
+        histo["x_edges"] = np.linspace(histo["lower_x"], histo["upper_x"], histo["n_bins_x"] + 1)
+        histo["counts"] = counts
+
+        histograms.append(histo)
+
+    if reader.position != len(reader.data):
+        raise ValueError("Histogram block not fully parsed, unexpected layout.")
+
+    return histograms
+
+def read_hdata_histograms(filename, ids=None):
+    """
+    Reads the histograms of a sim_telarray histogram file
+    (.hdata.gz) straight from the compressed stream,
+    without calling any external program.
+
+    Parameters
+    ----------
+    filename : string
+        path to the .hdata(.gz) file
+    ids : iterable, optional
+        histogram identifiers to keep (e.g. [1006, 1007]),
+        by default all of them
+
+    Returns
+    -------
+    dict
+        histogram id as keys, dictionaries from
+        parse_histograms as values. If an id appears in
+        several blocks, the last one is kept.
+    """
+    if ids is not None:
+        ids = set(ids)
+
+    histograms = {}
+    with open_eventio_file(filename) as stream:
+        for header, payload in iter_eventio_objects(stream, types=[IO_TYPE_HISTOGRAM]):
+            if payload is None:
+                continue
+            for histo in parse_histograms(payload, header["version"], header["byteorder"]):
+                if ids is None or histo["id"] in ids:
+                    histograms[histo["id"]] = histo
+
+    return histograms
+
+def trigger_fraction_from_hdata(filename, total_id=1006, triggered_id=1007):
+    """
+    Projection of the triggered (1007) and simulated (1006)
+    2D histograms onto their y axis, log10(E), and their ratio.
+    It replaces the external export of the 1007/1006 y projection.
+
+    Parameters
+    ----------
+    filename : string
+        path to the .hdata(.gz) file
+    total_id : int, optional
+        histogram of all simulated events, by default 1006
+    triggered_id : int, optional
+        histogram of triggered events, by default 1007
+
+    Returns
+    -------
+    pandas.DataFrame
+        LogE, N_frac, N_trigg, N_total like read_histo_output,
+        and the bin edges LogE_low, LogE_high.
+        Bins without simulated events are dropped.
+    """
+    histograms = read_hdata_histograms(filename, ids=[total_id, triggered_id])
+    for ident in (total_id, triggered_id):
+        if ident not in histograms:
+            raise KeyError(f"Histogram {ident} not found in {filename}")
+
+    total = histograms[total_id]
+    triggered = histograms[triggered_id]
+
+    N_total = np.asarray(total["counts"], dtype=float).sum(axis=1)
+    N_trigg = np.asarray(triggered["counts"], dtype=float).sum(axis=1)
+    y_edges = total["y_edges"]
+    logE = (y_edges[:-1] + y_edges[1:])/2
+
+    filled = N_total > 0
+    data = pd.DataFrame({
+        "LogE": logE[filled],
+        "N_frac": N_trigg[filled]/N_total[filled],
+        "N_trigg": N_trigg[filled],
+        "N_total": N_total[filled],
+        "LogE_low": y_edges[:-1][filled],
+        "LogE_high": y_edges[1:][filled],
+    })
+
+    return data
+
+def parse_central_event(payload, version=2, byteorder="<"):
+    """
+    Decodes the start of a central trigger block (type 2009):
+    global event count and the telescopes that triggered, with
+    their trigger type masks. Trigger times are not decoded.
+
+    Parameters
+    ----------
+    payload : bytes
+        object payload
+    version : int, optional
+        object version, by default 2
+    byteorder : str, optional
+        "<" little or ">" big endian, by default "<"
+
+    Returns
+    -------
+    dict
+        glob_count, teltrg_list (telescope ids) and
+        teltrg_type_mask (one mask per telescope, bits as
+        in TRIGGER_TYPES, majority assumed before version 2)
+    """
+    reader = _PayloadReader(payload, byteorder)
+    event = {"glob_count": reader.long()}
+    reader.position += 4*4 # cpu and gps times
+    teltrg_pattern = reader.long()
+    reader.long() # teldata_pattern
+
+    if version >= 1:
+        n_teltrg = reader.short()
+        event["teltrg_list"] = reader.array("i2", n_teltrg)
+        reader.position += 4*n_teltrg # teltrg_time
+        n_teldata = reader.short()
+        reader.position += 2*n_teldata # teldata_list
+    else:
+        # Only a bit pattern of the first 32 telescopes
+        event["teltrg_list"] = np.array([i for i in range(32) if teltrg_pattern & (1 << i)], dtype=np.int16)
+
+    n_teltrg = len(event["teltrg_list"])
+    if version >= 2:
+        event["teltrg_type_mask"] = np.array([reader.count() for _ in range(n_teltrg)], dtype=np.int64)
+    else:
+        event["teltrg_type_mask"] = np.ones(n_teltrg, dtype=np.int64)
+
+    return event
+
+def count_simtel_triggers(filename):
+    """
+    Counts the triggers of a .simtel(.gz/.zst) file by
+    streaming its event blocks. Only the central trigger
+    block of each event is decoded, telescope data and
+    every other block are skipped.
+
+    Parameters
+    ----------
+    filename : string
+        sim_telarray output file
+
+    Returns
+    -------
+    dict
+        events (system triggers written), mc_events (MC event
+        blocks, i.e. simulated events when they are all written),
+        telescope_triggers (telescope id -> triggers) and
+        trigger_types (name in TRIGGER_TYPES -> telescope triggers)
+    """
+    counts = {
+        "events": 0,
+        "mc_events": 0,
+        "telescope_triggers": {},
+        "trigger_types": dict.fromkeys(TRIGGER_TYPES, 0),
+    }
+    telescope_triggers = counts["telescope_triggers"]
+
+    with open_eventio_file(filename) as stream:
+        # MC event blocks are only counted, their payload is skipped
+        for header, payload in iter_eventio_objects(stream, types=[IO_TYPE_EVENT]):
+            if header["type"] == IO_TYPE_MC_EVENT:
+                counts["mc_events"] += 1
+            if payload is None:
+                continue
+
+            counts["events"] += 1
+            for sub_header, sub_payload in iter_subobjects(payload, header["byteorder"]):
+                if sub_header["type"] != IO_TYPE_CENTRAL_EVENT:
+                    continue
+                event = parse_central_event(sub_payload, sub_header["version"], header["byteorder"])
+                for tel_id, mask in zip(event["teltrg_list"].tolist(), event["teltrg_type_mask"].tolist()):
+                    telescope_triggers[tel_id] = telescope_triggers.get(tel_id, 0) + 1
+                    for bit, name in enumerate(TRIGGER_TYPES):
+                        if mask & (1 << bit):
+                            counts["trigger_types"][name] += 1
+                break
+
+    return counts
@@ -0,0 +1,190 @@
+import importlib.resources
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+from scipy.interpolate import CubicSpline
+
+# Flux models are evaluated with
+# Energy [=] TeV
+# Flux [=] TeV^-1 m^-2 sr^-1 s^-1
+
+class TabulatedFluxModel:
+    """
+    Flux interpolated with a cubic spline in log-log
+    space from tabulated measurements.
+
+    Parameters
+    ----------
+    energy : array like
+        tabulated energies in TeV
+    flux : array like
+        tabulated fluxes in TeV^-1 m^-2 sr^-1 s^-1
+    table : pandas.DataFrame, optional
+        original table the model was built from
+    """
+    def __init__(self, energy, flux, table=None):
+        self.table = table
+        # Interpolate in log space since relationship is linear
+        self._spline = CubicSpline(np.log10(energy), np.log10(flux))
+
+    def evaluate(self, energy):
+        """
+        Flux at the given energies [TeV] as a numpy array
+        in TeV^-1 m^-2 sr^-1 s^-1.
+        """
+        return 10**self._spline(np.log10(energy))
+
+
+class PowerLawFluxModel:
+    """
+    Flux following norm*(E/e_ref)**(-index).
+
+    Parameters
+    ----------
+    norm : float
+        flux at e_ref in TeV^-1 m^-2 sr^-1 s^-1
+    index : float
+        spectral index (positive for falling spectra)
+    e_ref : float, optional
+        reference energy in TeV, by default 1.0
+    """
+    def __init__(self, norm, index, e_ref=1.0):
+        self.table = None
+        self.norm = norm
+        self.index = index
+        self.e_ref = e_ref
+
+    def evaluate(self, energy):
+        """
+        Flux at the given energies [TeV] as a numpy array
+        in TeV^-1 m^-2 sr^-1 s^-1.
+        """
+        return self.norm*(np.asarray(energy, dtype=float)/self.e_ref)**(-self.index)
+
+
+def read_DAMPE_flux(input_table):
+    """
+    Used to read in cosmic proton flux
+    measured by DAMPE stored in
+    psctsimpipe/data/
+
+    Parameters
+    ----------
+    input_table : string
+        table with proton fluxes
+        as measured by DAMPE
+    """
+    columns = ["E",         # ith energy bin center
+               "Emin",      # ith lower energy bin edge
+               "Emax",      # ith upper energy bin edge
+               "F_invGeV_invsqmeter_inversec_invsr",
+               "F_err_stat",
+               "F_err_ana",
+               "F_err_had"
+               ]
+
+    temp_data = pd.read_csv(
+        input_table,
+        sep=r'\s+',
+        # delim_whitespace=True, # will be deprecated in future versions
+        names=columns,
+        dtype=float,
+        skiprows=1
+        )
+
+    data = temp_data.dropna()
+
+    return data
+
+def _load_DAMPE_proton():
+    """
+    DAMPE proton flux from psctsimpipe/data/DAMPE_proton_flux.txt
+    """
+    with importlib.resources.files("psctsimpipe.data").joinpath("DAMPE_proton_flux.txt").open("rb") as f:
+        data = read_DAMPE_flux(f)
+
+    DAMPE_energy = data["E"]/1000 # GeV to TeV
+    DAMPE_flux = data['F_invGeV_invsqmeter_inversec_invsr']*1000 #GeV^-1 to TeV^-1 m^-2 sr^-1 s^-1
+
+    return TabulatedFluxModel(DAMPE_energy, DAMPE_flux, table=data)
+
+
+# Model name -> function building the model.
+# Models are only built the first time they are requested.
+FLUX_MODEL_LOADERS = {
+    "DAMPE_proton": _load_DAMPE_proton,
+}
+
+def register_flux_model(name, loader):
+    """
+    Adds a flux model to the registry.
+
+    Parameters
+    ----------
+    name : string
+        name used to retrieve the model
+    loader : callable
+        function without arguments returning an object
+        with an evaluate(energy) method, energy in TeV
+        and flux in TeV^-1 m^-2 sr^-1 s^-1
+    """
+    FLUX_MODEL_LOADERS[name] = loader
+    get_flux_model.cache_clear()
+
+def register_power_law_flux_model(name, norm, index, e_ref=1.0):
+    """
+    Adds a power law flux model to the registry.
+    See PowerLawFluxModel for the parameters.
+    """
+    register_flux_model(name, lambda: PowerLawFluxModel(norm, index, e_ref))
+
+def register_tabulated_flux_model(name, energy, flux):
+    """
+    Adds a flux model interpolated from a table to
+    the registry. See TabulatedFluxModel for the parameters.
+    """
+    register_flux_model(name, lambda: TabulatedFluxModel(energy, flux))
+
+@lru_cache(maxsize=None)
+def get_flux_model(name):
+    """
+    Returns a flux model from the registry. Each model is
+    loaded (and its spline fitted) once per process.
+
+    Parameters
+    ----------
+    name : string
+        registered model name, e.g. "DAMPE_proton"
+
+    Returns
+    -------
+    TabulatedFluxModel, PowerLawFluxModel
+    or any registered model
+
+    Raises
+    ------
+    KeyError
+        If no model was registered under name
+    """
+    if name not in FLUX_MODEL_LOADERS:
+        raise KeyError(f"Unknown flux model {name}. Available models: {sorted(FLUX_MODEL_LOADERS)}")
+    return FLUX_MODEL_LOADERS[name]()
+
+def evaluate_flux(name, energy):
+    """
+    Vectorised flux of a registered model.
+
+    Parameters
+    ----------
+    name : string
+        registered model name, e.g. "DAMPE_proton"
+    energy : array like
+        Energy values in TeV
+
+    Returns
+    -------
+    numpy.array
+        flux in TeV^-1 m^-2 sr^-1 s^-1
+    """
+    return get_flux_model(name).evaluate(energy)
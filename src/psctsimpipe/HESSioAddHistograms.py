@@ -1,6 +1,20 @@
 import subprocess
 import os
 import glob
+import gzip
+import struct
+from concurrent.futures import ProcessPoolExecutor
+
+import h5py
+import numpy as np
+
+from psctsimpipe.EventIOReader import (
+    IO_TYPE_HISTOGRAM,
+    REAL_HISTOGRAM_TYPES,
+    SYNC_MARKER_LITTLE,
+    WEIGHTED_HISTOGRAM_TYPES,
+    read_hdata_histograms
+)
 
 def add_histograms(input_directory,output):
     """
@@ -36,4 +50,226 @@ def add_histograms(input_directory,output):
 
     command = [executable] + hdata_files + ["-o", output]
 
-    return command
\ No newline at end of file
+    return command
+
+# Native histogram summation
+
+# Fields added up when two histograms are summed
+ADDITIVE_HISTOGRAM_FIELDS = [
+    "entries", "tentries",
+    "underflow_x", "overflow_x", "sum_x", "tsum_x",
+    "underflow_y", "overflow_y", "sum_y", "tsum_y",
+    "content_all", "content_inside", "content_outside",
+]
+
+def add_histogram(total, histo):
+    """
+    Adds histo to total in place. Both must have been
+    booked with the same type, binning and limits.
+
+    Parameters
+    ----------
+    total : dict
+        histogram from EventIOReader.parse_histograms
+    histo : dict
+        histogram from EventIOReader.parse_histograms
+
+    Returns
+    -------
+    dict
+        total
+
+    Raises
+    ------
+    ValueError
+        If the binning of the two histograms differs
+    """
+    for key in ["type", "n_bins_x", "n_bins_y", "lower_x", "upper_x", "lower_y", "upper_y"]:
+        if total.get(key) != histo.get(key):
+            raise ValueError(f"Histogram {histo['id']} has a different {key}, it cannot be added.")
+
+    total["counts"] = total["counts"] + histo["counts"]
+    for key in ADDITIVE_HISTOGRAM_FIELDS:
+        if key in total:
+            total[key] = total[key] + histo[key]
+
+    return total
+
+def sum_histogram_files(hdata_files):
+    """
+    Sums the histograms of several .hdata.gz files, 
+    one file after the other.
+
+    Parameters
+    ----------
+    hdata_files : list
+        paths to .hdata.gz files
+
+    Returns
+    -------
+    dict
+        histogram id as keys, summed histograms as values
+    """
+    total = {}
+    for hdata_file in hdata_files:
+        for ident, histo in read_hdata_histograms(hdata_file).items():
+            if ident in total:
+                add_histogram(total[ident], histo)
+            else:
+                # Larger integer type so sums do not overflow
+                if histo["counts"].dtype.kind == "i":
+                    histo["counts"] = histo["counts"].astype(np.int64)
+                total[ident] = histo
+    return total
+
+def _merge_histogram_sums(pair):
+    """
+    Worker: merges two outputs of sum_histogram_files.
+    """
+    total, other = pair
+    for ident, histo in other.items():
+        if ident in total:
+            add_histogram(total[ident], histo)
+        else:
+            total[ident] = histo
+    return total
+
+def sum_hdata_histograms(hdata_files, n_workers=None):
+    """
+    Sums the histograms of many .hdata.gz files with a
+    parallel tree reduction: chunks of files are summed in
+    separate processes, then partial sums are merged pairwise
+    until a single set of histograms is left.
+
+    Parameters
+    ----------
+    hdata_files : list
+        paths to .hdata.gz files
+    n_workers : int, optional
+        number of processes, by default os.cpu_count()
+
+    Returns
+    -------
+    dict
+        histogram id as keys, summed histograms as values
+    """
+    hdata_files = sorted(hdata_files)
+    if not hdata_files:
+        return {}
+
+    n_workers = n_workers or os.cpu_count() or 1
+    n_chunks = min(len(hdata_files), 4*n_workers)
+    chunks = [hdata_files[i::n_chunks] for i in range(n_chunks)]
+
+    with ProcessPoolExecutor(max_workers=n_workers) as executor:
+        partials = list(executor.map(sum_histogram_files, chunks))
+        while len(partials) > 1:
+            pairs = list(zip(partials[0::2], partials[1::2]))
+            leftover = partials[-1:] if len(partials) % 2 else []
+            partials = list(executor.map(_merge_histogram_sums, pairs)) + leftover
+
+    return partials[0]
+
+def _check_int32(ident, name, values):
+    """
+    Raises OverflowError if integer values
+    do not fit in a 32 bit eventio long.
+    """
+    values = np.asarray(values)
+    if values.size and (values.max() > np.iinfo(np.int32).max or values.min() < np.iinfo(np.int32).min):
+        raise OverflowError(f"{name} of histogram {ident} do not fit in 32 bits, write HDF5 instead.")
+
+def write_hdata_histograms(histograms, output):
+    """
+    Writes histograms to a .hdata(.gz) file in the 
+    eventio format read by sim_telarray/hessio tools
+    (histogram block type 100, version 1).
+
+    Parameters
+    ----------
+    histograms : dict
+        histogram id as keys, histograms as values
+    output : string
+        output path, gzip compressed if it ends with .gz
+
+    Raises
+    ------
+    OverflowError
+        Version 1 blocks store entries, under/overflows and
+        integer counts with 32 bits, use write_histograms_hdf5
+        for larger sums.
+    """
+    def put_real_or_long(values, real):
+        return struct.pack("<ffff" if real else "<iiii", *values)
+
+    payload = [struct.pack("<h", len(histograms))]
+    for ident in sorted(histograms):
+        histo = histograms[ident]
+        real = histo["type"] in REAL_HISTOGRAM_TYPES
+        title = histo["title"].encode("utf-8")
+
+        long_fields = ["entries", "tentries", "underflow_x", "overflow_x"]
+        if not real:
+            long_fields += ["lower_x", "upper_x", "sum_x", "tsum_x"]
+        if histo["n_bins_y"] > 0:
+            long_fields += ["underflow_y", "overflow_y"]
+            if not real:
+                long_fields += ["lower_y", "upper_y", "sum_y", "tsum_y"]
+        for key in long_fields:
+            _check_int32(ident, key, histo[key])
+
+        payload.append(histo["type"].encode("ascii"))
+        payload.append(struct.pack("<h", len(title)) + title)
+        payload.append(struct.pack(
+            "<ihhiiii",
+            histo["id"], histo["n_bins_x"], histo["n_bins_y"],
+            histo["entries"], histo["tentries"],
+            histo["underflow_x"], histo["overflow_x"]
+        ))
+        payload.append(put_real_or_long(
+            (histo["lower_x"], histo["upper_x"], histo["sum_x"], histo["tsum_x"]), real
+        ))
+        if histo["n_bins_y"] > 0:
+            payload.append(struct.pack("<ii", histo["underflow_y"], histo["overflow_y"]))
+            payload.append(put_real_or_long(
+                (histo["lower_y"], histo["upper_y"], histo["sum_y"], histo["tsum_y"]), real
+            ))
+
+        counts = np.asarray(histo["counts"]).ravel()
+        if histo["type"] in WEIGHTED_HISTOGRAM_TYPES:
+            payload.append(struct.pack("<ff", histo["content_all"], histo["content_inside"]))
+            payload.append(np.asarray(histo["content_outside"], dtype="<f4").tobytes())
+            payload.append(counts.astype("<f8" if histo["type"] == "D" else "<f4").tobytes())
+        else:
+            _check_int32(ident, "Counts", counts)
+            payload.append(counts.astype("<i4").tobytes())
+
+    payload = b"".join(payload)
+    header = struct.pack("<IiI", IO_TYPE_HISTOGRAM | (1 << 20), 0, len(payload))
+
+    opener = gzip.open if output.endswith(".gz") else open
+    with opener(output, "wb") as f:
+        f.write(SYNC_MARKER_LITTLE + header + payload)
+
+def write_histograms_hdf5(histograms, output):
+    """
+    Writes histograms to an HDF5 file, one group
+    per histogram (histogram_<id>) with counts and bin
+    edges as datasets and the remaining fields as attributes.
+
+    Parameters
+    ----------
+    histograms : dict
+        histogram id as keys, histograms as values
+    output : string
+        output HDF5 path
+    """
+    with h5py.File(output, "w") as f:
+        for ident in sorted(histograms):
+            histo = histograms[ident]
+            group = f.create_group(f"histogram_{ident}")
+            for key, value in histo.items():
+                if isinstance(value, np.ndarray):
+                    group.create_dataset(key, data=value, compression="gzip")
+                else:
+                    group.attrs[key] = value
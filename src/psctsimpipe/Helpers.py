@@ -1,6 +1,19 @@
 import re
 import os
+import io
 import glob
+import gzip
+from collections import deque
+
+import h5py
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# Log files may be compressed once their run finished
+COMPRESSED_LOG_SUFFIXES = (".gz", ".zst")
 
 def extract_number(filename):
     """
@@ -112,4 +125,212 @@ def replace_substring(
     replacement : string
         new string piece
     """
-    return input_string.replace(pattern_to_replace,replacement)
\ No newline at end of file
+    return input_string.replace(pattern_to_replace,replacement)
+
+def is_log_file(filename, extension=".out"):
+    """
+    Whether filename is a log with the given extension,
+    either plain or compressed (.out, .out.gz, .out.zst).
+
+    Parameters
+    ----------
+    filename : string
+        file name or path
+    extension : str, optional
+        log file extension, by default ".out"
+
+    Returns
+    -------
+    bool
+    """
+    return any(
+        filename.endswith(extension + suffix) 
+        for suffix in ("",) + COMPRESSED_LOG_SUFFIXES
+    )
+
+def strip_compression_suffix(filename):
+    """
+    Removes a trailing .gz or .zst from a file name,
+    so that x.out.gz and x.out both give x.out.
+    """
+    for suffix in COMPRESSED_LOG_SUFFIXES:
+        if filename.endswith(suffix):
+            return filename[:-len(suffix)]
+    return filename
+
+def open_log_file(filename, mode="rb"):
+    """
+    Opens a plain, gzip (.gz) or zstandard (.zst)
+    compressed log file as a stream.
+
+    Parameters
+    ----------
+    filename : string
+        path to log file
+    mode : str, optional
+        "rb" for bytes or "r" for text, by default "rb"
+
+    Returns
+    -------
+    file object
+
+    Raises
+    ------
+    ImportError
+        zstandard is required to read .zst files
+    """
+    binary = "b" in mode
+    if filename.endswith(".gz"):
+        raw = gzip.open(filename, "rb")
+    elif filename.endswith(".zst"):
+        if zstandard is None:
+            raise ImportError("zstandard is required to read .zst files: pip install zstandard")
+        raw = zstandard.open(filename, "rb")
+    elif binary:
+        return open(filename, "rb")
+    else:
+        return open(filename, "r", encoding="utf-8", errors="replace")
+
+    if binary:
+        return raw
+    return io.TextIOWrapper(raw, encoding="utf-8", errors="replace")
+
+def read_file_tail(filename, n_bytes=65536):
+    """
+    Reads the last n_bytes of a file. Plain files
+    are read from the end without touching the rest,
+    compressed files are streamed.
+
+    Parameters
+    ----------
+    filename : string
+        file to read
+    n_bytes : int, optional
+        number of bytes to read from the end, by default 65536
+
+    Returns
+    -------
+    bytes
+        tail of the file, empty if the file does not exist
+    """
+    if not os.path.exists(filename):
+        return b""
+
+    if filename.endswith(COMPRESSED_LOG_SUFFIXES):
+        chunks = deque()
+        kept = 0
+        with open_log_file(filename, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                chunks.append(chunk)
+                kept += len(chunk)
+                while kept - len(chunks[0]) >= n_bytes:
+                    kept -= len(chunks.popleft())
+        return b"".join(chunks)[-n_bytes:]
+
+    with open(filename, "rb") as f:
+        f.seek(0, os.SEEK_END)
+        size = f.tell()
+        f.seek(max(0, size - n_bytes))
+        return f.read()
+
+def read_last_line(filename, n_bytes=65536):
+    """
+    Returns the last non-empty line of a (possibly
+    compressed) file, decoded to a string.
+
+    Parameters
+    ----------
+    filename : string
+        file to read
+    n_bytes : int, optional
+        at most this many bytes at the end of the file
+        are inspected, by default 65536
+    """
+    tail = read_file_tail(filename, n_bytes).rstrip(b"\r\n")
+    return tail.rsplit(b"\n", 1)[-1].decode("utf-8", errors="replace")
+
+def _last_match_end(data, phrase):
+    """
+    End of the last of the non-overlapping matches that
+    bytes.count finds scanning data from the left, 0 if none.
+    """
+    if not any(phrase[:k] == phrase[-k:] for k in range(1, len(phrase))):
+        # Occurrences of a phrase that cannot overlap itself are all counted
+        start = data.rfind(phrase)
+        return start + len(phrase) if start >= 0 else 0
+
+    end = 0
+    start = data.find(phrase)
+    while start >= 0:
+        end = start + len(phrase)
+        start = data.find(phrase, end)
+    return end
+
+def count_phrases_in_file(filename, phrases, chunk_size=1 << 24):
+    """
+    Counts how many times each phrase appears in a
+    (possibly compressed) file in a single pass.
+    The file is read as bytes in fixed-size chunks,
+    so memory stays constant and nothing is decoded.
+    Counts are those of bytes.count on the whole file,
+    whatever the chunk size: matches straddling two chunks
+    are counted once and never overlap another match.
+
+    Parameters
+    ----------
+    filename : string
+        path to the file
+    phrases : iterable
+        phrases to search for, str or bytes
+    chunk_size : int, optional
+        bytes read at a time, by default 16 MB
+
+    Returns
+    -------
+    dict
+        phrases as keys, number of (non-overlapping)
+        occurrences as values
+    """
+    phrases = list(phrases)
+    encoded = [p.encode("utf-8") if isinstance(p, str) else p for p in phrases]
+    counts = [0]*len(encoded)
+    # Bytes after the last match of each phrase that may start a match in the next chunk
+    pending = [b""]*len(encoded)
+
+    with open_log_file(filename, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            for i, phrase in enumerate(encoded):
+                data = pending[i] + chunk if pending[i] else chunk
+                counts[i] += data.count(phrase)
+                keep = max(_last_match_end(data, phrase), len(data) - len(phrase) + 1)
+                pending[i] = data[keep:]
+
+    return dict(zip(phrases, counts))
+
+def read_hdf5_column(dataset, start=None, stop=None):
+    """
+    Rows start to stop of an HDF5 dataset,
+    string datasets decoded to str.
+    """
+    if h5py.check_string_dtype(dataset.dtype) is not None:
+        return dataset.asstr()[start:stop]
+    return dataset[start:stop]
+
+def write_hdf5_table(group, table):
+    """
+    Writes every column of a pandas.DataFrame as one
+    dataset of an HDF5 group, object columns as strings.
+
+    Parameters
+    ----------
+    group : h5py.Group
+        group receiving the datasets
+    table : pandas.DataFrame
+        table to write
+    """
+    for column in table.columns:
+        values = table[column].to_numpy()
+        if values.dtype == object:
+            group.create_dataset(column, data=values.astype(str).astype(object), dtype=h5py.string_dtype())
+        else:
+            group.create_dataset(column, data=values)
@@ -0,0 +1,241 @@
+import os
+import json
+import gzip
+import shutil
+from concurrent.futures import ProcessPoolExecutor
+
+from psctsimpipe.Helpers import count_phrases_in_file, read_last_line, strip_compression_suffix, zstandard
+
+LOG_CACHE_NAME = "log_status_cache.json"
+
+# Phrases counted in every log before it gets compressed
+CACHED_PHRASES = ("has triggered!",)
+
+def compute_log_metrics(file_path, phrases=CACHED_PHRASES):
+    """
+    Status and metrics of a single log. All phrases
+    are counted in one streaming pass.
+
+    Parameters
+    ----------
+    file_path : string
+        plain or compressed log file
+    phrases : tuple, optional
+        phrases to count, by default ("has triggered!",)
+
+    Returns
+    -------
+    dict
+        finished flag, last line, number of lines
+        and counts of each phrase
+    """
+    counts = count_phrases_in_file(file_path, ("\n",) + tuple(phrases))
+    last_line = read_last_line(file_path)
+
+    return {
+        "finished": "Sim_telarray finished" in last_line,
+        "last_line": last_line,
+        "n_lines": counts.pop("\n"),
+        "phrase_counts": counts,
+    }
+
+def load_log_cache(directory):
+    """
+    Reads the log status cache of a directory.
+
+    Returns
+    -------
+    dict
+        log names (without compression suffix) as keys,
+        output of compute_log_metrics as values.
+        Empty if there is no cache yet.
+    """
+    cache_file = os.path.join(directory, LOG_CACHE_NAME)
+    if not os.path.exists(cache_file):
+        return {}
+    with open(cache_file, "r") as f:
+        return json.load(f)
+
+def save_log_cache(directory, cache):
+    """
+    Writes the log status cache of a directory.
+    The file is replaced atomically so an interrupted
+    write never leaves a truncated cache behind.
+    """
+    cache_file = os.path.join(directory, LOG_CACHE_NAME)
+    tmp_file = cache_file + ".tmp"
+    with open(tmp_file, "w") as f:
+        json.dump(cache, f)
+    os.replace(tmp_file, cache_file)
+
+def cached_last_line(file_path, cache, stat=None):
+    """
+    Last line of a compacted log as cached when it was
+    compressed, so status checks do not decompress it.
+
+    Parameters
+    ----------
+    file_path : string
+        compressed log (.out.gz or .out.zst)
+    cache : dict
+        log status cache of its directory (see load_log_cache)
+    stat : os.stat_result, optional
+        stat of file_path if already known (e.g. from os.scandir)
+
+    Returns
+    -------
+    string or None
+        None if the file is not compressed, not cached, or
+        its size or modification time changed since it was
+        cached (the entry is stale)
+    """
+    log_name = os.path.basename(strip_compression_suffix(file_path))
+    entry = cache.get(log_name) if log_name != os.path.basename(file_path) else None
+    if not entry or "last_line" not in entry or "size" not in entry:
+        return None
+
+    if stat is None:
+        stat = os.stat(file_path)
+    if stat.st_size != entry["size"] or stat.st_mtime_ns != entry["mtime_ns"]:
+        return None
+    return entry["last_line"]
+
+def read_log_last_line(file_path, cache=None, stat=None):
+    """
+    Last line of a (possibly compressed) log, from the
+    status cache for compacted logs still matching it
+    (see cached_last_line), read from the file otherwise.
+    """
+    if cache:
+        last_line = cached_last_line(file_path, cache, stat)
+        if last_line is not None:
+            return last_line
+    return read_last_line(file_path)
+
+def compress_log_file(file_path, method="gz", level=None):
+    """
+    Compresses a log file and removes the original.
+    The compressed file is written next to it
+    (x.out -> x.out.gz or x.out.zst).
+
+    Parameters
+    ----------
+    file_path : string
+        plain log file
+    method : str, optional
+        "gz" or "zst", by default "gz"
+    level : int, optional
+        compression level, by default 6 for gzip
+        and 10 for zstandard
+
+    Returns
+    -------
+    string
+        path to the compressed file
+    """
+    output_file = f"{file_path}.{method}"
+    tmp_file = output_file + ".tmp"
+
+    with open(file_path, "rb") as f_in:
+        if method == "gz":
+            with gzip.open(tmp_file, "wb", compresslevel=level or 6) as f_out:
+                shutil.copyfileobj(f_in, f_out, 1 << 20)
+        elif method == "zst":
+            if zstandard is None:
+                raise ImportError("zstandard is required to write .zst files: pip install zstandard")
+            compressor = zstandard.ZstdCompressor(level=level or 10)
+            with open(tmp_file, "wb") as f_out:
+                compressor.copy_stream(f_in, f_out)
+        else:
+            raise ValueError(f"Unknown compression method {method}. Use gz or zst.")
+
+    shutil.copystat(file_path, tmp_file)
+    os.replace(tmp_file, output_file)
+    os.remove(file_path)
+
+    return output_file
+
+def _compress_and_stat(file_path, method, level):
+    """
+    Worker: compresses a finished log and returns the size
+    and modification time identifying the compressed file.
+    """
+    compressed = compress_log_file(file_path, method, level)
+    stat = os.stat(compressed)
+    return compressed, stat.st_size, stat.st_mtime_ns
+
+def compact_finished_logs(directory, method="gz", level=None, n_workers=None):
+    """
+    Caches status and metrics of every plain .out log
+    in directory and compresses the ones that finished,
+    in parallel. Unfinished logs are left untouched
+    (their metrics are cached but will be recomputed).
+    Status checks read the last line of compressed logs
+    from the cache (see read_log_last_line).
+
+    Metrics are computed and the cache saved before any
+    log is compressed, so an interrupted compaction never
+    loses them. The size and modification time of each
+    compressed file are added to the cache afterwards,
+    entries without them are not trusted.
+
+    Parameters
+    ----------
+    directory : string
+        directory where log files live
+    method : str, optional
+        "gz" or "zst", by default "gz"
+    level : int, optional
+        compression level
+    n_workers : int, optional
+        number of processes, by default os.cpu_count()
+
+    Returns
+    -------
+    dict
+        the updated log status cache
+    """
+    cache = load_log_cache(directory)
+
+    logs = sorted(
+        os.path.join(directory, filename)
+        for filename in os.listdir(directory)
+        if filename.endswith(".out")
+    )
+
+    compressed = 0
+    with ProcessPoolExecutor(max_workers=n_workers) as executor:
+        futures = {file_path: executor.submit(compute_log_metrics, file_path) for file_path in logs}
+        finished = []
+        for file_path, future in futures.items():
+            try:
+                metrics = future.result()
+            except Exception as e:
+                print(f"[!] Unable to read log {file_path}: {e}")
+                continue
+            cache[os.path.basename(file_path)] = metrics
+            if metrics["finished"]:
+                finished.append(file_path)
+
+        save_log_cache(directory, cache)
+
+        futures = {
+            file_path: executor.submit(_compress_and_stat, file_path, method, level)
+            for file_path in finished
+        }
+        for file_path, future in futures.items():
+            try:
+                _, size, mtime_ns = future.result()
+            except Exception as e:
+                print(f"[!] Unable to compress log {file_path}: {e}")
+                continue
+            metrics = cache[os.path.basename(file_path)]
+            metrics["size"], metrics["mtime_ns"] = size, mtime_ns
+            compressed += 1
+
+    save_log_cache(directory, cache)
+
+    print(f"{len(logs)} logs found, {compressed} finished logs compressed.")
+    print(f"Status and metrics cached in {os.path.join(directory, LOG_CACHE_NAME)}")
+
+    return cache
@@ -0,0 +1,258 @@
+import inspect
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from psctsimpipe.CalculateTriggerRate import NSB_GROUP_KEYS, poisson_rate_interval
+from psctsimpipe.OfflineTrigger import majority_trigger_levels
+from psctsimpipe.pSCTTriggerRate import trigger_rate_command
+
+# Defaults of the emulated configurations, kept in sync
+# with the sim_telarray runs of trigger_rate_command
+TRIGGER_RATE_DEFAULTS = {
+    name: parameter.default
+    for name, parameter in inspect.signature(trigger_rate_command).parameters.items()
+    if name in NSB_GROUP_KEYS and parameter.default is not inspect.Parameter.empty
+}
+
+PSCT_N_PIXELS = 1600 # 25 modules of 64 pixels
+
+def NSB_to_MHz(NSB):
+    """
+    Per pixel photoelectron rate in MHz from
+    a "60MHz" style NSB label (or a number).
+    """
+    if isinstance(NSB, str):
+        match = re.fullmatch(r"\s*([0-9.eE+-]+)\s*MHz\s*", NSB)
+        if not match:
+            raise ValueError(f"Cannot read the NSB rate of {NSB}.")
+        return float(match.group(1))
+    return float(NSB)
+
+def gaussian_pulse(fwhm=3.0, ns_per_bin=1.0):
+    """
+    Gaussian single photoelectron pulse sampled every
+    ns_per_bin, peak amplitude 1 (thresholds in p.e.).
+
+    Parameters
+    ----------
+    fwhm : float, optional
+        full width at half maximum in ns, by default 3.0
+    ns_per_bin : float, optional
+        sampling interval in ns, by default 1.0
+
+    Returns
+    -------
+    numpy.ndarray
+        pulse samples, +-3 sigma around the peak
+    """
+    sigma = fwhm/(2*np.sqrt(2*np.log(2)))/ns_per_bin
+    half_width = max(1, int(np.ceil(3*sigma)))
+    t = np.arange(-half_width, half_width + 1)
+    return np.exp(-0.5*(t/sigma)**2)
+
+def simulate_nsb_waveforms(rng,
+                           n_events,
+                           n_pixels,
+                           n_samples,
+                           nsb_MHz,
+                           pulse,
+                           ns_per_bin=1.0,
+                           pe_spread=0.1,
+                           ac_coupling=True,
+                           dtype=np.float32
+                           ):
+    """
+    Pixel signals made of NSB photoelectrons only.
+    Photoelectrons arrive as a Poisson process binned in
+    samples, their amplitudes fluctuate by pe_spread and are folded
+    with the pulse shape. Pulses of photoelectrons arriving
+    before the window are included.
+
+    Parameters
+    ----------
+    rng : numpy.random.Generator
+        random generator
+    n_events, n_pixels, n_samples : int
+        shape of the output
+    nsb_MHz : float
+        photoelectron rate per pixel in MHz
+    pulse : array like
+        single photoelectron pulse samples
+    ns_per_bin : float, optional
+        sampling interval in ns, by default 1.0
+    pe_spread : float, optional
+        relative spread of the single photoelectron
+        amplitude, by default 0.1
+    ac_coupling : bool, optional
+        subtract the mean NSB level, by default True
+    dtype : numpy dtype, optional
+        by default numpy.float32
+
+    Returns
+    -------
+    numpy.ndarray
+        (n_events, n_pixels, n_samples) signals in p.e.
+    """
+    pulse = np.asarray(pulse, dtype=dtype)
+    mean_pe = nsb_MHz*1e6*ns_per_bin*1e-9
+    padded = n_samples + len(pulse) - 1
+
+    # Poisson process: the total number of photoelectrons
+    # is Poisson, their samples uniform
+    shape = (n_events, n_pixels, padded)
+    size = n_events*n_pixels*padded
+    n_pe = rng.poisson(mean_pe*size)
+    heights = np.ones(n_pe)
+    if pe_spread > 0:
+        heights += pe_spread*rng.standard_normal(n_pe)
+    amplitude = np.bincount(rng.integers(0, size, n_pe), weights=heights, minlength=size)
+    amplitude = amplitude.astype(dtype).reshape(shape)
+
+    waveforms = np.zeros((n_events, n_pixels, n_samples), dtype=dtype)
+    for shift, height in enumerate(pulse[::-1]):
+        waveforms += height*amplitude[..., shift:shift + n_samples]
+
+    if ac_coupling:
+        waveforms -= dtype(mean_pe*pulse.sum())
+
+    return waveforms
+
+def _emulate_chunk(args):
+    """
+    Worker: triggers of every (threshold, multiplicity)
+    combination in one chunk of emulated events.
+    """
+    seed, n_events, nsb_MHz, n_samples, thresholds, multiplicities, kwargs = args
+    rng = np.random.default_rng(seed)
+    waveforms = simulate_nsb_waveforms(
+        rng, n_events, kwargs["n_pixels"], n_samples, nsb_MHz, kwargs["pulse"],
+        kwargs["ns_per_bin"], kwargs["pe_spread"], kwargs["ac_coupling"]
+    )
+    levels = majority_trigger_levels(
+        waveforms, multiplicities.max(), kwargs["gate_samples"], kwargs["trigger_groups"]
+    )
+    return (levels.T[multiplicities - 1][None, :, :] > thresholds[:, None, None]).sum(axis=2)
+
+def emulate_nsb_trigger_rates(configurations,
+                              n_events=1000,
+                              n_pixels=PSCT_N_PIXELS,
+                              ns_per_bin=1.0,
+                              window_bins="disc_bins",
+                              pulse=None,
+                              pulse_fwhm=3.0,
+                              pe_spread=0.1,
+                              ac_coupling=True,
+                              gate_samples=1,
+                              trigger_groups=None,
+                              chunk_size=32,
+                              confidence=0.6827,
+                              seed=None,
+                              n_workers=None
+                              ):
+    """
+    Accidental NSB trigger rates of many trigger
+    configurations from a fast Monte Carlo of the camera
+    signals and majority trigger, for screening before
+    running sim_telarray. Configurations sharing NSB and
+    window are emulated once for all their thresholds and
+    multiplicities. Events are split in chunks over
+    processes, each chunk with its own random stream
+    derived from seed.
+
+    Parameters
+    ----------
+    configurations : pandas.DataFrame or list
+        one row (dict) per configuration with trigger_pixels
+        and discriminator_threshold [p.e.]. fadc_bins,
+        fadc_sum_bins, disc_bins, night_type and NSB default
+        to those of trigger_rate_command.
+    n_events : int, optional
+        emulated events per (NSB, window), by default 1000
+    n_pixels : int, optional
+        camera pixels, by default 1600 (pSCT)
+    ns_per_bin : float, optional
+        duration of a time interval in ns, by default 1.0
+    window_bins : str, optional
+        number of intervals emulated per event, "disc_bins"
+        (trigger window) or "fadc_bins", by default "disc_bins"
+    pulse : array like, optional
+        single photoelectron pulse sampled every ns_per_bin,
+        by default gaussian_pulse(pulse_fwhm, ns_per_bin)
+    pulse_fwhm : float, optional
+        FWHM of the default pulse in ns, by default 3.0
+    pe_spread : float, optional
+        relative single photoelectron amplitude spread, by default 0.1
+    ac_coupling : bool, optional
+        subtract the mean NSB level, by default True
+    gate_samples, trigger_groups : optional
+        see majority_trigger_levels
+    chunk_size : int, optional
+        events per task, by default 32
+    confidence : float, optional
+        confidence level of the Poisson interval, by default 0.6827
+    seed : int, optional
+        random seed
+    n_workers : int, optional
+        number of processes, by default os.cpu_count()
+
+    Returns
+    -------
+    pandas.DataFrame
+        aggregate_NSB_trigger_rates layout: one row per
+        configuration with triggers, n_events, exposure [s],
+        trigger_rate and its confidence interval [Hz]
+    """
+    table = pd.DataFrame(configurations)
+    for key, value in TRIGGER_RATE_DEFAULTS.items():
+        if key not in table:
+            table[key] = value
+    table = table[NSB_GROUP_KEYS].drop_duplicates().reset_index(drop=True)
+
+    if pulse is None:
+        pulse = gaussian_pulse(pulse_fwhm, ns_per_bin)
+    kwargs = {
+        "n_pixels": n_pixels,
+        "pulse": np.asarray(pulse, dtype=float),
+        "ns_per_bin": ns_per_bin,
+        "pe_spread": pe_spread,
+        "ac_coupling": ac_coupling,
+        "gate_samples": gate_samples,
+        "trigger_groups": trigger_groups,
+    }
+
+    tasks, owners = [], []
+    groups = list(table.groupby(["NSB", window_bins], sort=False))
+    seeds = np.random.SeedSequence(seed).spawn(len(groups))
+    for (NSB, n_samples), group in groups:
+        thresholds = np.unique(group["discriminator_threshold"].to_numpy(dtype=float))
+        multiplicities = np.unique(group["trigger_pixels"].to_numpy(dtype=int))
+        sizes = [chunk_size]*(n_events//chunk_size) + ([n_events % chunk_size] if n_events % chunk_size else [])
+        for chunk_seed, size in zip(seeds[len(owners)].spawn(len(sizes)), sizes):
+            tasks.append((chunk_seed, size, NSB_to_MHz(NSB), int(n_samples), thresholds, multiplicities, kwargs))
+        owners.append((group.index, thresholds, multiplicities, len(sizes)))
+
+    n_workers = n_workers or os.cpu_count() or 1
+    with ProcessPoolExecutor(max_workers=n_workers) as executor:
+        counts = list(executor.map(_emulate_chunk, tasks, chunksize=max(1, len(tasks)//(4*n_workers))))
+
+    table["triggers"] = 0
+    start = 0
+    for rows, thresholds, multiplicities, n_chunks in owners:
+        total = np.sum(counts[start:start + n_chunks], axis=0)
+        start += n_chunks
+        i = np.searchsorted(thresholds, table.loc[rows, "discriminator_threshold"].to_numpy(dtype=float))
+        j = np.searchsorted(multiplicities, table.loc[rows, "trigger_pixels"].to_numpy(dtype=int))
+        table.loc[rows, "triggers"] = total[i, j]
+
+    table["n_events"] = n_events
+    table["exposure"] = n_events*table[window_bins]*ns_per_bin*1e-9 # Converting from ns to second
+    table["trigger_rate"] = table["triggers"]/table["exposure"] # Hz
+    table["trigger_rate_low"], table["trigger_rate_high"] = poisson_rate_interval(
+        table["triggers"], table["exposure"], confidence
+    )
+
+    return table.sort_values(NSB_GROUP_KEYS).reset_index(drop=True)
@@ -0,0 +1,365 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from psctsimpipe.CalculateTriggerRate import NSB_GROUP_KEYS, poisson_rate_interval
+from psctsimpipe.pSCTTriggerRate import extract_trigger_rate_log_params, trigger_rate_command
+
+# Offline re-triggering: sim_telarray runs once per seed with a
+# low single pixel threshold and records the full readout window.
+# Every event that could pass a stricter (threshold, multiplicity)
+# combination is then in the output, and the majority trigger is
+# applied again to the recorded waveforms for any number of
+# combinations. Events not recorded would not pass any of them.
+
+def waveform_dump_command(CORSIKA_input,
+                          sim_telarray_cfg,
+                          output_dir,
+                          dump_threshold=2.0,
+                          fadc_bins=84,
+                          disc_bins=80,
+                          disc_start=0,
+                          trigger_current_limit=100000,
+                          maximum_telescopes=1,
+                          trigger_telescopes=1,
+                          night_type="DARK",
+                          NSB="60MHz"
+                          ):
+    """
+    sim_telarray command recording the waveforms used by
+    offline_trigger_scan: a trigger_rate_command with
+    multiplicity 1 at dump_threshold, the whole fadc
+    window read out (fadc_sum_bins=fadc_bins) and no
+    trigger listing in the log.
+
+    Parameters
+    ----------
+    dump_threshold : float, optional
+        single pixel threshold of the recorded events,
+        below every threshold scanned offline, by default 2.0
+
+    See trigger_rate_command for the other parameters.
+
+    Returns
+    -------
+    string
+        SimTelarray command
+    """
+    return trigger_rate_command(
+        CORSIKA_input,
+        sim_telarray_cfg,
+        output_dir,
+        1,
+        dump_threshold,
+        fadc_bins=fadc_bins,
+        fadc_sum_bins=fadc_bins,
+        disc_bins=disc_bins,
+        disc_start=disc_start,
+        trigger_current_limit=trigger_current_limit,
+        maximum_telescopes=maximum_telescopes,
+        trigger_telescopes=trigger_telescopes,
+        night_type=night_type,
+        NSB=NSB,
+        list_triggers=False
+    )
+
+def gated_waveforms(waveforms, gate_samples=1):
+    """
+    Stretches every pixel signal over a coincidence gate:
+    the maximum over the last gate_samples samples. A pixel
+    is above a threshold at a sample if it crossed it
+    within the gate.
+
+    Parameters
+    ----------
+    waveforms : array like
+        (..., n_samples) signals
+    gate_samples : int, optional
+        gate length in samples, by default 1 (no stretching)
+
+    Returns
+    -------
+    numpy.ndarray
+        gated signals, same shape as waveforms
+    """
+    waveforms = np.asarray(waveforms)
+    if waveforms.dtype.kind != "f":
+        waveforms = waveforms.astype(float)
+    gated = waveforms.copy()
+    for shift in range(1, min(gate_samples, waveforms.shape[-1])):
+        np.maximum(gated[..., shift:], waveforms[..., :-shift], out=gated[..., shift:])
+    return gated
+
+def majority_trigger_levels(waveforms, max_multiplicity, gate_samples=1, trigger_groups=None):
+    """
+    Highest threshold passed by each event for every
+    multiplicity: levels[:, k-1] is the largest signal reached
+    simultaneously (within the gate) by k pixels of a trigger
+    group. An event triggers at (threshold, k) if
+    levels[:, k-1] > threshold, so any number of thresholds
+    is evaluated from one sort.
+
+    Parameters
+    ----------
+    waveforms : array like
+        (n_events, n_pixels, n_samples) signals in the
+        units of the thresholds
+    max_multiplicity : int
+        largest multiplicity evaluated
+    gate_samples : int, optional
+        coincidence gate in samples, by default 1
+    trigger_groups : array like, optional
+        (n_groups, group_size) pixel indices of the groups
+        the majority is formed in, padded with -1. By default
+        the whole camera is one group.
+
+    Returns
+    -------
+    numpy.ndarray
+        (n_events, max_multiplicity) levels, -inf for
+        multiplicities larger than a group
+    """
+    gated = gated_waveforms(waveforms, gate_samples)
+    n_events, _, n_samples = gated.shape
+
+    if trigger_groups is None:
+        groups = gated[:, None]
+    else:
+        padded = np.concatenate([gated, np.full((n_events, 1, n_samples), -np.inf)], axis=1)
+        groups = padded[:, np.asarray(trigger_groups)]
+    # groups: (n_events, n_groups, group_size, n_samples)
+
+    k = min(max_multiplicity, groups.shape[2])
+    top = -np.partition(-groups, k - 1, axis=2)[:, :, :k]
+    top = -np.sort(-top, axis=2)
+    levels = np.full((n_events, max_multiplicity), -np.inf)
+    levels[:, :k] = top.max(axis=3).max(axis=1)
+
+    return levels
+
+def emulate_majority_trigger(waveforms, thresholds, multiplicities, gate_samples=1, trigger_groups=None):
+    """
+    Majority trigger decision of every event for every
+    (threshold, multiplicity) combination.
+
+    Parameters
+    ----------
+    waveforms : array like
+        (n_events, n_pixels, n_samples) signals
+    thresholds : array like
+        discriminator thresholds
+    multiplicities : array like
+        pixel multiplicities
+    gate_samples, trigger_groups : optional
+        see majority_trigger_levels
+
+    Returns
+    -------
+    numpy.ndarray
+        (n_thresholds, n_multiplicities, n_events) booleans
+    """
+    thresholds = np.atleast_1d(np.asarray(thresholds, dtype=float))
+    multiplicities = np.atleast_1d(np.asarray(multiplicities, dtype=int))
+    levels = majority_trigger_levels(waveforms, multiplicities.max(), gate_samples, trigger_groups)
+    return levels.T[multiplicities - 1][None, :, :] > thresholds[:, None, None]
+
+def iter_simtel_waveforms(simtel_file, tel_id=None, chunk_size=500, amplitude_scale=1.0, run_summary=None):
+    """
+    Reads the calibrated (R1) waveforms of a .simtel file
+    with ctapipe in chunks of events.
+
+    Parameters
+    ----------
+    simtel_file : string
+        sim_telarray output
+    tel_id : int, optional
+        telescope to read, by default the first one of each event
+    chunk_size : int, optional
+        events per chunk, by default 500
+    amplitude_scale : float, optional
+        factor converting the R1 samples to the units of the
+        discriminator threshold, by default 1.0
+    run_summary : dict, optional
+        filled with n_simulated_events (showers times reuse
+        of every run of the file) once the file is opened
+
+    Yields
+    ------
+    numpy.ndarray
+        (n_events, n_pixels, n_samples) waveforms
+        of the first gain channel
+    """
+    try:
+        from ctapipe.io import SimTelEventSource
+    except ImportError as e:
+        raise ImportError("Reading sim_telarray waveforms requires ctapipe.") from e
+
+    chunk = []
+    with SimTelEventSource(simtel_file, skip_calibration_events=True) as source:
+        if run_summary is not None:
+            run_summary["n_simulated_events"] = sum(
+                config.n_showers*config.shower_reuse for config in source.simulation_config.values()
+            )
+        for event in source:
+            tels = event.r1.tel
+            if not tels:
+                continue
+            waveform = np.asarray(tels[tel_id if tel_id is not None else next(iter(tels))].waveform)
+            if waveform.ndim == 3:
+                waveform = waveform[0]
+            chunk.append(waveform*amplitude_scale)
+            if len(chunk) >= chunk_size:
+                yield np.stack(chunk)
+                chunk = []
+    if chunk:
+        yield np.stack(chunk)
+
+def _offline_trigger_counts(args):
+    """
+    Worker: triggers of every combination in one waveform dump.
+    """
+    simtel_file, thresholds, multiplicities, n_events, kwargs = args
+    params = extract_trigger_rate_log_params(simtel_file)
+    if params is None:
+        return None
+
+    if np.any(thresholds < params["discriminator_threshold"]) or np.any(multiplicities < params["trigger_pixels"]):
+        raise ValueError(
+            f"{os.path.basename(simtel_file)} only holds events above {params['discriminator_threshold']} "
+            f"in {params['trigger_pixels']} pixels, scan stricter combinations."
+        )
+
+    gate_samples = kwargs["gate_samples"]
+    trigger_groups = kwargs["trigger_groups"]
+    counts = np.zeros((len(thresholds), len(multiplicities)), dtype=np.int64)
+    run_summary = {}
+    try:
+        for waveforms in iter_simtel_waveforms(
+            simtel_file, kwargs["tel_id"], kwargs["chunk_size"], kwargs["amplitude_scale"], run_summary
+        ):
+            counts += emulate_majority_trigger(
+                waveforms, thresholds, multiplicities, gate_samples, trigger_groups
+            ).sum(axis=2)
+        if n_events is None:
+            # Taken from the run headers the source already read, not a second pass
+            n_events = run_summary.get("n_simulated_events") or np.nan
+    except Exception as e:
+        print(f"[!] {os.path.basename(simtel_file)} - Unable to read file: {e}")
+        return None
+
+    params["counts"] = counts
+    params["n_events"] = n_events
+    params["simtel_file"] = simtel_file
+    return params
+
+def offline_trigger_scan(simtel_files,
+                         thresholds,
+                         multiplicities,
+                         n_events=None,
+                         ns_per_bin=1.0,
+                         window_bins="fadc_bins",
+                         gate_samples=1,
+                         trigger_groups=None,
+                         tel_id=None,
+                         amplitude_scale=1.0,
+                         chunk_size=500,
+                         confidence=0.6827,
+                         n_workers=None
+                         ):
+    """
+    NSB trigger rates of a whole (threshold, multiplicity)
+    scan from waveform dumps (see waveform_dump_command),
+    one process per dump. The result has the layout of
+    aggregate_NSB_trigger_rates.
+
+    The majority trigger is applied to the recorded readout
+    samples, not to sim_telarray's internal discriminator
+    signal, so thresholds should be checked against a few
+    full simulations (amplitude_scale) before relying on
+    absolute rates.
+
+    Parameters
+    ----------
+    simtel_files : list
+        .simtel outputs of waveform_dump_command
+    thresholds : array like
+        discriminator thresholds, at least the dump threshold
+    multiplicities : array like
+        pixel multiplicities
+    n_events : int, optional
+        events simulated per file, by default the showers
+        (times reuse) in the run headers of each file
+    ns_per_bin : float, optional
+        duration of a time interval in ns, by default 1.0
+    window_bins : str, optional
+        "fadc_bins" or "disc_bins", by default "fadc_bins"
+    gate_samples, trigger_groups : optional
+        see majority_trigger_levels
+    tel_id, amplitude_scale, chunk_size : optional
+        see iter_simtel_waveforms
+    confidence : float, optional
+        confidence level of the Poisson interval, by default 0.6827
+    n_workers : int, optional
+        number of processes, by default os.cpu_count()
+
+    Returns
+    -------
+    pandas.DataFrame
+        one row per configuration with the number of dumps,
+        summed triggers and exposure [s], trigger rate [Hz]
+        and its confidence interval [Hz]
+    """
+    simtel_files = list(simtel_files)
+    thresholds = np.atleast_1d(np.asarray(thresholds, dtype=float))
+    multiplicities = np.atleast_1d(np.asarray(multiplicities, dtype=int))
+    kwargs = {
+        "gate_samples": gate_samples,
+        "trigger_groups": trigger_groups,
+        "tel_id": tel_id,
+        "amplitude_scale": amplitude_scale,
+        "chunk_size": chunk_size,
+    }
+
+    with ProcessPoolExecutor(max_workers=n_workers) as executor:
+        dumps = [
+            dump for dump in executor.map(
+                _offline_trigger_counts,
+                [(simtel_file, thresholds, multiplicities, n_events, kwargs) for simtel_file in simtel_files]
+            )
+            if dump is not None
+        ]
+
+    rows = []
+    for dump in dumps:
+        if np.isnan(dump["n_events"]):
+            print(f"Warning: number of events unknown for {os.path.basename(dump['simtel_file'])}, skipped. Pass n_events.")
+            continue
+        for i, threshold in enumerate(thresholds):
+            for j, multiplicity in enumerate(multiplicities):
+                row = {key: dump[key] for key in NSB_GROUP_KEYS}
+                row["trigger_pixels"] = int(multiplicity)
+                row["discriminator_threshold"] = float(threshold)
+                row["triggers"] = dump["counts"][i, j]
+                row["n_events"] = dump["n_events"]
+                row["exposure"] = dump["n_events"]*dump[window_bins]*ns_per_bin*1e-9 # Converting from ns to second
+                row["simtel_file"] = dump["simtel_file"]
+                rows.append(row)
+
+    if not rows:
+        return pd.DataFrame()
+
+    table = pd.DataFrame(rows).groupby(NSB_GROUP_KEYS, sort=True).agg(
+        n_logs=("simtel_file", "size"),
+        triggers=("triggers", "sum"),
+        n_events=("n_events", "sum"),
+        exposure=("exposure", "sum"),
+    ).reset_index()
+
+    table["trigger_rate"] = table["triggers"]/table["exposure"] # Hz
+    table["trigger_rate_low"], table["trigger_rate_high"] = poisson_rate_interval(
+        table["triggers"], table["exposure"], confidence
+    )
+
+    return table
@@ -0,0 +1,311 @@
+import numpy as np
+import pandas as pd
+from scipy.linalg import cho_factor, cho_solve, solve_triangular
+from scipy.optimize import minimize
+from scipy.stats import norm
+
+from psctsimpipe.RateTable import _axis_values
+
+# Trigger configuration parameters the surrogate is a function
+# of, and the ones entering in log10 (NSB spans decades)
+SURROGATE_FEATURES = ("discriminator_threshold", "trigger_pixels", "NSB", "fadc_bins", "disc_bins")
+LOG_FEATURES = ("NSB",)
+
+LN10 = np.log(10)
+
+def _points_frame(points):
+    """
+    Configurations as a DataFrame, a dictionary of
+    scalars (a single configuration) giving one row.
+    """
+    if isinstance(points, dict):
+        points = {name: np.atleast_1d(values) for name, values in points.items()}
+    return pd.DataFrame(points)
+
+def log_rate_observations(results, rate_column="trigger_rate", default_error=0.05):
+    """
+    log10 of measured rates and their Poisson variance.
+    With trigger counts the rate is (triggers + 0.5)/exposure,
+    so configurations without triggers still constrain the fit.
+
+    Parameters
+    ----------
+    results : pandas.DataFrame
+        one row per configuration, e.g. the output of
+        aggregate_NSB_trigger_rates (triggers, exposure)
+        or any table with rate_column
+    rate_column : str, optional
+        rates [Hz] used without trigger counts,
+        by default "trigger_rate"
+    default_error : float, optional
+        log10 error used without trigger counts, by default 0.05
+
+    Returns
+    -------
+    tuple
+        (log10 rates, variances)
+    """
+    if "triggers" in results and "exposure" in results:
+        counts = results["triggers"].to_numpy(dtype=float) + 0.5
+        return np.log10(counts/results["exposure"].to_numpy(dtype=float)), 1/(counts*LN10**2)
+    log_rate = np.log10(results[rate_column].to_numpy(dtype=float))
+    return log_rate, np.full(len(log_rate), default_error**2)
+
+class RateSurrogate:
+    """
+    Gaussian process regression of log10(trigger rate) over
+    trigger configurations: a linear trend fitted by weighted
+    least squares plus a squared exponential GP with one length
+    scale per parameter, and the Poisson error of every result
+    as noise. Hyperparameters maximise the marginal likelihood.
+
+    Parameters
+    ----------
+    features : tuple, optional
+        configuration columns, by default ("discriminator_threshold",
+        "trigger_pixels", "NSB", "fadc_bins", "disc_bins").
+        Columns constant over the fitted results are ignored.
+    log_features : tuple, optional
+        columns entering in log10, by default ("NSB",)
+    """
+    def __init__(self, features=SURROGATE_FEATURES, log_features=LOG_FEATURES):
+        self.features = tuple(features)
+        self.log_features = tuple(log_features)
+        self.hyperparameters = None
+
+    def _raw_features(self, points):
+        points = _points_frame(points)
+        columns = []
+        for name in self.features:
+            values = np.asarray(_axis_values(points[name]), dtype=float)
+            columns.append(np.log10(values) if name in self.log_features else values)
+        return np.column_stack(columns)
+
+    def _features(self, points):
+        return (self._raw_features(points)[:, self._used] - self._offset)/self._scale
+
+    def _basis(self, X):
+        return np.column_stack([np.ones(len(X)), X])
+
+    def _kernel(self, A, B):
+        lengths = self.hyperparameters["length_scales"]
+        d2 = (((A[:, None, :] - B[None, :, :])/lengths)**2).sum(axis=2)
+        return self.hyperparameters["variance"]*np.exp(-0.5*d2)
+
+    def fit(self, results, max_points=1000, n_restarts=3, seed=None):
+        """
+        Fits the surrogate to finished results.
+
+        Parameters
+        ----------
+        results : pandas.DataFrame
+            see log_rate_observations, with the feature columns
+        max_points : int, optional
+            results used to optimise the hyperparameters (a random
+            subset beyond), by default 1000. The posterior uses all.
+        n_restarts : int, optional
+            extra random starts of the optimisation, by default 3
+        seed : int, optional
+            random seed of the subset and restarts
+
+        Returns
+        -------
+        RateSurrogate
+            self
+        """
+        rng = np.random.default_rng(seed)
+        y, noise = log_rate_observations(results)
+        X = self._raw_features(results)
+        self._used = X.std(axis=0) > 0
+        self._offset = X[:, self._used].mean(axis=0)
+        self._scale = X[:, self._used].std(axis=0)
+        X = self._features(results)
+
+        # Linear trend by weighted least squares
+        H = self._basis(X)
+        w = 1/noise
+        self._beta = np.linalg.lstsq(H*np.sqrt(w)[:, None], y*np.sqrt(w), rcond=None)[0]
+        residual = y - H @ self._beta
+
+        subset = np.arange(len(y))
+        if len(y) > max_points:
+            subset = rng.choice(len(y), max_points, replace=False)
+        n_dims = X.shape[1]
+        scale = max(np.var(residual), 1e-6)
+        bounds = [(np.log(0.05), np.log(20.))]*n_dims + [(np.log(1e-4*scale), np.log(1e2*scale)), (np.log(1e-8), np.log(1.))]
+
+        starts = [np.r_[np.zeros(n_dims), np.log(scale), np.log(1e-4)]]
+        starts += [np.array([rng.uniform(low, high) for low, high in bounds]) for _ in range(n_restarts)]
+        best = min(
+            (minimize(
+                _negative_log_marginal_likelihood, start,
+                args=(X[subset], residual[subset], noise[subset]),
+                jac=True, method="L-BFGS-B", bounds=bounds
+            ) for start in starts),
+            key=lambda result: result.fun
+        )
+
+        self.hyperparameters = {
+            "length_scales": np.exp(best.x[:n_dims]),
+            "variance": np.exp(best.x[n_dims]),
+            "nugget": np.exp(best.x[n_dims+1]),
+        }
+        self._X = X
+        self._noise = noise + self.hyperparameters["nugget"]
+        K = self._kernel(X, X) + np.diag(self._noise)
+        self._cholesky = cho_factor(K, lower=True)
+        self._alpha = cho_solve(self._cholesky, residual)
+        self.n_results = len(y)
+        self.median_exposure = np.median(results["exposure"]) if "exposure" in results else None
+
+        return self
+
+    def predict(self, points, full_covariance=False):
+        """
+        Posterior mean and standard deviation of log10(rate).
+
+        Parameters
+        ----------
+        points : pandas.DataFrame or dict
+            configurations with the feature columns,
+            a dictionary of scalars for a single one
+        full_covariance : bool, optional
+            return the covariance matrix instead of
+            the standard deviation, by default False
+
+        Returns
+        -------
+        tuple
+            (mean, std) or (mean, covariance) in log10(Hz)
+        """
+        X = self._features(points)
+        K_cross = self._kernel(X, self._X)
+        mean = self._basis(X) @ self._beta + K_cross @ self._alpha
+        v = solve_triangular(self._cholesky[0], K_cross.T, lower=True)
+        if full_covariance:
+            return mean, self._kernel(X, X) - v.T @ v
+        variance = self.hyperparameters["variance"] - np.sum(v**2, axis=0)
+        return mean, np.sqrt(np.clip(variance, 0., None))
+
+    def predict_rate(self, points, confidence=0.6827):
+        """
+        Predicted trigger rates with their interval.
+
+        Returns
+        -------
+        pandas.DataFrame
+            points with predicted_rate, predicted_rate_low and
+            predicted_rate_high [Hz] and log10_rate_std
+        """
+        points = _points_frame(points).reset_index(drop=True)
+        mean, std = self.predict(points)
+        z = norm.ppf(0.5 + confidence/2)
+        points["predicted_rate"] = 10**mean
+        points["predicted_rate_low"] = 10**(mean - z*std)
+        points["predicted_rate_high"] = 10**(mean + z*std)
+        points["log10_rate_std"] = std
+        return points
+
+def _negative_log_marginal_likelihood(theta, X, y, noise):
+    """
+    -log p(y | theta) of the GP and its gradient with respect
+    to theta = (log length scales, log variance, log nugget).
+    """
+    n_dims = X.shape[1]
+    lengths = np.exp(theta[:n_dims])
+    variance, nugget = np.exp(theta[n_dims]), np.exp(theta[n_dims+1])
+
+    d2_per_dim = ((X[:, None, :] - X[None, :, :])/lengths)**2
+    K_signal = variance*np.exp(-0.5*d2_per_dim.sum(axis=2))
+    K = K_signal + np.diag(noise + nugget)
+    try:
+        factor = cho_factor(K, lower=True)
+    except np.linalg.LinAlgError:
+        return 1e25, np.zeros_like(theta)
+
+    alpha = cho_solve(factor, y)
+    value = 0.5*y @ alpha + np.log(np.diag(factor[0])).sum() + 0.5*len(y)*np.log(2*np.pi)
+
+    W = np.outer(alpha, alpha) - cho_solve(factor, np.eye(len(y)))
+    gradient = np.empty_like(theta)
+    for d in range(n_dims):
+        gradient[d] = -0.5*np.sum(W*K_signal*d2_per_dim[:, :, d])
+    gradient[n_dims] = -0.5*np.sum(W*K_signal)
+    gradient[n_dims+1] = -0.5*nugget*np.trace(W)
+
+    return value, gradient
+
+def propose_next_points(surrogate,
+                        candidates,
+                        n_points=10,
+                        target_std=0.05,
+                        exposure=None,
+                        target_rate=None,
+                        rate_window=1.0
+                        ):
+    """
+    Greedy batch of the most informative configurations to
+    simulate next: repeatedly the candidate with the largest
+    predictive uncertainty of log10(rate), conditioning the
+    surrogate on a planned run there before choosing the next
+    one, until n_points are chosen or every candidate is
+    known to target_std.
+
+    Parameters
+    ----------
+    surrogate : RateSurrogate
+        fitted surrogate
+    candidates : pandas.DataFrame
+        configurations that could be simulated
+    n_points : int, optional
+        maximum number of proposals, by default 10
+    target_std : float, optional
+        wanted log10(rate) precision, by default 0.05 (~12%)
+    exposure : float, optional
+        exposure [s] of a planned run setting its Poisson error,
+        by default the median exposure of the fitted results
+        (or a 0.05 log10 error without exposures)
+    target_rate : float, optional
+        only consider candidates whose predicted rate [Hz]
+        may lie within rate_window decades of target_rate
+    rate_window : float, optional
+        decades around target_rate, by default 1.0
+
+    Returns
+    -------
+    pandas.DataFrame
+        proposed configurations in order of choice with
+        predicted_rate [Hz] and log10_rate_std before
+        the batch
+    """
+    candidates = pd.DataFrame(candidates).reset_index(drop=True)
+    mean, covariance = surrogate.predict(candidates, full_covariance=True)
+    std = np.sqrt(np.clip(np.diag(covariance), 0., None))
+
+    allowed = np.ones(len(candidates), dtype=bool)
+    if target_rate is not None:
+        allowed = np.abs(mean - np.log10(target_rate)) <= rate_window + 2*std
+
+    if exposure is None:
+        exposure = surrogate.median_exposure
+    if exposure is not None:
+        planned_noise = 1/(np.clip(10**mean*exposure, 1., None)*LN10**2)
+    else:
+        planned_noise = np.full(len(candidates), 0.05**2)
+
+    chosen = []
+    covariance = covariance.copy()
+    for _ in range(n_points):
+        variance = np.where(allowed, np.diag(covariance), -np.inf)
+        j = int(np.argmax(variance))
+        if variance[j] <= target_std**2:
+            break
+        chosen.append(j)
+        allowed[j] = False
+        column = covariance[:, j].copy()
+        covariance -= np.outer(column, column)/(column[j] + planned_noise[j])
+
+    proposals = candidates.iloc[chosen].copy()
+    proposals["predicted_rate"] = 10**mean[chosen]
+    proposals["log10_rate_std"] = std[chosen]
+    return proposals.reset_index(drop=True)
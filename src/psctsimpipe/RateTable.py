@@ -0,0 +1,299 @@
+import bisect
+import itertools
+import math
+import re
+
+import numpy as np
+import pandas as pd
+import h5py
+
+from psctsimpipe.TriggerRateStore import read_store_index
+
+# Axes whose grid is interpolated in log10 (e.g. NSB levels
+# spanning decades). Other numeric axes are interpolated linearly
+# and non-numeric axes (e.g. night_type) must match exactly.
+DEFAULT_LOG_AXES = ("NSB",)
+
+_MHZ_PATTERN = re.compile(r"^\s*([0-9.eE+-]+)\s*MHz\s*$")
+
+def _axis_values(values):
+    """
+    Numeric version of an axis column when possible,
+    "60MHz" style NSB labels becoming 60.
+    """
+    values = pd.Series(values)
+    if values.dtype.kind in "biuf":
+        return values.to_numpy(dtype=float)
+    stripped = values.astype(str).str.replace(_MHZ_PATTERN, r"\1", regex=True)
+    numeric = pd.to_numeric(stripped, errors="coerce")
+    if numeric.notna().all():
+        return numeric.to_numpy(dtype=float)
+    return values.astype(str).to_numpy(dtype=object)
+
+class RateTable:
+    """
+    Trigger rates on a regular N-dimensional grid of
+    configuration parameters, interpolated multilinearly
+    in log10(rate). Missing grid points are NaN and make
+    every query touching them NaN.
+
+    Parameters
+    ----------
+    axes : dict
+        axis name -> grid values, increasing for numeric axes,
+        labels for categorical axes
+    log_rate : numpy.ndarray
+        log10 of the rates [Hz], one dimension per axis in order
+    log_axes : tuple, optional
+        numeric axes interpolated in log10, by default ("NSB",)
+    rate_column : str, optional
+        name of the tabulated quantity, by default "trigger_rate"
+    """
+    def __init__(self, axes, log_rate, log_axes=DEFAULT_LOG_AXES, rate_column="trigger_rate"):
+        self.axes = {name: np.asarray(values) for name, values in axes.items()}
+        self.log_rate = np.ascontiguousarray(log_rate, dtype=float)
+        self.log_axes = tuple(name for name in log_axes if name in self.axes)
+        self.rate_column = rate_column
+
+        if self.log_rate.shape != tuple(len(values) for values in self.axes.values()):
+            raise ValueError("log_rate shape does not match the axes.")
+
+        self._numeric = [name for name, values in self.axes.items() if values.dtype.kind in "biuf"]
+        self._labels = {
+            name: {label: i for i, label in enumerate(values)}
+            for name, values in self.axes.items() if name not in self._numeric
+        }
+        self._grids = {
+            name: np.log10(self.axes[name].astype(float)) if name in self.log_axes
+            else self.axes[name].astype(float)
+            for name in self._numeric
+        }
+        # Axes with a single grid value add no cell corner
+        self._interpolated = [name for name in self._numeric if len(self._grids[name]) > 1]
+        self._corners = list(itertools.product([0, 1], repeat=len(self._interpolated)))
+        # Plain python copies for single point queries
+        self._strides = dict(zip(self.axes, (np.array(self.log_rate.strides)//self.log_rate.itemsize).tolist()))
+        self._flat = self.log_rate.ravel().tolist()
+        self._grid_lists = {name: grid.tolist() for name, grid in self._grids.items()}
+
+    def __repr__(self):
+        shape = ", ".join(f"{name}={len(values)}" for name, values in self.axes.items())
+        return f"RateTable({self.rate_column}: {shape})"
+
+    def evaluate(self, extrapolate=False, **point):
+        """
+        Interpolated rates at one or many points.
+
+        Parameters
+        ----------
+        extrapolate : bool, optional
+            extrapolate linearly in log10(rate) from the edge
+            cells outside the grid, by default False (NaN)
+        **point :
+            value of every axis, scalars or arrays broadcast
+            together. NSB may be given as "60MHz".
+
+        Returns
+        -------
+        tuple
+            (rates [Hz], extrapolated flags), scalars
+            for scalar inputs
+
+        Raises
+        ------
+        KeyError
+            If an axis is missing or a categorical value
+            is not in the table
+        """
+        missing = set(self.axes) - set(point)
+        if missing:
+            raise KeyError(f"Missing axes {sorted(missing)}.")
+        if all(np.ndim(value) == 0 for value in point.values()):
+            return self._evaluate_point(extrapolate, point)
+
+        values = np.broadcast_arrays(*[np.asarray(point[name]) for name in self.axes])
+        shape = values[0].shape
+        values = dict(zip(self.axes, [value.ravel() for value in values]))
+
+        index = {}
+        for name, labels in self._labels.items():
+            try:
+                index[name] = np.array([labels[str(value)] for value in values[name]], dtype=int)
+            except KeyError as error:
+                raise KeyError(f"{error.args[0]} is not a {name} of the table.") from None
+
+        extrapolated = np.zeros(len(values[next(iter(self.axes))]), dtype=bool)
+        lower, fraction = {}, {}
+        for name in self._numeric:
+            x = values[name]
+            x = x.astype(float) if x.dtype.kind in "biuf" else _axis_values(x).astype(float)
+            if name in self.log_axes:
+                x = np.log10(x)
+            grid = self._grids[name]
+            if len(grid) == 1:
+                lower[name] = np.zeros(len(x), dtype=int)
+                fraction[name] = np.zeros(len(x))
+                extrapolated |= ~np.isclose(x, grid[0], rtol=1e-8, atol=1e-8)
+                continue
+            i = np.clip(np.searchsorted(grid, x, side="right") - 1, 0, len(grid) - 2)
+            t = (x - grid[i])/(grid[i+1] - grid[i])
+            extrapolated |= (t < 0) | (t > 1)
+            lower[name], fraction[name] = i, t
+
+        log_rate = np.zeros(len(extrapolated))
+        for corner in self._corners:
+            weight = np.ones(len(extrapolated))
+            steps = dict(zip(self._interpolated, corner))
+            for name, step in steps.items():
+                weight = weight*(fraction[name] if step else 1 - fraction[name])
+            cell = tuple(
+                lower[name] + steps.get(name, 0) if name in lower else index[name]
+                for name in self.axes
+            )
+            # Corners with no weight must not spread NaN or -inf
+            with np.errstate(invalid="ignore"):
+                log_rate += np.where(weight != 0, weight*self.log_rate[cell], 0.)
+
+        rate = 10**log_rate
+        if not extrapolate:
+            rate[extrapolated] = np.nan
+
+        return rate.reshape(shape), extrapolated.reshape(shape)
+
+    def _label_index(self, name, value):
+        try:
+            return self._labels[name][str(value)]
+        except KeyError:
+            raise KeyError(f"{value} is not a {name} of the table.") from None
+
+    def _evaluate_point(self, extrapolate, point):
+        """
+        evaluate for a single point without numpy
+        overheads, a few microseconds per query.
+        """
+        base = sum(self._label_index(name, point[name])*self._strides[name] for name in self._labels)
+        offsets, weights = [base], [1.]
+        extrapolated = False
+        for name in self._numeric:
+            x = point[name]
+            x = float(x) if not isinstance(x, str) else float(_axis_values([x])[0])
+            if name in self.log_axes:
+                x = math.log10(x)
+            grid = self._grid_lists[name]
+            stride = self._strides[name]
+            if len(grid) == 1:
+                extrapolated |= not math.isclose(x, grid[0], rel_tol=1e-8, abs_tol=1e-8)
+                continue
+            i = min(max(bisect.bisect_right(grid, x) - 1, 0), len(grid) - 2)
+            t = (x - grid[i])/(grid[i+1] - grid[i])
+            extrapolated |= t < 0 or t > 1
+            offsets = [o + i*stride for o in offsets] + [o + (i+1)*stride for o in offsets]
+            weights = [w*(1 - t) for w in weights] + [w*t for w in weights]
+
+        log_rate = sum(w*self._flat[o] for o, w in zip(offsets, weights) if w != 0)
+        if extrapolated and not extrapolate:
+            return math.nan, True
+        return 10**float(log_rate), extrapolated
+
+    def __call__(self, extrapolate=False, **point):
+        return self.evaluate(extrapolate, **point)
+
+    def to_hdf5(self, output_file, group="rate_table"):
+        """
+        Writes the table to a group of an HDF5 file,
+        replacing a previous table of the same name.
+        """
+        with h5py.File(output_file, "a") as f:
+            if group in f:
+                del f[group]
+            g = f.create_group(group)
+            g.attrs["axes"] = list(self.axes)
+            g.attrs["log_axes"] = list(self.log_axes)
+            g.attrs["rate_column"] = self.rate_column
+            g.create_dataset("log10_rate", data=self.log_rate)
+            axes = g.create_group("axes")
+            for name, values in self.axes.items():
+                if values.dtype.kind in "biuf":
+                    axes.create_dataset(name, data=values)
+                else:
+                    axes.create_dataset(name, data=values.astype(str).astype(object), dtype=h5py.string_dtype())
+
+def read_rate_table(input_file, group="rate_table"):
+    """
+    Reads a RateTable written by RateTable.to_hdf5.
+    """
+    with h5py.File(input_file, "r") as f:
+        g = f[group]
+        axes = {}
+        for name in g.attrs["axes"]:
+            dataset = g["axes"][name]
+            if h5py.check_string_dtype(dataset.dtype) is not None:
+                axes[name] = dataset.asstr()[:].astype(object)
+            else:
+                axes[name] = dataset[:]
+        return RateTable(axes, g["log10_rate"][:], tuple(g.attrs["log_axes"]), g.attrs["rate_column"])
+
+def build_rate_table(results, axes, rate_column="trigger_rate", log_axes=DEFAULT_LOG_AXES):
+    """
+    Grids finished configurations into a RateTable.
+    Configurations missing from the full grid of axis values
+    are NaN. Zero rates give -inf in log10 and interpolate
+    to zero next to them.
+
+    Parameters
+    ----------
+    results : pandas.DataFrame
+        one row per configuration, e.g. the output of
+        aggregate_NSB_trigger_rates or read_store_index
+    axes : list
+        columns spanning the grid, e.g. ["trigger_pixels",
+        "discriminator_threshold", "NSB"]. Any parameter
+        (zenith, night_type, ...) present in results can be used.
+    rate_column : str, optional
+        column with the rates [Hz], by default "trigger_rate"
+    log_axes : tuple, optional
+        numeric axes interpolated in log10, by default ("NSB",)
+
+    Returns
+    -------
+    RateTable
+
+    Raises
+    ------
+    ValueError
+        If several rows fall on the same grid point
+        (select the other parameters first)
+    """
+    columns = {name: _axis_values(results[name]) for name in axes}
+    grid = {name: np.unique(values) for name, values in columns.items()}
+
+    cells = tuple(np.searchsorted(grid[name], columns[name]) for name in axes)
+    flat = np.ravel_multi_index(cells, tuple(len(values) for values in grid.values()))
+    if len(np.unique(flat)) != len(flat):
+        raise ValueError(f"Several configurations share the same {axes}, select the other parameters first.")
+
+    log_rate = np.full(tuple(len(values) for values in grid.values()), np.nan)
+    with np.errstate(divide="ignore"):
+        log_rate[cells] = np.log10(results[rate_column].to_numpy(dtype=float))
+
+    return RateTable(grid, log_rate, log_axes, rate_column)
+
+def rate_table_from_store(store_file, axes, log_axes=DEFAULT_LOG_AXES, **selection):
+    """
+    RateTable of the total trigger rates of a TriggerRateStore.
+
+    Parameters
+    ----------
+    store_file : string
+        HDF5 store, see append_trigger_rate_tables
+    axes : list
+        store parameters spanning the grid
+    log_axes : tuple, optional
+        numeric axes interpolated in log10, by default ("NSB",)
+    **selection : optional
+        values of the other store parameters
+    """
+    index = read_store_index(store_file)
+    for key, value in selection.items():
+        index = index[index[key] == value]
+    return build_rate_table(index, axes, "total_trigger_rate", log_axes)
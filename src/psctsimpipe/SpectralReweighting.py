@@ -0,0 +1,199 @@
+import numpy as np
+import h5py
+import astropy.units as u
+
+from psctsimpipe.FluxModels import evaluate_flux
+
+# ctapipe DL1 tables
+SHOWER_TABLE = "/simulation/event/subarray/shower"
+RUN_TABLE = "/configuration/simulation/run"
+WEIGHTS_GROUP = "/simulation/event/subarray/weights"
+
+def _to_unit(table, column, values, unit):
+    """
+    Converts a column of a ctapipe (PyTables) table to unit,
+    using the {column}_UNIT attribute ctapipe writes.
+    """
+    stored_unit = table.attrs.get(f"{column}_UNIT")
+    if stored_unit is None:
+        return np.asarray(values, dtype=float)
+    if isinstance(stored_unit, bytes):
+        stored_unit = stored_unit.decode()
+    return u.Quantity(values, stored_unit).to_value(unit)
+
+def read_generation_parameters(dl1_file):
+    """
+    Simulated spectrum and phase space of a ctapipe DL1 file,
+    from its simulation configuration table. All runs must
+    share the same energy range, slope, area and view cone.
+
+    Parameters
+    ----------
+    dl1_file : string
+        ctapipe DL1 .h5 file
+
+    Returns
+    -------
+    dict
+        energy_min, energy_max [TeV], spectral_index (ESLOPE),
+        n_showers (including reuse), area [m^2], solid_angle [sr]
+
+    Raises
+    ------
+    ValueError
+        If runs were simulated with different settings
+    """
+    with h5py.File(dl1_file, "r") as f:
+        table = f[RUN_TABLE]
+        runs = table[:]
+        energy_min = _to_unit(table, "energy_range_min", runs["energy_range_min"], u.TeV)
+        energy_max = _to_unit(table, "energy_range_max", runs["energy_range_max"], u.TeV)
+        scatter = _to_unit(table, "max_scatter_range", runs["max_scatter_range"], u.m)
+        cone_min = _to_unit(table, "min_viewcone_radius", runs["min_viewcone_radius"], u.rad)
+        cone_max = _to_unit(table, "max_viewcone_radius", runs["max_viewcone_radius"], u.rad)
+        index = runs["spectral_index"].astype(float)
+        n_showers = runs["n_showers"].astype(float)*runs["shower_reuse"].astype(float)
+
+    for name, values in [("energy range", np.c_[energy_min, energy_max]), ("spectral index", index),
+                         ("scatter range", scatter), ("view cone", np.c_[cone_min, cone_max])]:
+        if not np.allclose(values, values[0]):
+            raise ValueError(f"Runs of {dl1_file} have different {name}, reweight them separately.")
+
+    return {
+        "energy_min": energy_min[0],
+        "energy_max": energy_max[0],
+        "spectral_index": index[0],
+        "n_showers": n_showers.sum(),
+        "area": np.pi*scatter[0]**2,
+        "solid_angle": 2*np.pi*(np.cos(cone_min[0]) - np.cos(cone_max[0])),
+    }
+
+def simulated_energy_pdf(energy, energy_min, energy_max, spectral_index=-2.0):
+    """
+    Probability density [TeV^-1] of the simulated energies,
+    a E**spectral_index power law between energy_min and energy_max.
+    """
+    energy = np.asarray(energy, dtype=float)
+    if np.isclose(spectral_index, -1.):
+        norm = np.log(energy_max/energy_min)
+    else:
+        norm = (energy_max**(spectral_index+1) - energy_min**(spectral_index+1))/(spectral_index+1)
+    inside = (energy >= energy_min) & (energy <= energy_max)
+    return np.where(inside, energy**spectral_index/norm, 0.)
+
+def event_weights(energy, generation, flux_model="DAMPE_proton"):
+    """
+    Rate weight of each simulated event [Hz]: the rate of
+    the target spectrum represented by the event,
+    flux(E)*area*solid_angle/(n_showers*pdf(E)).
+    Summing the weights of triggered events gives the
+    trigger rate, histogramming them any weighted rate.
+
+    Parameters
+    ----------
+    energy : array like
+        true energies in TeV
+    generation : dict
+        output of read_generation_parameters
+        (or the same keys given by hand)
+    flux_model : str, optional
+        registered flux model of the target spectrum,
+        e.g. "DAMPE_proton" or a registered power law
+
+    Returns
+    -------
+    numpy.ndarray
+        weights in Hz, 0 outside the simulated range
+    """
+    energy = np.asarray(energy, dtype=float)
+    pdf = simulated_energy_pdf(
+        energy, generation["energy_min"], generation["energy_max"], generation["spectral_index"]
+    )
+    flux = evaluate_flux(flux_model, energy)
+    phase_space = generation["area"]*generation["solid_angle"]/generation["n_showers"]
+    return np.divide(flux*phase_space, pdf, out=np.zeros_like(energy), where=pdf > 0)
+
+def iter_dl1_true_energies(dl1_file, chunk_size=1_000_000):
+    """
+    Reads the true energies of a ctapipe DL1 file
+    in chunks, without loading the shower table.
+
+    Yields
+    ------
+    tuple
+        (first row of the chunk, energies in TeV)
+    """
+    with h5py.File(dl1_file, "r") as f:
+        yield from _iter_true_energies(f[SHOWER_TABLE], chunk_size)
+
+def _iter_true_energies(table, chunk_size):
+    for start in range(0, table.shape[0], chunk_size):
+        energy = table.fields("true_energy")[start:start+chunk_size]
+        yield start, _to_unit(table, "true_energy", energy, u.TeV)
+
+def reweight_dl1_file(dl1_file,
+                      flux_model="DAMPE_proton",
+                      generation=None,
+                      output_file=None,
+                      chunk_size=1_000_000
+                      ):
+    """
+    Computes the rate weights of every event of a ctapipe
+    DL1 file out of core and writes them row by row
+    alongside the shower table, in
+    /simulation/event/subarray/weights/<flux_model>.
+
+    Parameters
+    ----------
+    dl1_file : string
+        ctapipe DL1 .h5 file
+    flux_model : str, optional
+        registered flux model of the target spectrum,
+        by default "DAMPE_proton"
+    generation : dict, optional
+        simulated spectrum, by default read_generation_parameters(dl1_file)
+    output_file : string, optional
+        HDF5 file for the weights, by default dl1_file itself
+    chunk_size : int, optional
+        events processed at a time, by default 1000000
+
+    Returns
+    -------
+    float
+        sum of the weights, the trigger rate in Hz
+        of the events stored in the file
+    """
+    if generation is None:
+        generation = read_generation_parameters(dl1_file)
+    in_place = output_file is None or output_file == dl1_file
+
+    total = 0.
+    with h5py.File(dl1_file, "a" if in_place else "r") as f:
+        table = f[SHOWER_TABLE]
+        n_events = table.shape[0]
+
+        out = f if in_place else h5py.File(output_file, "a")
+        try:
+            group = out.require_group(WEIGHTS_GROUP)
+            if flux_model in group:
+                del group[flux_model]
+            weights = group.create_dataset(
+                flux_model,
+                shape=(n_events,),
+                dtype="f8",
+                chunks=(min(max(n_events, 1), 65536),),
+                compression="gzip"
+            )
+            weights.attrs["unit"] = "Hz"
+            for key, value in generation.items():
+                weights.attrs[key] = value
+
+            for start, energy in _iter_true_energies(table, chunk_size):
+                chunk = event_weights(energy, generation, flux_model)
+                weights[start:start+len(chunk)] = chunk
+                total += chunk.sum()
+        finally:
+            if not in_place:
+                out.close()
+
+    return total
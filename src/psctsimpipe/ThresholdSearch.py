@@ -0,0 +1,424 @@
+import glob
+import os
+import re
+import time
+
+import numpy as np
+import pandas as pd
+
+from psctsimpipe.CalculateTriggerRate import _NSB_log_counts, poisson_rate_interval
+from psctsimpipe.CheckSimTelArrayLogs import SIMTEL_FAILURE_PHRASES, SIMTEL_FINISHED_PHRASE
+from psctsimpipe.ClassifyFailedRuns import FAILURE_RULES, classify_failure
+from psctsimpipe.Helpers import read_file_tail
+from psctsimpipe.pSCTTriggerRate import trigger_rate_command
+from psctsimpipe.SLURMScriptGen import create_slurm_script, submit_job
+
+def submit_threshold_runs(corsika_files,
+                          sim_telarray_cfg,
+                          output_dir,
+                          discriminator_threshold,
+                          trigger_options=None,
+                          slurm_options=None
+                          ):
+    """
+    Submits one trigger rate run per CORSIKA dummy file
+    at a given discriminator threshold, as
+    submit-all-simtelarray-trigger-rate-SLURM-run does.
+
+    Parameters
+    ----------
+    corsika_files : list
+        CORSIKA dummy files (DATDummy<n>.seed<seed>.telescope.tar.gz)
+    sim_telarray_cfg : string
+        path to sim_telarray config file
+    output_dir : string
+        directory for logs and SLURM scripts
+    discriminator_threshold : float
+        trigger threshold
+    trigger_options : dict, optional
+        other keyword arguments of trigger_rate_command
+        (trigger_pixels, fadc_bins, night_type, NSB, ...)
+    slurm_options : dict, optional
+        keyword arguments of create_slurm_script
+        (email, mem, t_exp, partition, ...)
+
+    Returns
+    -------
+    dict
+        paths of the logs the runs will write as keys, and
+        glob patterns of the SLURM .error file of each run
+        as values
+    """
+    trigger_options = dict(trigger_options or {})
+    trigger_pixels = trigger_options.pop("trigger_pixels", 3)
+    slurm_options = dict(slurm_options or {})
+    # SLURM writes why it killed a job (walltime, memory) to the .error file
+    slurm_options.setdefault("suprres_stdout_error", False)
+
+    log_files = {}
+    for corsika_f in corsika_files:
+        command = trigger_rate_command(
+            corsika_f,
+            sim_telarray_cfg,
+            output_dir,
+            trigger_pixels,
+            discriminator_threshold,
+            **trigger_options
+        )
+        # The log path is the redirection target of the command
+        log_file = command.rsplit("> ", 1)[1].split()[0]
+
+        match = re.search(r'\.seed(\d+)\.', os.path.basename(corsika_f))
+        seed_num = match.group(1) if match else len(log_files)
+        job_name = f"seed{seed_num}_triggthresh{discriminator_threshold}pe_pixmult{trigger_pixels}"
+        # create_slurm_script names it %x_%j.error, the job id is not known here
+        log_files[log_file] = os.path.join(output_dir, f"{job_name}_*.error")
+
+        script_path = create_slurm_script(
+            job_name,
+            command,
+            'sim_telarray',
+            None,
+            output_dir=output_dir,
+            **slurm_options
+        )
+        submit_job(script_path)
+
+    print(f"{len(log_files)} jobs submitted at discriminator_threshold={discriminator_threshold}")
+
+    return log_files
+
+def _failed_in_error_file(error_file):
+    """
+    Whether the standard error of a run shows it was killed
+    (by SLURM or by a crash), see FAILURE_RULES.
+    """
+    tail = read_file_tail(error_file, 4096)
+    return (
+        any(phrase in tail for phrase in SIMTEL_FAILURE_PHRASES)
+        or any(pattern.search(tail) for _, _, pattern in FAILURE_RULES)
+    )
+
+def wait_for_logs(log_files, poll_interval=60., timeout=None, stall_time=1800., error_files=None):
+    """
+    Blocks until every log finished or failed.
+
+    A run counts as failed when its log or its .error file
+    shows a failure (SLURM kills only write to the .error
+    file), or when its log stopped growing for stall_time
+    seconds. Logs that do not exist yet belong to jobs
+    still queued and are never considered stalled.
+
+    Parameters
+    ----------
+    log_files : iterable
+        logs written by the submitted runs
+    poll_interval : float, optional
+        seconds between checks, by default 60
+    timeout : float, optional
+        give up after this many seconds, by default never
+    stall_time : float, optional
+        seconds without growth after which a started run
+        is considered failed, by default 1800. None 
+        disables the check.
+    error_files : dict, optional
+        .error file (or glob pattern) of each log, as returned 
+        by submit_threshold_runs, by default the .error file
+        next to each log
+
+    Returns
+    -------
+    tuple
+        (list, dict) finished logs, and failed logs with their 
+        failure category (see ClassifyFailedRuns, "stalled" for 
+        runs that stopped writing)
+
+    Raises
+    ------
+    TimeoutError
+        If some logs are still running after timeout
+    """
+    if error_files is None:
+        error_files = {}
+
+    start = time.time()
+    pending = set(log_files)
+    sizes = {}
+    last_growth = {}
+    finished, failed = [], {}
+
+    while True:
+        now = time.time()
+        for log_file in sorted(pending):
+            error_pattern = error_files.get(log_file, os.path.splitext(log_file)[0] + ".error")
+            # A resubmitted job leaves several .error files, the newest one counts
+            error_file = max(glob.glob(error_pattern), key=os.path.getmtime, default=error_pattern)
+
+            tail = read_file_tail(log_file, 4096)
+            if SIMTEL_FINISHED_PHRASE in tail:
+                finished.append(log_file)
+                pending.discard(log_file)
+                continue
+            if any(phrase in tail for phrase in SIMTEL_FAILURE_PHRASES) or _failed_in_error_file(error_file):
+                failed[log_file] = classify_failure(log_file, error_file, 4096)
+                pending.discard(log_file)
+                continue
+
+            try:
+                size = os.path.getsize(log_file)
+            except OSError:
+                continue
+            if sizes.get(log_file) != size:
+                sizes[log_file] = size
+                last_growth[log_file] = now
+            elif stall_time is not None and now - last_growth[log_file] > stall_time:
+                failed[log_file] = "stalled"
+                pending.discard(log_file)
+
+        if not pending:
+            return finished, failed
+        if timeout is not None and now - start > timeout:
+            raise TimeoutError(f"{len(pending)} runs still not finished after {timeout} s.")
+        time.sleep(poll_interval)
+
+def measure_threshold(log_files, n_events=None, ns_per_bin=1.0, window_bins="fadc_bins"):
+    """
+    Pooled NSB trigger count and exposure of the
+    logs of one threshold.
+
+    Parameters
+    ----------
+    log_files : list
+        finished trigger rate logs
+    n_events, ns_per_bin, window_bins : optional
+        see aggregate_NSB_trigger_rates
+
+    Returns
+    -------
+    tuple
+        (triggers, exposure [s])
+    """
+    triggers = 0
+    exposure = 0.
+    for log_file in log_files:
+        row = _NSB_log_counts(log_file, n_events)
+        if row is None or np.isnan(row["n_events"]):
+            print(f"[!] {os.path.basename(log_file)} - skipped, number of events unknown.")
+            continue
+        triggers += row["triggers"]
+        exposure += row["n_events"]*row[window_bins]*ns_per_bin*1e-9 # Converting from ns to second
+
+    return triggers, exposure
+
+def propose_next_threshold(measurements,
+                           target_rate,
+                           tolerance=0.05,
+                           threshold_tolerance=0.05,
+                           confidence=0.6827,
+                           min_triggers=10
+                           ):
+    """
+    Next threshold of the search, from secant steps on
+    log(rate) - log(target_rate). Once the target is bracketed,
+    secant steps are kept away from the bracket edges and fall
+    back to bisection, so the bracket always shrinks.
+
+    The search stops when
+      - a measured rate is within tolerance of the target, or
+      - the target lies inside the Poisson interval of a
+        rate measured with at least min_triggers triggers
+        (more thresholds cannot do better, only more
+        statistics can), or
+      - the bracket is narrower than threshold_tolerance.
+
+    Parameters
+    ----------
+    measurements : pandas.DataFrame
+        discriminator_threshold, triggers and exposure [s]
+    target_rate : float
+        NSB trigger rate wanted [Hz]
+    tolerance : float, optional
+        relative tolerance on the rate, by default 0.05
+    threshold_tolerance : float, optional
+        smallest threshold bracket worth splitting, by default 0.05
+    confidence : float, optional
+        confidence level of the Poisson interval, by default 0.6827
+    min_triggers : int, optional
+        triggers needed for the interval stopping rule, by default 10
+
+    Returns
+    -------
+    dict
+        threshold (next to simulate, or best estimate when
+        converged), converged flag and reason
+    """
+    data = measurements.sort_values("discriminator_threshold")
+    threshold = data["discriminator_threshold"].to_numpy(dtype=float)
+    triggers = data["triggers"].to_numpy(dtype=float)
+    exposure = data["exposure"].to_numpy(dtype=float)
+
+    rate = triggers/exposure
+    low, high = poisson_rate_interval(triggers, exposure, confidence)
+    # Half a count keeps thresholds without triggers usable in log space
+    log_ratio = np.log(np.maximum(triggers, 0.5)/exposure) - np.log(target_rate)
+
+    close = np.abs(rate/target_rate - 1) <= tolerance
+    compatible = (low <= target_rate) & (target_rate <= high) & (triggers >= min_triggers)
+    for flags, reason in [(close, "within tolerance"), (compatible, "within statistical uncertainty")]:
+        if flags.any():
+            best = np.argmin(np.abs(log_ratio) + np.where(flags, 0, np.inf))
+            return {"threshold": threshold[best], "converged": True, "reason": reason}
+
+    # The rate falls with the threshold: above target on the left of the bracket.
+    # Thresholds without any trigger count as below target.
+    is_below = (log_ratio < 0) | (triggers == 0)
+    above = np.nonzero(~is_below)[0]
+    below = np.nonzero(is_below)[0]
+
+    if len(above) and len(below) and threshold[above[-1]] < threshold[below[0]]:
+        a, b = above[-1], below[0]
+        width = threshold[b] - threshold[a]
+        secant = threshold[a] + width/2
+        if log_ratio[b] < 0:
+            secant = threshold[a] + log_ratio[a]/(log_ratio[a] - log_ratio[b])*width
+        if width <= threshold_tolerance:
+            return {"threshold": secant, "converged": True, "reason": "bracket below threshold_tolerance"}
+        if not threshold[a] + 0.1*width <= secant <= threshold[b] - 0.1*width:
+            secant = threshold[a] + width/2
+        return {"threshold": secant, "converged": False, "reason": "bracketed"}
+
+    if len(threshold) < 2:
+        raise ValueError("At least two measured thresholds are needed to start the search.")
+
+    # Not bracketed yet: extrapolate from the two measured rates closest to the target,
+    # stepping by at least a tenth and at most twice the span already covered
+    direction = 1 if len(above) else -1
+    edge = threshold[-1] if direction > 0 else threshold[0]
+    span = threshold[-1] - threshold[0]
+    step = direction*span
+
+    counted = np.nonzero(triggers > 0)[0]
+    if len(counted) >= 2:
+        i, j = np.sort(counted[np.argsort(np.abs(log_ratio[counted]))[:2]])
+        slope = (log_ratio[j] - log_ratio[i])/(threshold[j] - threshold[i])
+        if slope < 0:
+            step = threshold[i] - log_ratio[i]/slope - edge
+            step = direction*min(max(direction*step, 0.1*span), 2*span)
+
+    return {"threshold": edge + step, "converged": False, "reason": "extrapolated"}
+
+def adaptive_threshold_search(corsika_files,
+                              sim_telarray_cfg,
+                              output_dir,
+                              target_rate,
+                              threshold_low,
+                              threshold_high,
+                              trigger_options=None,
+                              slurm_options=None,
+                              n_events=None,
+                              ns_per_bin=1.0,
+                              window_bins="fadc_bins",
+                              tolerance=0.05,
+                              threshold_tolerance=0.05,
+                              confidence=0.6827,
+                              max_iterations=10,
+                              decimals=3,
+                              poll_interval=60.,
+                              timeout=None,
+                              stall_time=1800.
+                              ):
+    """
+    Finds the discriminator threshold giving a target
+    NSB trigger rate, submitting trigger rate runs only at
+    the thresholds the search needs (see propose_next_threshold).
+
+    Parameters
+    ----------
+    corsika_files : list
+        CORSIKA dummy files, one run per file and threshold
+    sim_telarray_cfg : string
+        path to sim_telarray config file
+    output_dir : string
+        directory for logs and SLURM scripts
+    target_rate : float
+        NSB trigger rate wanted [Hz]
+    threshold_low : float
+        first threshold simulated, ideally above target_rate
+    threshold_high : float
+        second threshold simulated, ideally below target_rate
+    trigger_options : dict, optional
+        other keyword arguments of trigger_rate_command
+    slurm_options : dict, optional
+        keyword arguments of create_slurm_script
+    n_events, ns_per_bin, window_bins : optional
+        see aggregate_NSB_trigger_rates
+    tolerance, threshold_tolerance, confidence : optional
+        stopping rules, see propose_next_threshold
+    max_iterations : int, optional
+        maximum number of thresholds simulated after
+        the first two, by default 10
+    decimals : int, optional
+        proposed thresholds are rounded to this many
+        decimals, by default 3
+    poll_interval : float, optional
+        seconds between log checks, by default 60
+    timeout : float, optional
+        maximum wait per threshold in seconds, by default never
+    stall_time : float, optional
+        seconds without log growth after which a run is 
+        considered failed, by default 1800
+
+    Returns
+    -------
+    tuple
+        (dict, pandas.DataFrame)
+        final proposal of propose_next_threshold and every
+        threshold measured with its rate and interval [Hz]
+    """
+    rows = []
+
+    def measure(thresholds):
+        submitted = {
+            threshold: submit_threshold_runs(
+                corsika_files, sim_telarray_cfg, output_dir,
+                threshold, trigger_options, slurm_options
+            )
+            for threshold in thresholds
+        }
+        for threshold, log_files in submitted.items():
+            finished, failed = wait_for_logs(log_files, poll_interval, timeout, stall_time, log_files)
+            if failed:
+                categories = ", ".join(sorted(set(failed.values())))
+                print(f"Warning: {len(failed)} runs failed at discriminator_threshold={threshold} ({categories})")
+            triggers, exposure = measure_threshold(finished, n_events, ns_per_bin, window_bins)
+            rows.append({"discriminator_threshold": threshold, "triggers": triggers, "exposure": exposure})
+
+    measure([round(threshold_low, decimals), round(threshold_high, decimals)])
+
+    for iteration in range(max_iterations + 1):
+        measurements = pd.DataFrame(rows)
+        proposal = propose_next_threshold(
+            measurements[measurements["exposure"] > 0],
+            target_rate, tolerance, threshold_tolerance, confidence
+        )
+        print(f"Iteration {iteration}: {proposal['reason']}, threshold {proposal['threshold']:.{decimals}f}")
+
+        next_threshold = round(proposal["threshold"], decimals)
+        if proposal["converged"] or iteration == max_iterations:
+            break
+        if next_threshold in set(measurements["discriminator_threshold"]):
+            proposal["converged"] = True
+            proposal["reason"] = "threshold already simulated at this precision"
+            break
+        measure([next_threshold])
+
+    measurements = pd.DataFrame(rows).sort_values("discriminator_threshold").reset_index(drop=True)
+    measurements["trigger_rate"] = measurements["triggers"]/measurements["exposure"]
+    measurements["trigger_rate_low"], measurements["trigger_rate_high"] = poisson_rate_interval(
+        measurements["triggers"], measurements["exposure"], confidence
+    )
+
+    if not proposal["converged"]:
+        print(f"Warning: not converged after {max_iterations} iterations.")
+
+    return proposal, measurements
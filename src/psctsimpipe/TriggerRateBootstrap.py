@@ -0,0 +1,238 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from psctsimpipe.CalculateTriggerRate import (
+    cone_solid_angle,
+    proton_trigger_rate_arrays,
+    read_histo_output
+)
+from psctsimpipe.FluxModels import get_flux_model
+
+# Flux table errors propagated by default.
+# Statistical errors are independent between measured points,
+# analysis and hadronic model errors are systematic shifts of
+# the whole spectrum.
+FLUX_ERROR_COLUMNS = ("F_err_stat", "F_err_ana", "F_err_had")
+CORRELATED_FLUX_ERRORS = ("F_err_ana", "F_err_had")
+FLUX_VALUE_COLUMN = "F_invGeV_invsqmeter_inversec_invsr"
+
+def flux_relative_errors(flux_model="DAMPE_proton", flux_errors=FLUX_ERROR_COLUMNS):
+    """
+    Relative errors of the measured points of a tabulated
+    flux model.
+
+    Parameters
+    ----------
+    flux_model : str, optional
+        registered flux model name, by default "DAMPE_proton"
+    flux_errors : tuple, optional
+        error columns of the flux table, by default
+        ("F_err_stat", "F_err_ana", "F_err_had")
+
+    Returns
+    -------
+    tuple
+        (log10 of the measured energies in TeV, dict of relative
+        errors per column). Empty if the model has no table
+        with errors.
+    """
+    table = get_flux_model(flux_model).table
+    if table is None or FLUX_VALUE_COLUMN not in table:
+        return np.array([]), {}
+    flux_errors = [column for column in flux_errors if column in table]
+    if not flux_errors:
+        return np.array([]), {}
+
+    log_energy = np.log10(table["E"].to_numpy()/1000.) # GeV to TeV
+    flux = table[FLUX_VALUE_COLUMN].to_numpy()
+    relative = {column: table[column].to_numpy()/flux for column in flux_errors}
+
+    return log_energy, relative
+
+def _flux_scale_replicas(rng, logE, n_replicas, flux_model, flux_errors):
+    """
+    (n_replicas, n_bins) multiplicative flux fluctuations.
+    Independent errors get one normal draw per measured point,
+    correlated ones a single draw per replica. Draws are
+    interpolated in log10(E) onto the energy bins.
+    """
+    table_logE, relative = flux_relative_errors(flux_model, flux_errors)
+    scale = np.ones((n_replicas, len(logE)))
+    if not relative:
+        return scale
+
+    for column, rel_error in relative.items():
+        if column in CORRELATED_FLUX_ERRORS:
+            draws = rng.standard_normal((n_replicas, 1))*rel_error
+        else:
+            draws = rng.standard_normal((n_replicas, len(rel_error)))*rel_error
+        # Linear interpolation of every replica at once, constant outside the table
+        position = np.interp(logE, table_logE, np.arange(len(table_logE)))
+        lower = np.floor(position).astype(int)
+        upper = np.minimum(lower + 1, len(table_logE) - 1)
+        weight = position - lower
+        draws = np.broadcast_to(draws, (n_replicas, len(rel_error)))
+        scale += draws[:, lower]*(1 - weight) + draws[:, upper]*weight
+
+    return np.clip(scale, 0., None)
+
+def bootstrap_proton_trigger_rate(logE,
+                                  N_trigg,
+                                  N_total,
+                                  area=np.pi*(833)**2,
+                                  solid_angle=cone_solid_angle(10),
+                                  deltaE=None,
+                                  flux_model="DAMPE_proton",
+                                  n_replicas=2000,
+                                  flux_errors=FLUX_ERROR_COLUMNS,
+                                  confidence=0.6827,
+                                  seed=None,
+                                  return_replicas=False,
+                                  logE_low=None,
+                                  logE_high=None
+                                  ):
+    """
+    Bootstrap uncertainty of the total proton trigger rate.
+    Every replica resamples the triggered events of each
+    energy bin, N_trigg ~ Binomial(N_total, N_trigg/N_total),
+    and fluctuates the flux within the flux table errors.
+    All replicas are computed in one batched numpy pass.
+
+    Parameters
+    ----------
+    logE : array like
+        log10 of the energy bin centers in TeV
+    N_trigg : array like
+        triggered events per energy bin
+    N_total : array like
+        simulated events per energy bin
+    area, solid_angle, deltaE, flux_model : optional
+        see proton_trigger_rate_arrays
+    n_replicas : int, optional
+        number of bootstrap replicas, by default 2000
+    flux_errors : tuple, optional
+        flux table error columns to propagate, by default
+        ("F_err_stat", "F_err_ana", "F_err_had"). Empty to
+        only propagate the simulation statistics.
+    confidence : float, optional
+        central interval of the replicas, by default 0.6827
+    seed : int or numpy.random.SeedSequence, optional
+        random seed
+    return_replicas : bool, optional
+        also return the total rate of every replica, by default False
+    logE_low, logE_high : array like, optional
+        log10 bin edges, see proton_trigger_rate_arrays
+
+    Returns
+    -------
+    dict
+        trigger_rate (nominal), trigger_rate_std,
+        trigger_rate_low and trigger_rate_high [Hz]
+        (and replicas if return_replicas)
+    """
+    rng = np.random.default_rng(seed)
+    logE = np.asarray(logE, dtype=float)
+    N_trigg = np.asarray(N_trigg, dtype=float)
+    N_total = np.asarray(N_total, dtype=float)
+
+    filled = N_total > 0
+    N_frac = np.divide(N_trigg, N_total, out=np.zeros_like(N_trigg), where=filled)
+    nominal = proton_trigger_rate_arrays(
+        logE, N_frac, area, solid_angle, deltaE, flux_model, logE_low, logE_high
+    )
+
+    n_total = N_total.astype(np.int64)
+    trigg_replicas = rng.binomial(n_total, np.clip(N_frac, 0., 1.), size=(n_replicas, len(logE)))
+    frac_replicas = np.divide(trigg_replicas, n_total, out=np.zeros(trigg_replicas.shape), where=filled)
+
+    flux_scale = _flux_scale_replicas(rng, logE, n_replicas, flux_model, flux_errors)
+
+    # Rate per bin is linear in N_frac and flux
+    rate_per_unit_frac = area*solid_angle*nominal["integral_flux"]
+    replicas = np.sum(frac_replicas*flux_scale*rate_per_unit_frac, axis=1)
+
+    alpha = 1 - confidence
+    low, high = np.quantile(replicas, [alpha/2, 1 - alpha/2])
+    result = {
+        "trigger_rate": np.sum(nominal["trigger_rate"]),
+        "trigger_rate_std": np.std(replicas, ddof=1),
+        "trigger_rate_low": low,
+        "trigger_rate_high": high,
+    }
+    if return_replicas:
+        result["replicas"] = replicas
+
+    return result
+
+def _bootstrap_file(args):
+    """
+    Worker: bootstrap of one histogram export.
+    """
+    input_file, seed, kwargs = args
+    data = read_histo_output(input_file)
+    result = bootstrap_proton_trigger_rate(
+        data["LogE"], data["N_trigg"], data["N_total"], seed=seed,
+        logE_low=data.get("LogE_low"), logE_high=data.get("LogE_high"), **kwargs
+    )
+    result["input_file"] = input_file
+    return result
+
+def bootstrap_proton_trigger_rates(input_files,
+                                   area=np.pi*(833)**2,
+                                   solid_angle=cone_solid_angle(10),
+                                   deltaE=None,
+                                   flux_model="DAMPE_proton",
+                                   n_replicas=2000,
+                                   flux_errors=FLUX_ERROR_COLUMNS,
+                                   confidence=0.6827,
+                                   seed=None,
+                                   n_workers=None
+                                   ):
+    """
+    bootstrap_proton_trigger_rate for many configurations,
+    one histogram export per configuration, in parallel.
+    Each configuration gets an independent random stream
+    derived from seed, so results are reproducible whatever
+    the number of workers.
+
+    Parameters
+    ----------
+    input_files : list
+        outputs of division of histogram 1007/1006 y projection
+        or .hdata.gz files
+    n_workers : int, optional
+        number of processes, by default os.cpu_count()
+
+    See bootstrap_proton_trigger_rate for the other parameters.
+
+    Returns
+    -------
+    pandas.DataFrame
+        input_file, trigger_rate, trigger_rate_std,
+        trigger_rate_low and trigger_rate_high [Hz]
+    """
+    input_files = list(input_files)
+    seeds = np.random.SeedSequence(seed).spawn(len(input_files))
+    kwargs = {
+        "area": area,
+        "solid_angle": solid_angle,
+        "deltaE": deltaE,
+        "flux_model": flux_model,
+        "n_replicas": n_replicas,
+        "flux_errors": flux_errors,
+        "confidence": confidence,
+    }
+
+    n_workers = n_workers or os.cpu_count() or 1
+    with ProcessPoolExecutor(max_workers=n_workers) as executor:
+        results = list(executor.map(
+            _bootstrap_file,
+            [(input_file, file_seed, kwargs) for input_file, file_seed in zip(input_files, seeds)],
+            chunksize=max(1, len(input_files)//(4*n_workers))
+        ))
+
+    columns = ["input_file", "trigger_rate", "trigger_rate_std", "trigger_rate_low", "trigger_rate_high"]
+    return pd.DataFrame(results, columns=columns)
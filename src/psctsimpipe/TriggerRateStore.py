@@ -0,0 +1,258 @@
+import numpy as np
+import pandas as pd
+import h5py
+
+from psctsimpipe.CalculateTriggerRate import (
+    _proton_trigger_rate_table,
+    cone_solid_angle,
+    read_histo_output
+)
+from psctsimpipe.Helpers import read_hdf5_column
+
+# A store is a single HDF5 file with two groups:
+#   rows/   one resizable, chunked, gzip compressed dataset per column,
+#           the per-bin rows of every configuration one after the other
+#   index/  one row per configuration: its parameters, the total
+#           trigger rate and the [start, stop) range of its rows
+STORE_CHUNK_ROWS = 4096
+
+def _dataset_dtype(values):
+    values = np.asarray(values)
+    if values.dtype.kind in "OUS":
+        return h5py.string_dtype()
+    return values.dtype
+
+def _append_column(group, name, values):
+    """
+    Appends values to a resizable dataset,
+    creating it on first use.
+    """
+    values = np.asarray(values)
+    if values.dtype.kind in "OU":
+        values = values.astype(str).astype(object)
+
+    if name not in group:
+        group.create_dataset(
+            name,
+            shape=(0,),
+            maxshape=(None,),
+            dtype=_dataset_dtype(values),
+            chunks=(STORE_CHUNK_ROWS,),
+            compression="gzip",
+            shuffle=True
+        )
+
+    dataset = group[name]
+    start = dataset.shape[0]
+    dataset.resize((start + len(values),))
+    dataset[start:] = values
+
+def append_trigger_rate_tables(store_file, configurations):
+    """
+    Appends the rate tables of many configurations
+    to a store, opening it once.
+
+    Parameters
+    ----------
+    store_file : string
+        HDF5 store, created if it does not exist
+    configurations : iterable
+        (params, table) tuples. params is a dictionary of
+        scalar parameters identifying the configuration
+        (e.g. trigger_pixels, discriminator_threshold, night_type),
+        the same keys for every configuration of a store. table is
+        a pandas.DataFrame with one row per energy bin and the
+        same columns for every configuration, e.g. the output
+        of proton_trigger_rate_pdtable.
+
+    Raises
+    ------
+    ValueError
+        If a configuration is already in the store, or its
+        parameters or columns differ from the stored ones.
+    """
+    with h5py.File(store_file, "a") as f:
+        rows = f.require_group("rows")
+        index = f.require_group("index")
+
+        param_names = list(index.attrs.get("params", []))
+        columns = list(rows.attrs.get("columns", []))
+        known = set()
+        if param_names:
+            stored = pd.DataFrame({name: read_hdf5_column(index[name]) for name in param_names})
+            known = set(stored.itertuples(index=False, name=None))
+
+        for params, table in configurations:
+            if not param_names:
+                param_names = list(params)
+                index.attrs["params"] = param_names
+            if not columns:
+                columns = list(table.columns)
+                rows.attrs["columns"] = columns
+
+            if sorted(params) != sorted(param_names):
+                raise ValueError(f"Parameters {sorted(params)} differ from the store parameters {param_names}.")
+            if list(table.columns) != columns:
+                raise ValueError(f"Columns {list(table.columns)} differ from the store columns {columns}.")
+
+            key = tuple(params[name] for name in param_names)
+            if key in known:
+                raise ValueError(f"Configuration {params} is already in {store_file}.")
+            known.add(key)
+
+            start = rows[columns[0]].shape[0] if columns[0] in rows else 0
+            for column in columns:
+                _append_column(rows, column, table[column].to_numpy())
+
+            for name in param_names:
+                _append_column(index, name, [params[name]])
+            _append_column(index, "start", [start])
+            _append_column(index, "stop", [start + len(table)])
+            total = table["trigger_rate"].sum() if "trigger_rate" in table else np.nan
+            _append_column(index, "total_trigger_rate", [total])
+
+def append_trigger_rate_table(store_file, params, table):
+    """
+    Appends the rate table of one configuration to a store.
+    See append_trigger_rate_tables.
+    """
+    append_trigger_rate_tables(store_file, [(params, table)])
+
+def append_proton_trigger_rate(store_file,
+                               params,
+                               input_file,
+                               area=np.pi*(833)**2,
+                               solid_angle=cone_solid_angle(10)
+                               ):
+    """
+    Computes the proton trigger rate table of a histogram
+    export (see proton_trigger_rate_pdtable) and appends it
+    to a store under params.
+
+    Parameters
+    ----------
+    store_file : string
+        HDF5 store, created if it does not exist
+    params : dict
+        parameters identifying the configuration
+    input_file : string
+        Output of division of histogram 1007/1006
+        y projection, or .hdata.gz file
+    area : float, optional
+        area over which events were generated, by default np.pi*(833)**2
+    solid_angle : float, optional
+        solid angle over which events were generated, by default cone_solid_angle(10)
+    """
+    table = _proton_trigger_rate_table(read_histo_output(input_file), area, solid_angle)
+    append_trigger_rate_table(store_file, params, table)
+
+def read_store_index(store_file):
+    """
+    Index of a store.
+
+    Returns
+    -------
+    pandas.DataFrame
+        one row per configuration with its parameters,
+        total_trigger_rate and the start, stop row range
+    """
+    with h5py.File(store_file, "r") as f:
+        return _read_index(f)
+
+def _read_index(f):
+    index = f["index"]
+    names = list(index.attrs["params"]) + ["start", "stop", "total_trigger_rate"]
+    return pd.DataFrame({name: read_hdf5_column(index[name]) for name in names})
+
+def _select(index, selection):
+    mask = np.ones(len(index), dtype=bool)
+    for key, value in selection.items():
+        if key not in index:
+            raise KeyError(f"{key} is not a parameter of the store.")
+        mask &= (index[key] == value).to_numpy()
+    return index[mask]
+
+def read_trigger_rates(store_file, **selection):
+    """
+    Reads the per-bin rows of many configurations.
+    Without a selection the whole study is loaded with
+    one read per column.
+
+    Parameters
+    ----------
+    store_file : string
+        HDF5 store
+    **selection : optional
+        parameter values to match (e.g. trigger_pixels=3)
+
+    Returns
+    -------
+    pandas.DataFrame
+        configuration parameters followed by
+        the stored columns, one row per energy bin
+    """
+    with h5py.File(store_file, "r") as f:
+        index = _select(_read_index(f), selection)
+        rows = f["rows"]
+        columns = list(rows.attrs["columns"])
+        param_names = list(f["index"].attrs["params"])
+
+        if len(index) and len(selection) == 0:
+            data = {column: read_hdf5_column(rows[column]) for column in columns}
+            starts = index["start"].to_numpy()
+            stops = index["stop"].to_numpy()
+            positions = np.concatenate([np.arange(a, b) for a, b in zip(starts, stops)])
+            data = {column: values[positions] for column, values in data.items()}
+        else:
+            # Configurations are contiguous row ranges
+            data = {
+                column: np.concatenate(
+                    [read_hdf5_column(rows[column], a, b) for a, b in zip(index["start"], index["stop"])]
+                    or [np.array([])]
+                )
+                for column in columns
+            }
+
+    lengths = (index["stop"] - index["start"]).to_numpy()
+    table = pd.DataFrame({name: np.repeat(index[name].to_numpy(), lengths) for name in param_names})
+    for column in columns:
+        table[column] = data[column]
+
+    return table
+
+def lookup_trigger_rate(store_file, **params):
+    """
+    Per-bin table of one configuration.
+
+    Parameters
+    ----------
+    store_file : string
+        HDF5 store
+    **params :
+        values of all the store parameters
+
+    Returns
+    -------
+    pandas.DataFrame
+
+    Raises
+    ------
+    KeyError
+        If the configuration is not in the store
+    ValueError
+        If params match several configurations
+        (some store parameters are missing)
+    """
+    with h5py.File(store_file, "r") as f:
+        index = _select(_read_index(f), params)
+        if len(index) == 0:
+            raise KeyError(f"Configuration {params} not found in {store_file}.")
+        if len(index) > 1:
+            matches = index[list(f["index"].attrs["params"])].to_dict("records")
+            raise ValueError(f"Configuration {params} matches {len(index)} configurations of {store_file}: {matches}")
+        start, stop = int(index["start"].iloc[0]), int(index["stop"].iloc[0])
+        rows = f["rows"]
+        return pd.DataFrame({
+            column: read_hdf5_column(rows[column], start, stop)
+            for column in rows.attrs["columns"]
+        })
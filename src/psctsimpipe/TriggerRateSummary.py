@@ -0,0 +1,205 @@
+import numpy as np
+import pandas as pd
+import h5py
+
+from psctsimpipe.CalculateTriggerRate import (
+    cone_solid_angle,
+    proton_trigger_rate_arrays,
+    stack_histo_outputs
+)
+from psctsimpipe.Helpers import write_hdf5_table
+
+# Units of the columns of summarize_proton_trigger_rates
+SUMMARY_UNITS = {
+    "trigger_rate": "Hz",
+    "peak_differential_rate": "Hz",
+    "energy_threshold": "TeV",
+    "energy_threshold_low": "TeV",
+    "energy_threshold_high": "TeV",
+    "Aeff_max": "m2 sr",
+    "energy_Aeff_half_max": "TeV",
+}
+
+def _half_max_crossings(logE, values, peak):
+    """
+    log10(E) where values rise above and fall below half
+    of their value at peak, interpolated linearly between
+    bins, for every row at once. NaN if a side never
+    goes below half the peak.
+    """
+    rows = np.arange(len(values))
+    half = values[rows, peak]/2
+    above = values >= half[:, None]
+    bins = np.arange(values.shape[1])
+
+    # Last bin below half max left of the peak, first one right of it
+    left = np.where(~above & (bins[None, :] < peak[:, None]), bins[None, :], -1).max(axis=1)
+    right = np.where(~above & (bins[None, :] > peak[:, None]), bins[None, :], values.shape[1]).min(axis=1)
+
+    crossings = []
+    for below, step in [(left, 1), (right, -1)]:
+        valid = (below >= 0) & (below < values.shape[1])
+        below = np.clip(below, 0, values.shape[1] - 1)
+        inside = np.clip(below + step, 0, values.shape[1] - 1)
+        y0, y1 = values[rows, below], values[rows, inside]
+        fraction = np.divide(half - y0, y1 - y0, out=np.zeros_like(half), where=y1 != y0)
+        crossing = logE[below] + fraction*(logE[inside] - logE[below])
+        crossings.append(np.where(valid, crossing, np.nan))
+
+    return crossings
+
+def _parabolic_peak(logE, values, peak):
+    """
+    Vertex of the parabola through the peak bin and its
+    neighbours, the bin center at the edges of the grid.
+    """
+    rows = np.arange(len(values))
+    interior = (peak > 0) & (peak < values.shape[1] - 1)
+    i0 = np.clip(peak - 1, 0, values.shape[1] - 1)
+    i2 = np.clip(peak + 1, 0, values.shape[1] - 1)
+    x0, x1, x2 = logE[i0], logE[peak], logE[i2]
+    y0, y1, y2 = values[rows, i0], values[rows, peak], values[rows, i2]
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        denominator = (x0 - x1)*(x0 - x2)*(x1 - x2)
+        a = (x2*(y1 - y0) + x1*(y0 - y2) + x0*(y2 - y1))/denominator
+        b = (x2**2*(y0 - y1) + x1**2*(y2 - y0) + x0**2*(y1 - y2))/denominator
+        vertex = np.clip(-b/(2*a), x0, x2)
+
+    return np.where(interior & (a < 0), vertex, x1)
+
+def summarize_proton_trigger_rates(input_files,
+                                   area=np.pi*(833)**2,
+                                   solid_angle=cone_solid_angle(10),
+                                   deltaE=None,
+                                   flux_model="DAMPE_proton",
+                                   params=None,
+                                   n_workers=None
+                                   ):
+    """
+    Summary of the proton response of many configurations,
+    one histogram export per configuration, computed on
+    (n_files, n_bins) arrays, one pass per binning (each
+    file keeps its own bin edges, see stack_histo_outputs):
+
+    - trigger_rate: integral trigger rate
+    - peak_differential_rate: maximum of dR/dlog10(E)
+    - energy_threshold: energy of that maximum, refined with
+      a parabola through the peak bin and its neighbours,
+      and energy_threshold_low/high where dR/dlog10(E)
+      is half the maximum
+    - Aeff_max and energy_Aeff_half_max: maximum effective
+      area (times solid angle) and the energy where it first
+      reaches half of it
+
+    Parameters
+    ----------
+    input_files : list
+        outputs of division of histogram 1007/1006 y projection
+        or .hdata.gz files
+    area, solid_angle, deltaE, flux_model : optional
+        see calculate_proton_trigger_rates
+    params : pandas.DataFrame, optional
+        one row per input file with the parameters of its
+        configuration (e.g. trigger_pixels, discriminator_threshold),
+        prepended to the summary
+    n_workers : int, optional
+        number of processes used to read the files, by default os.cpu_count()
+
+    Returns
+    -------
+    tuple
+        (pandas.DataFrame, pandas.DataFrame) the summary, one
+        row per file with units in attrs["units"], and the
+        effective area curves [m^2 sr], one row per file and
+        one column per log10(E) bin of any file (NaN for
+        bins a file does not have)
+    """
+    input_files = list(input_files)
+    logE, stacks, present = stack_histo_outputs(input_files, n_workers)
+    if deltaE is None:
+        rates = proton_trigger_rate_arrays(
+            logE, stacks["N_frac"], area, solid_angle, flux_model=flux_model,
+            logE_low=stacks["LogE_low"], logE_high=stacks["LogE_high"]
+        )
+    else:
+        rates = proton_trigger_rate_arrays(logE, stacks["N_frac"], area, solid_angle, deltaE, flux_model)
+
+    log_width = np.broadcast_to(np.log10(rates["high_Ebin_edge"]) - np.log10(rates["low_Ebin_edge"]), present.shape)
+    differential = np.divide(rates["trigger_rate"], log_width, out=np.zeros(present.shape), where=log_width > 0)
+    Aeff = rates["Aeff"]
+
+    columns = ["peak_differential_rate", "energy_threshold", "energy_threshold_low",
+               "energy_threshold_high", "energy_Aeff_half_max"]
+    values = {column: np.full(len(input_files), np.nan) for column in columns}
+
+    # Files with the same bins share their log10(E) grid,
+    # neighbouring bins are those of the file itself
+    _, binning = np.unique(present, axis=0, return_inverse=True)
+    for group in np.unique(binning):
+        rows = np.flatnonzero(binning == group)
+        bins = present[rows[0]]
+        if not bins.any():
+            continue
+        group_logE = logE[bins]
+        group_differential = differential[np.ix_(rows, bins)]
+        group_Aeff = Aeff[np.ix_(rows, bins)]
+
+        peak = np.argmax(group_differential, axis=1)
+        peak_rate = group_differential[np.arange(len(rows)), peak]
+        triggered = peak_rate > 0
+
+        low, high = _half_max_crossings(group_logE, group_differential, peak)
+        aeff_half, _ = _half_max_crossings(group_logE, group_Aeff, np.argmax(group_Aeff, axis=1))
+
+        values["peak_differential_rate"][rows] = peak_rate
+        values["energy_threshold"][rows] = np.where(
+            triggered, 10**_parabolic_peak(group_logE, group_differential, peak), np.nan
+        )
+        values["energy_threshold_low"][rows] = np.where(triggered, 10**low, np.nan)
+        values["energy_threshold_high"][rows] = np.where(triggered, 10**high, np.nan)
+        values["energy_Aeff_half_max"][rows] = np.where(triggered, 10**aeff_half, np.nan)
+
+    summary = pd.DataFrame({
+        "input_file": input_files,
+        "trigger_rate": rates["trigger_rate"].sum(axis=1),
+        "peak_differential_rate": values["peak_differential_rate"],
+        "energy_threshold": values["energy_threshold"],
+        "energy_threshold_low": values["energy_threshold_low"],
+        "energy_threshold_high": values["energy_threshold_high"],
+        "Aeff_max": Aeff.max(axis=1),
+        "energy_Aeff_half_max": values["energy_Aeff_half_max"],
+    })
+    if params is not None:
+        summary = pd.concat([pd.DataFrame(params).reset_index(drop=True), summary], axis=1)
+    summary.attrs["units"] = dict(SUMMARY_UNITS)
+
+    curves = pd.DataFrame(
+        np.where(present, Aeff, np.nan),
+        index=pd.Index(input_files, name="input_file"),
+        columns=np.round(logE, 6)
+    )
+    curves.columns.name = "LogE"
+
+    return summary, curves
+
+def proton_summary_to_hdf5(summary, curves, output_file):
+    """
+    Writes the output of summarize_proton_trigger_rates to
+    one HDF5 file: the summary table in the summary group
+    (one dataset per column, with its unit) and the effective
+    area curves as an (n_files, n_bins) Aeff dataset with
+    its LogE grid.
+    """
+    units = summary.attrs.get("units", {})
+    with h5py.File(output_file, "w") as f:
+        group = f.create_group("summary")
+        group.attrs["columns"] = list(summary.columns)
+        write_hdf5_table(group, summary)
+        for column, unit in units.items():
+            if column in group:
+                group[column].attrs["unit"] = unit
+
+        f.create_dataset("LogE", data=curves.columns.to_numpy(dtype=float))
+        aeff = f.create_dataset("Aeff", data=curves.to_numpy(), compression="gzip")
+        aeff.attrs["unit"] = "m2 sr"
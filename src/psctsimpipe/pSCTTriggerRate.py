@@ -18,7 +18,8 @@ def trigger_rate_command(
         trigger_telescopes=1,
         # ignore_telescopes=-1,
         night_type="DARK",
-        NSB="60MHz"
+        NSB="60MHz",
+        list_triggers=True
         ):
     """
     Generates command to run sim_telarray
@@ -69,6 +70,12 @@ def trigger_rate_command(
     NSB : str, optional
         For output file naming purposes        
         #MHz, by default "60MHz"
+    list_triggers : bool, optional
+        Whether sim_telarray lists every trigger in the log
+        (-C list=all). Set it to False to keep logs small and
+        count triggers from the .simtel output instead
+        (aggregate_NSB_trigger_rates with source="simtel"),
+        by default True
 
     Returns
     -------
@@ -134,9 +141,54 @@ def trigger_rate_command(
         "-C output_format=0",
         "-C Random_State=none",
         "-C histogram_file=/dev/null",
-        "-C list=all",
+    ] + (["-C list=all"] if list_triggers else []) + [
         f"{CORSIKA_input}",
         f"> {log_file} 2>&1"
     ])
 
     return command
+
+TRIGGER_RATE_LOG_PATTERN = re.compile(
+    r"TriggPixMult(?P<trigger_pixels>\d+)_"
+    r"DiscrimThresh(?P<discriminator_threshold>[\d.]+)_"
+    r"fadc_bins(?P<fadc_bins>\d+)_"
+    r"fadc_sum_bins(?P<fadc_sum_bins>\d+)_"
+    r"disc_bins(?P<disc_bins>\d+)_"
+    r"(?P<telescope>.+?-\d+m)-"       # telescope and height
+    r"(?P<night_type>.+)-"            # night type (may contain -, e.g. HALF-MOON)
+    r"(?P<NSB>[\d.]+MHz)"             # NSB
+    r"\.seed(?P<seed>\d+)\.(?:log|simtel)"
+)
+
+def extract_trigger_rate_log_params(filename):
+    """
+    Extracts the trigger parameters encoded in the
+    log names written by trigger_rate_command.
+
+    TriggPixMult{trigger_pixels}_DiscrimThresh{discriminator_threshold}_
+    fadc_bins{fadc_bins}_fadc_sum_bins{fadc_sum_bins}_disc_bins{disc_bins}_
+    pSCT-1270m-{night_type}-{NSB}.seed{seed}.log
+
+    The .simtel outputs of the same runs share the convention.
+
+    Parameters
+    ----------
+    filename : string
+        trigger rate log file (plain or compressed) or .simtel output
+
+    Returns
+    -------
+    dict or None
+        The extracted values with numbers converted,
+        None if the name does not follow the convention.
+    """
+    match = TRIGGER_RATE_LOG_PATTERN.search(os.path.basename(filename))
+    if not match:
+        return None
+
+    params = match.groupdict()
+    for key in ["trigger_pixels", "fadc_bins", "fadc_sum_bins", "disc_bins", "seed"]:
+        params[key] = int(params[key])
+    params["discriminator_threshold"] = float(params["discriminator_threshold"])
+
+    return params
@@ -1,21 +1,31 @@
 import argparse
+import glob
+import os
 import subprocess
 
-from psctsimpipe.HESSioAddHistograms import add_histograms
+from psctsimpipe.HESSioAddHistograms import (
+    add_histograms,
+    sum_hdata_histograms,
+    write_hdata_histograms,
+    write_histograms_hdf5
+)
 
 def main():
     """
-    Add histograms tool from HESSio library
+    Adds sim_telarray histograms, natively in parallel
+    or with the add_histograms tool from HESSio library
     """
 
     parser = argparse.ArgumentParser(
         usage = """add-histograms \\
             --input-dir <input_dir> \\
-            --output <output.hdata.gz>
+            --output <output.hdata.gz> \\
+            [--n-workers <n>] [--hessio]
             """,
         description="""Adds all the hdata.gz
         files in a directory and stores result
-        int output""",
+        int output. Outputs ending in .h5/.hdf5
+        are written as HDF5.""",
         )
     parser.add_argument(
         "--input-dir",
@@ -26,14 +36,36 @@ def main():
         "--output",
         help="Path for output file"
     )
+    parser.add_argument(
+        "--n-workers",
+        type=int,
+        default=None,
+        help="Number of processes used to add histograms, by default all CPUs."
+    )
+    parser.add_argument(
+        "--hessio",
+        action="store_true",
+        help="Use the external add_histograms program from HESSio instead."
+    )
     args = parser.parse_args()
 
-    add_histo_command = add_histograms(
-                            args.input_dir,
-                            args.output
-                        )
-    
-    subprocess.run(add_histo_command, check=True)
+    if args.hessio:
+        add_histo_command = add_histograms(
+                                args.input_dir,
+                                args.output
+                            )
+        subprocess.run(add_histo_command, check=True)
+        return
+
+    hdata_files = glob.glob(os.path.join(args.input_dir, "*.hdata.gz"))
+    histograms = sum_hdata_histograms(hdata_files, n_workers=args.n_workers)
+
+    if args.output.endswith((".h5", ".hdf5")):
+        write_histograms_hdf5(histograms, args.output)
+    else:
+        write_hdata_histograms(histograms, args.output)
+
+    print(f"{len(hdata_files)} files, {len(histograms)} histograms added into {args.output}")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,91 @@
+import argparse
+
+import pandas as pd
+
+from psctsimpipe.RateTable import (
+    DEFAULT_LOG_AXES,
+    build_rate_table,
+    rate_table_from_store
+)
+
+def _parse_value(value):
+    try:
+        return float(value)
+    except ValueError:
+        return value
+
+def main():
+    """
+    Interpolation table of finished trigger rate configurations.
+    """
+    parser = argparse.ArgumentParser(
+        usage = """build-rate-table \\
+            --input <nsb_rates.csv or store.h5> \\
+            --axes <axis> [<axis> ...] \\
+            --output <rate_table.h5>
+            """,
+        description="""Grids the trigger rates of every finished configuration
+        on the given parameter axes and stores them as an N-dimensional
+        table interpolated in log10(rate), queried with query-rate-table.""",
+        epilog="""Example: \n
+        build-rate-table
+        --input nsb_rates.csv
+        --axes trigger_pixels discriminator_threshold NSB night_type
+        --output nsb_rate_table.h5
+        """
+        )
+    parser.add_argument(
+        "--input",
+        help="""CSV written by calculate-nsb-trigger-rates (or any table
+        with one row per configuration) or HDF5 trigger rate store."""
+    )
+    parser.add_argument(
+        "--axes",
+        nargs="+",
+        help="Parameters spanning the table, e.g. trigger_pixels discriminator_threshold NSB."
+    )
+    parser.add_argument(
+        "--rate-column",
+        default=None,
+        help="""Column with the rates [Hz], by default trigger_rate
+        (total_trigger_rate for a store)."""
+    )
+    parser.add_argument(
+        "--log-axes",
+        nargs="*",
+        default=list(DEFAULT_LOG_AXES),
+        help="Numeric axes interpolated in log10, by default NSB."
+    )
+    parser.add_argument(
+        "--select",
+        nargs="*",
+        default=[],
+        help="key=value filters on the other parameters, e.g. night_type=DARK."
+    )
+    parser.add_argument(
+        "-o",
+        "--output",
+        help="Output HDF5 file."
+    )
+    parser.add_argument(
+        "--group",
+        default="rate_table",
+        help="Group of the output file holding the table."
+    )
+    args = parser.parse_args()
+
+    selection = {key: _parse_value(value) for key, value in (item.split("=", 1) for item in args.select)}
+
+    if args.input.endswith((".h5", ".hdf5")):
+        table = rate_table_from_store(args.input, args.axes, tuple(args.log_axes), **selection)
+    else:
+        results = pd.read_csv(args.input)
+        for key, value in selection.items():
+            results = results[results[key] == value]
+        table = build_rate_table(results, args.axes, args.rate_column or "trigger_rate", tuple(args.log_axes))
+
+    table.to_hdf5(args.output, args.group)
+    print(f"{table} written to {args.output}")
+
+if __name__ == "__main__":
+    main()
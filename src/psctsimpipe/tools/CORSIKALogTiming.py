@@ -0,0 +1,91 @@
+import argparse
+
+from psctsimpipe.CORSIKALogParser import (
+    parse_corsika_log_files,
+    fit_corsika_cpu_time,
+    predict_corsika_cpu_time
+)
+
+def main():
+    """
+    Parses CORSIKA logs into per-shower and per-run
+    timing tables and fits CPU time per shower 
+    as a function of primary energy.
+    """
+    parser = argparse.ArgumentParser(
+        usage = """corsika-log-timing \\
+            --input-dir <input_dir> \\
+            [--output-prefix <prefix>]
+            """,
+        description="""Parses CORSIKA logs into per-shower and
+        per-run timing tables. The fitted CPU time per shower
+        can be used to size NSHOW and ERANGE chunks.""",
+        epilog="""Example: \n 
+        corsika-log-timing 
+        --input-dir /your/corsika/output_dir 
+        --output-prefix corsika_timing
+        --erange 100 200000
+        --nshow 1000
+        """
+        )
+    
+    parser.add_argument(
+        "--input-dir",
+        help="path to directory where all CORSIKA logs live."
+    )
+    parser.add_argument(
+        "--search-pattern",
+        default="*.out*",
+        help="Search pattern for CORSIKA logs."
+    )
+    parser.add_argument(
+        "--output-prefix",
+        default=None,
+        help="""If given, tables are written to
+        <prefix>_showers.csv and <prefix>_runs.csv"""
+    )
+    parser.add_argument(
+        "--erange",
+        nargs=2,
+        type=float,
+        default=None,
+        help="ERANGE in GeV for a CPU time prediction."
+    )
+    parser.add_argument(
+        "--nshow",
+        type=int,
+        default=1000,
+        help="NSHOW for a CPU time prediction."
+    )
+    parser.add_argument(
+        "--eslope",
+        type=float,
+        default=-2.0,
+        help="ESLOPE for a CPU time prediction."
+    )
+
+    args = parser.parse_args()
+
+    showers, runs = parse_corsika_log_files(args.input_dir, args.search_pattern)
+
+    print(f"{len(runs)} logs parsed, {len(showers)} showers with printed information.")
+
+    if args.output_prefix:
+        showers.to_csv(f"{args.output_prefix}_showers.csv", index=False)
+        runs.to_csv(f"{args.output_prefix}_runs.csv", index=False)
+        print(f"Tables written to {args.output_prefix}_showers.csv and {args.output_prefix}_runs.csv")
+
+    try:
+        fit = fit_corsika_cpu_time(showers, runs)
+    except ValueError as e:
+        print(e)
+        return
+
+    print(f"CPU time per shower = {fit['norm']:.3g} s (E/TeV)^{fit['index']:.3f} ({fit['n_points']} points)")
+
+    if args.erange:
+        cpu_time = predict_corsika_cpu_time(fit, args.erange[0], args.erange[1], args.nshow, args.eslope)
+        print(f"Predicted CPU time for NSHOW={args.nshow}, ERANGE={args.erange[0]:g} {args.erange[1]:g} GeV: {cpu_time:.0f} s")
+
+if __name__ == "__main__":
+    main()
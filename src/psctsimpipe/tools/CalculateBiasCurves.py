@@ -0,0 +1,110 @@
+import argparse
+
+import numpy as np
+import pandas as pd
+
+from psctsimpipe.BiasCurve import (
+    bias_curves_to_hdf5,
+    compute_bias_curves,
+    find_bias_crossover
+)
+from psctsimpipe.CalculateTriggerRate import cone_solid_angle
+
+def main():
+    """
+    NSB and proton trigger rates over a grid of
+    discriminator thresholds and multiplicities.
+    """
+    parser = argparse.ArgumentParser(
+        usage = """calculate-bias-curves \\
+            --nsb-dir <trigger_rate_logs_dir> \\
+            --proton-files <proton_files.csv> \\
+            --output <bias_curves.h5>
+            """,
+        description="""Computes NSB trigger rates from trigger rate logs and
+        proton trigger rates from histograms for every
+        (threshold, multiplicity) grid point, finds the threshold
+        where both rates cross and stores everything in one HDF5 file.""",
+        epilog="""The proton files table is a CSV with the columns
+        discriminator_threshold, trigger_pixels and input_file
+        (1007/1006 export or .hdata.gz).
+        Example: \n 
+        calculate-bias-curves 
+        --nsb-dir /your/trigger_rate/output_dir 
+        --proton-files proton_files.csv
+        --output bias_curves.h5
+        """
+        )
+    parser.add_argument(
+        "--nsb-dir",
+        default=None,
+        help="Directory where the trigger rate logs live."
+    )
+    parser.add_argument(
+        "--nsb-table",
+        default=None,
+        help="CSV written by calculate-nsb-trigger-rates, used instead of --nsb-dir."
+    )
+    parser.add_argument(
+        "--proton-files",
+        help="CSV mapping (discriminator_threshold, trigger_pixels) to histogram files."
+    )
+    parser.add_argument(
+        "-o",
+        "--output",
+        help="Output HDF5 file."
+    )
+    parser.add_argument(
+        "--radius",
+        default=833.,
+        type=float,
+        help="Radius [m] of the area over which protons were generated."
+    )
+    parser.add_argument(
+        "--viewcone",
+        default=10.,
+        type=float,
+        help="Half angle [deg] of the cone over which protons were generated."
+    )
+    parser.add_argument(
+        "--nsb-fraction",
+        default=1.0,
+        type=float,
+        help="NSB to proton rate ratio defining the operating point."
+    )
+    parser.add_argument(
+        "--n-workers",
+        default=None,
+        type=int,
+        help="Number of parallel processes, by default number of CPUs."
+    )
+    args = parser.parse_args()
+
+    nsb_rates = pd.read_csv(args.nsb_table) if args.nsb_table else args.nsb_dir
+
+    proton_table = pd.read_csv(args.proton_files)
+    proton_files = {
+        (threshold, multiplicity): input_file
+        for threshold, multiplicity, input_file in zip(
+            proton_table["discriminator_threshold"],
+            proton_table["trigger_pixels"],
+            proton_table["input_file"]
+        )
+    }
+
+    curves = compute_bias_curves(
+        nsb_rates,
+        proton_files,
+        area=np.pi*args.radius**2,
+        solid_angle=cone_solid_angle(args.viewcone),
+        n_workers=args.n_workers
+    )
+    crossovers = find_bias_crossover(curves, args.nsb_fraction)
+
+    bias_curves_to_hdf5(curves, crossovers, args.output)
+
+    print(crossovers.to_string())
+    print(f"{len(curves)} grid points written to {args.output}")
+
+if __name__ == "__main__":
+    main()
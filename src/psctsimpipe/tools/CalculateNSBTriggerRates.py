@@ -0,0 +1,99 @@
+import argparse
+
+from psctsimpipe.CalculateTriggerRate import aggregate_NSB_trigger_rates
+
+def main():
+    """
+    NSB trigger rate per trigger configuration for
+    a whole directory of trigger rate logs.
+    """
+    parser = argparse.ArgumentParser(
+        usage = """calculate-nsb-trigger-rates \\
+            --input-dir <input_dir> \\
+            --output <output.csv>
+            """,
+        description="""Counts triggers in every trigger rate log of a
+        directory, groups the logs by the trigger configuration
+        encoded in their names and writes one NSB trigger rate 
+        (with Poisson confidence interval) per configuration.""",
+        epilog="""Example: \n 
+        calculate-nsb-trigger-rates 
+        --input-dir /your/trigger_rate/output_dir 
+        --output nsb_rates.csv
+        --n-workers 8
+        """
+        )
+    parser.add_argument(
+        "--input-dir",
+        help="path to directory where the trigger rate logs live."
+    )
+    parser.add_argument(
+        "--source",
+        default="log",
+        choices=["log", "simtel"],
+        help="""Count triggers in the logs ("has triggered!" lines)
+        or in the .simtel outputs (runs submitted with --no-list-triggers)."""
+    )
+    parser.add_argument(
+        "--search-pattern",
+        default=None,
+        help="Search pattern for trigger rate logs, by default *.log* or *.simtel*."
+    )
+    parser.add_argument(
+        "-o",
+        "--output",
+        default=None,
+        help="CSV file for the rate table. Printed to terminal if not given."
+    )
+    parser.add_argument(
+        "--n-events",
+        default=None,
+        type=int,
+        help="""Events simulated per log. By default read from
+        the CORSIKA dummy file name in each log."""
+    )
+    parser.add_argument(
+        "--ns-per-bin",
+        default=1.0,
+        type=float,
+        help="Duration of one time interval in ns."
+    )
+    parser.add_argument(
+        "--window-bins",
+        default="fadc_bins",
+        choices=["fadc_bins", "disc_bins"],
+        help="Number of intervals defining the time window per event."
+    )
+    parser.add_argument(
+        "--confidence",
+        default=0.6827,
+        type=float,
+        help="Confidence level of the Poisson interval."
+    )
+    parser.add_argument(
+        "--n-workers",
+        default=None,
+        type=int,
+        help="Number of parallel processes, by default number of CPUs."
+    )
+    args = parser.parse_args()
+
+    table = aggregate_NSB_trigger_rates(
+        args.input_dir,
+        args.search_pattern,
+        args.n_events,
+        args.ns_per_bin,
+        args.window_bins,
+        args.confidence,
+        args.n_workers,
+        args.source
+    )
+
+    if args.output:
+        table.to_csv(args.output, index=False)
+        print(f"{len(table)} configurations written to {args.output}")
+    else:
+        print(table.to_string())
+
+if __name__ == "__main__":
+    main()
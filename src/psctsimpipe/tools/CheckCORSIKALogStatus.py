@@ -1,6 +1,6 @@
 import argparse
 
-from psctsimpipe.CheckSimTelArrayLogs import check_corsika_log_files
+from psctsimpipe.CheckSimTelArrayLogs import check_corsika_log_files, LOG_OUTPUT_FORMATS
 
 def main():
     """
@@ -25,9 +25,18 @@ def main():
         help="path to directory where all CORSIKA files live."
     )
 
+    parser.add_argument(
+        "--format",
+        default="text",
+        choices=LOG_OUTPUT_FORMATS,
+        help="""Output format. text prints one line per file,
+        json one JSON record per line, csv one row per file 
+        and summary only the aggregate counts."""
+    )
+
     args = parser.parse_args()
 
-    check_corsika_log_files(args.input_dir)
+    check_corsika_log_files(args.input_dir, args.format)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
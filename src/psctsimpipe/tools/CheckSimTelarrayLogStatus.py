@@ -1,6 +1,12 @@
 import argparse
 
-from psctsimpipe.CheckSimTelArrayLogs import check_simtelarray_log_files
+from psctsimpipe.CheckSimTelArrayLogs import (
+    check_simtelarray_log_files,
+    LOG_OUTPUT_FORMATS,
+    return_log_file_status,
+    watch_simtelarray_log_files
+)
+from psctsimpipe.ClassifyFailedRuns import classify_failed_runs, print_failure_categories
 
 def main():
     """
@@ -10,12 +16,16 @@ def main():
     parser = argparse.ArgumentParser(
         usage = """check-sim_telarray-logs-status \\
             --input-dir <input_dir> \\
+            [--format text|json|csv|summary] \\
+            [--watch --interval <seconds>]
             """,
         description="""Checks for sim_telarray logs to see
         if Sim_telarray finished successfully.""",
         epilog="""Example: \n 
         check-logs-run-status 
         --input-dir /your/sim_telarray/output_dir 
+        --watch
+        --interval 60
         """
         )
     
@@ -23,10 +33,54 @@ def main():
         "--input-dir",
         help="path to directory where all sim_telarray files live."
     )
+    parser.add_argument(
+        "--watch",
+        action="store_true",
+        help="""Keep watching the directory. Only the new bytes
+        of each log are read at every refresh."""
+    )
+    parser.add_argument(
+        "--interval",
+        default=60.,
+        type=float,
+        help="Seconds between refreshes in watch mode."
+    )
+    parser.add_argument(
+        "--stall-time",
+        default=1800.,
+        type=float,
+        help="""Seconds without any new output after which
+        an unfinished log is reported as stalled."""
+    )
+
+    parser.add_argument(
+        "--classify",
+        action="store_true",
+        help="""Also sort the failed runs into failure categories
+        (OOM, walltime, missing input, segfault, ...), added
+        to each record of json/csv outputs and counted in
+        summary/text outputs."""
+    )
+
+    parser.add_argument(
+        "--format",
+        default="text",
+        choices=LOG_OUTPUT_FORMATS,
+        help="""Output format. text prints one line per file,
+        json one JSON record per line, csv one row per file 
+        and summary only the aggregate counts."""
+    )
 
     args = parser.parse_args()
 
-    check_simtelarray_log_files(args.input_dir)
+    if args.watch:
+        watch_simtelarray_log_files(args.input_dir, args.interval, args.stall_time)
+        if args.classify:
+            print_failure_categories(
+                classify_failed_runs(return_log_file_status(args.input_dir))
+            )
+    else:
+        check_simtelarray_log_files(args.input_dir, args.format, classify=args.classify)
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
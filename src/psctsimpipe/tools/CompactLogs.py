@@ -0,0 +1,55 @@
+import argparse
+
+from psctsimpipe.LogCompaction import compact_finished_logs
+
+def main():
+    """
+    Compresses finished sim_telarray logs after
+    caching their status and metrics.
+    """
+    parser = argparse.ArgumentParser(
+        usage = """compact-finished-logs \\
+            --input-dir <input_dir> \\
+            [--method gz|zst --n-workers <n>]
+            """,
+        description="""Caches the status and metrics of every
+        .out log in a directory and compresses the logs of
+        finished runs in parallel. Compressed logs are read
+        transparently by the log status tools.""",
+        epilog="""Example: \n 
+        compact-finished-logs 
+        --input-dir /your/sim_telarray/output_dir 
+        --method zst
+        --n-workers 8
+        """
+        )
+    
+    parser.add_argument(
+        "--input-dir",
+        help="path to directory where all sim_telarray logs live."
+    )
+    parser.add_argument(
+        "--method",
+        default="gz",
+        choices=["gz", "zst"],
+        help="Compression method. zst requires the zstandard package."
+    )
+    parser.add_argument(
+        "--level",
+        default=None,
+        type=int,
+        help="Compression level."
+    )
+    parser.add_argument(
+        "--n-workers",
+        default=None,
+        type=int,
+        help="Number of parallel processes, by default number of CPUs."
+    )
+
+    args = parser.parse_args()
+
+    compact_finished_logs(args.input_dir, args.method, args.level, args.n_workers)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,170 @@
+import argparse
+import itertools
+
+import numpy as np
+
+from psctsimpipe.NSBEmulator import TRIGGER_RATE_DEFAULTS, emulate_nsb_trigger_rates
+
+def main():
+    """
+    Fast emulated NSB trigger rates over a grid
+    of trigger configurations.
+    """
+    parser = argparse.ArgumentParser(
+        usage = """emulate-nsb-trigger-rates \\
+            --threshold-range <start> <stop> <step> \\
+            --multiplicities <multiplicity> [<multiplicity> ...] \\
+            --output <emulated_nsb_rates.csv>
+            """,
+        description="""Estimates accidental NSB trigger rates with a NumPy
+        Monte Carlo of Poisson NSB photoelectrons, a single photoelectron
+        pulse and the majority trigger, for every combination of thresholds,
+        multiplicities, NSB levels and windows. Meant for coarse scans before
+        running sim_telarray on the promising region. The output has the
+        layout of calculate-nsb-trigger-rates.""",
+        epilog="""Example: \n
+        emulate-nsb-trigger-rates
+        --threshold-range 3 10 0.25
+        --multiplicities 2 3 4
+        --NSB 60MHz 120MHz
+        --output emulated_nsb_rates.csv
+        """
+        )
+    parser.add_argument(
+        "--thresholds",
+        nargs="*",
+        type=float,
+        default=[],
+        help="Discriminator thresholds [p.e.]."
+    )
+    parser.add_argument(
+        "--threshold-range",
+        nargs=3,
+        type=float,
+        default=None,
+        metavar=("START", "STOP", "STEP"),
+        help="Thresholds from START to STOP (included) in steps of STEP."
+    )
+    parser.add_argument(
+        "--multiplicities",
+        nargs="+",
+        type=int,
+        help="Pixel multiplicities."
+    )
+    parser.add_argument(
+        "--NSB",
+        nargs="+",
+        default=[TRIGGER_RATE_DEFAULTS["NSB"]],
+        help="NSB photoelectron rates per pixel, e.g. 60MHz."
+    )
+    parser.add_argument(
+        "--fadc_bins",
+        nargs="+",
+        type=int,
+        default=[TRIGGER_RATE_DEFAULTS["fadc_bins"]],
+        help="Number of time intervals simulated for ADC."
+    )
+    parser.add_argument(
+        "--disc_bins",
+        nargs="+",
+        type=int,
+        default=[TRIGGER_RATE_DEFAULTS["disc_bins"]],
+        help="Number of time intervals simulated for trigger."
+    )
+    parser.add_argument(
+        "--window-bins",
+        default="disc_bins",
+        choices=["fadc_bins", "disc_bins"],
+        help="Number of intervals emulated per event."
+    )
+    parser.add_argument(
+        "--n-events",
+        default=1000,
+        type=int,
+        help="Emulated events per NSB level and window."
+    )
+    parser.add_argument(
+        "--n-pixels",
+        default=None,
+        type=int,
+        help="Camera pixels, by default 1600 (pSCT)."
+    )
+    parser.add_argument(
+        "--ns-per-bin",
+        default=1.0,
+        type=float,
+        help="Duration of one time interval in ns."
+    )
+    parser.add_argument(
+        "--pulse-fwhm",
+        default=3.0,
+        type=float,
+        help="FWHM [ns] of the Gaussian single photoelectron pulse."
+    )
+    parser.add_argument(
+        "--gate-samples",
+        default=1,
+        type=int,
+        help="Coincidence gate of the majority in samples."
+    )
+    parser.add_argument(
+        "--seed",
+        default=None,
+        type=int,
+        help="Random seed."
+    )
+    parser.add_argument(
+        "-o",
+        "--output",
+        default=None,
+        help="CSV file for the rate table. Printed to terminal if not given."
+    )
+    parser.add_argument(
+        "--n-workers",
+        default=None,
+        type=int,
+        help="Number of parallel processes, by default number of CPUs."
+    )
+    args = parser.parse_args()
+
+    thresholds = list(args.thresholds)
+    if args.threshold_range:
+        start, stop, step = args.threshold_range
+        thresholds += list(np.round(np.arange(start, stop + step/2, step), 6))
+    if not thresholds:
+        parser.error("Give --thresholds or --threshold-range.")
+
+    configurations = [
+        {
+            "discriminator_threshold": threshold,
+            "trigger_pixels": multiplicity,
+            "NSB": NSB,
+            "fadc_bins": fadc_bins,
+            "disc_bins": disc_bins,
+        }
+        for threshold, multiplicity, NSB, fadc_bins, disc_bins in itertools.product(
+            sorted(set(thresholds)), args.multiplicities, args.NSB, args.fadc_bins, args.disc_bins
+        )
+    ]
+
+    kwargs = {"n_pixels": args.n_pixels} if args.n_pixels else {}
+    table = emulate_nsb_trigger_rates(
+        configurations,
+        n_events=args.n_events,
+        ns_per_bin=args.ns_per_bin,
+        window_bins=args.window_bins,
+        pulse_fwhm=args.pulse_fwhm,
+        gate_samples=args.gate_samples,
+        seed=args.seed,
+        n_workers=args.n_workers,
+        **kwargs
+    )
+
+    if args.output:
+        table.to_csv(args.output, index=False)
+        print(f"{len(table)} configurations written to {args.output}")
+    else:
+        print(table.to_string())
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+import argparse
+
+import numpy as np
+
+from psctsimpipe.Helpers import find_files
+from psctsimpipe.OfflineTrigger import offline_trigger_scan
+
+def main():
+    """
+    NSB trigger rates of a threshold and multiplicity
+    scan from waveform dumps.
+    """
+    parser = argparse.ArgumentParser(
+        usage = """offline-trigger-scan \\
+            --input-dir <waveform_dump_dir> \\
+            --thresholds <threshold> [<threshold> ...] \\
+            --multiplicities <multiplicity> [<multiplicity> ...] \\
+            --output <nsb_rates.csv>
+            """,
+        description="""Applies the majority trigger offline to the waveforms
+        recorded by submit-all-simtelarray-trigger-rate-SLURM-run --waveform-dump
+        for every (threshold, multiplicity) combination, and writes one
+        NSB trigger rate per configuration, like calculate-nsb-trigger-rates.""",
+        epilog="""Example: \n
+        offline-trigger-scan
+        --input-dir /your/waveform_dump/output_dir
+        --threshold-range 3 10 0.25
+        --multiplicities 2 3 4
+        --output nsb_rates.csv
+        """
+        )
+    parser.add_argument(
+        "--input-dir",
+        help="Directory where the waveform dumps live."
+    )
+    parser.add_argument(
+        "--search-pattern",
+        default="TriggPixMult1_*.simtel*",
+        help="Search pattern for the waveform dumps."
+    )
+    parser.add_argument(
+        "--thresholds",
+        nargs="*",
+        type=float,
+        default=[],
+        help="Discriminator thresholds to evaluate."
+    )
+    parser.add_argument(
+        "--threshold-range",
+        nargs=3,
+        type=float,
+        default=None,
+        metavar=("START", "STOP", "STEP"),
+        help="Thresholds from START to STOP (included) in steps of STEP."
+    )
+    parser.add_argument(
+        "--multiplicities",
+        nargs="+",
+        type=int,
+        help="Pixel multiplicities to evaluate."
+    )
+    parser.add_argument(
+        "-o",
+        "--output",
+        default=None,
+        help="CSV file for the rate table. Printed to terminal if not given."
+    )
+    parser.add_argument(
+        "--n-events",
+        default=None,
+        type=int,
+        help="Events simulated per dump, by default the showers in the run header of each dump."
+    )
+    parser.add_argument(
+        "--ns-per-bin",
+        default=1.0,
+        type=float,
+        help="Duration of one time interval in ns."
+    )
+    parser.add_argument(
+        "--window-bins",
+        default="fadc_bins",
+        choices=["fadc_bins", "disc_bins"],
+        help="Number of intervals defining the time window per event."
+    )
+    parser.add_argument(
+        "--gate-samples",
+        default=1,
+        type=int,
+        help="Coincidence gate of the majority in samples."
+    )
+    parser.add_argument(
+        "--tel-id",
+        default=None,
+        type=int,
+        help="Telescope to read, by default the first one of each event."
+    )
+    parser.add_argument(
+        "--amplitude-scale",
+        default=1.0,
+        type=float,
+        help="Factor converting the recorded samples to threshold units."
+    )
+    parser.add_argument(
+        "--n-workers",
+        default=None,
+        type=int,
+        help="Number of parallel processes, by default number of CPUs."
+    )
+    args = parser.parse_args()
+
+    thresholds = list(args.thresholds)
+    if args.threshold_range:
+        start, stop, step = args.threshold_range
+        thresholds += list(np.round(np.arange(start, stop + step/2, step), 6))
+    if not thresholds:
+        parser.error("Give --thresholds or --threshold-range.")
+
+    dumps = find_files(args.input_dir, args.search_pattern)
+    print(f"{len(dumps)} waveform dumps found in {args.input_dir}")
+
+    table = offline_trigger_scan(
+        dumps,
+        sorted(set(thresholds)),
+        args.multiplicities,
+        n_events=args.n_events,
+        ns_per_bin=args.ns_per_bin,
+        window_bins=args.window_bins,
+        gate_samples=args.gate_samples,
+        tel_id=args.tel_id,
+        amplitude_scale=args.amplitude_scale,
+        n_workers=args.n_workers
+    )
+
+    if args.output:
+        table.to_csv(args.output, index=False)
+        print(f"{len(table)} configurations written to {args.output}")
+    else:
+        print(table.to_string())
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+import argparse
+import itertools
+
+import numpy as np
+import pandas as pd
+
+from psctsimpipe.RateSurrogate import RateSurrogate, propose_next_points
+
+def main():
+    """
+    Next trigger rate configurations to simulate,
+    from a surrogate fitted to finished results.
+    """
+    parser = argparse.ArgumentParser(
+        usage = """propose-trigger-runs \\
+            --results <nsb_rates.csv> [<nsb_rates.csv> ...] \\
+            --threshold-range <start> <stop> <step> \\
+            --multiplicities <multiplicity> [<multiplicity> ...] \\
+            --output <proposals.csv>
+            """,
+        description="""Fits a Gaussian process surrogate of log10(trigger rate)
+        to finished results (calculate-nsb-trigger-rates or offline-trigger-scan
+        tables) and proposes the candidate configurations whose rate is the
+        least known, until every candidate reaches the target precision.""",
+        epilog="""Example: \n
+        propose-trigger-runs
+        --results nsb_rates.csv
+        --threshold-range 3 12 0.25
+        --multiplicities 2 3 4
+        --NSB 60MHz 120MHz
+        --target-rate 1000
+        --output proposals.csv
+        """
+        )
+    parser.add_argument(
+        "--results",
+        nargs="+",
+        help="CSV tables of finished configurations."
+    )
+    parser.add_argument(
+        "--threshold-range",
+        nargs=3,
+        type=float,
+        metavar=("START", "STOP", "STEP"),
+        help="Candidate thresholds from START to STOP (included) in steps of STEP."
+    )
+    parser.add_argument(
+        "--multiplicities",
+        nargs="+",
+        type=int,
+        help="Candidate pixel multiplicities."
+    )
+    parser.add_argument(
+        "--NSB",
+        nargs="+",
+        default=None,
+        help="Candidate NSB levels, by default those of the results."
+    )
+    parser.add_argument(
+        "--fadc_bins",
+        nargs="+",
+        type=int,
+        default=None,
+        help="Candidate fadc_bins, by default those of the results."
+    )
+    parser.add_argument(
+        "--disc_bins",
+        nargs="+",
+        type=int,
+        default=None,
+        help="Candidate disc_bins, by default those of the results."
+    )
+    parser.add_argument(
+        "--n-points",
+        default=10,
+        type=int,
+        help="Maximum number of proposed configurations."
+    )
+    parser.add_argument(
+        "--target-precision",
+        default=0.05,
+        type=float,
+        help="Wanted standard deviation of log10(rate)."
+    )
+    parser.add_argument(
+        "--target-rate",
+        default=None,
+        type=float,
+        help="Only propose configurations whose rate [Hz] may be near this one."
+    )
+    parser.add_argument(
+        "--rate-window",
+        default=1.0,
+        type=float,
+        help="Decades around --target-rate."
+    )
+    parser.add_argument(
+        "--exposure",
+        default=None,
+        type=float,
+        help="Exposure [s] of a proposed run, by default the median of the results."
+    )
+    parser.add_argument(
+        "--predictions",
+        default=None,
+        help="CSV file for the predicted rates of every candidate."
+    )
+    parser.add_argument(
+        "--seed",
+        default=None,
+        type=int,
+        help="Random seed of the fit."
+    )
+    parser.add_argument(
+        "-o",
+        "--output",
+        default=None,
+        help="CSV file for the proposals. Printed to terminal if not given."
+    )
+    args = parser.parse_args()
+
+    results = pd.concat([pd.read_csv(file) for file in args.results], ignore_index=True)
+    surrogate = RateSurrogate().fit(results, seed=args.seed)
+    print(f"Surrogate fitted to {surrogate.n_results} results")
+
+    start, stop, step = args.threshold_range
+    thresholds = np.round(np.arange(start, stop + step/2, step), 6)
+    candidates = pd.DataFrame(
+        list(itertools.product(
+            thresholds,
+            args.multiplicities,
+            args.NSB or sorted(results["NSB"].unique()),
+            args.fadc_bins or sorted(results["fadc_bins"].unique()),
+            args.disc_bins or sorted(results["disc_bins"].unique()),
+        )),
+        columns=["discriminator_threshold", "trigger_pixels", "NSB", "fadc_bins", "disc_bins"]
+    )
+
+    if args.predictions:
+        surrogate.predict_rate(candidates).to_csv(args.predictions, index=False)
+        print(f"Predictions for {len(candidates)} candidates written to {args.predictions}")
+
+    proposals = propose_next_points(
+        surrogate,
+        candidates,
+        n_points=args.n_points,
+        target_std=args.target_precision,
+        exposure=args.exposure,
+        target_rate=args.target_rate,
+        rate_window=args.rate_window
+    )
+
+    if args.output:
+        proposals.to_csv(args.output, index=False)
+        print(f"{len(proposals)} configurations written to {args.output}")
+    else:
+        print(proposals.to_string())
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+import argparse
+
+from psctsimpipe.RateTable import read_rate_table
+
+def main():
+    """
+    Interpolated trigger rate at one configuration.
+    """
+    parser = argparse.ArgumentParser(
+        usage = """query-rate-table \\
+            --table <rate_table.h5> \\
+            <axis>=<value> [<axis>=<value> ...]
+            """,
+        description="""Prints the trigger rate interpolated from a table
+        written by build-rate-table, flagging points outside the grid.""",
+        epilog="""Example: \n
+        query-rate-table
+        --table nsb_rate_table.h5
+        trigger_pixels=3 discriminator_threshold=7.25 NSB=75MHz night_type=DARK
+        """
+        )
+    parser.add_argument(
+        "--table",
+        help="HDF5 file written by build-rate-table."
+    )
+    parser.add_argument(
+        "--group",
+        default="rate_table",
+        help="Group of the file holding the table."
+    )
+    parser.add_argument(
+        "--extrapolate",
+        action="store_true",
+        help="Extrapolate outside the grid instead of returning nan."
+    )
+    parser.add_argument(
+        "point",
+        nargs="+",
+        help="axis=value for every axis of the table."
+    )
+    args = parser.parse_args()
+
+    table = read_rate_table(args.table, args.group)
+    point = {}
+    for item in args.point:
+        name, value = item.split("=", 1)
+        if name in table.axes and table.axes[name].dtype.kind in "biuf" and not value.endswith("MHz"):
+            value = float(value)
+        point[name] = value
+
+    rate, extrapolated = table(args.extrapolate, **point)
+    print(f"{table.rate_column}: {rate:.6g} Hz" + (" (extrapolated)" if extrapolated else ""))
+
+if __name__ == "__main__":
+    main()
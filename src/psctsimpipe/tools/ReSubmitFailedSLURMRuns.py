@@ -6,6 +6,12 @@ import subprocess
 from psctsimpipe.pSCTSimTelArrayRun import single_sim_telarray_pSCT_run
 from psctsimpipe.SLURMScriptGen import create_slurm_script, submit_job
 from psctsimpipe.CheckSimTelArrayLogs import extract_simtel_run_params
+from psctsimpipe.ClassifyFailedRuns import (
+    RETRYABLE_FAILURES,
+    classify_failure,
+    is_retryable_failure,
+    print_failure_categories
+)
 from psctsimpipe.Helpers import extract_number
 
 def main():
@@ -86,12 +92,32 @@ def main():
         default=False,
         help="Whether to suppress the standard output and error of slurm report, by default False"
         )
+    parser.add_argument(
+        "--retry-categories",
+        nargs="+",
+        default=sorted(RETRYABLE_FAILURES),
+        help=f"""Failure categories that are resubmitted, 
+        by default {' '.join(sorted(RETRYABLE_FAILURES))}.
+        Runs failing for any other reason are left in place."""
+        )
     args = parser.parse_args()
 
     failed_runs = extract_simtel_run_params(args.input_dir)
+
+    classification = {
+        run["log_file"]: classify_failure(run["log_file"], run["std_err_file"])
+        for run in failed_runs
+    }
+    print_failure_categories(classification)
+
     resubmitted_run = 0
     for run in failed_runs:
 
+        category = classification[run["log_file"]]
+        if not is_retryable_failure(category, args.retry_categories):
+            print(f"Skipping {run['log_file']} ({category} is not retried)")
+            continue
+
         config_file=run["config_file"]
         histogram_output=run["histogram_output"]
         event_output=run["event_output"]
@@ -0,0 +1,252 @@
+import argparse
+import os
+
+from psctsimpipe.Helpers import find_files
+from psctsimpipe.ThresholdSearch import adaptive_threshold_search
+
+def main():
+    parser = argparse.ArgumentParser(
+        usage = """search-trigger-threshold --input-dir <input_dir> \\
+                --output-dir <output_dir> \\
+                --sim_telarray_cfg <sim_telarray_cfg> \\
+                --target-rate <Hz> \\
+                --threshold-low <low> --threshold-high <high>
+                """,
+        description="""Searches the discriminator threshold giving a target
+        NSB trigger rate. Trigger rate runs are submitted through SLURM
+        only at the thresholds the search needs (secant steps on
+        log-rate, with bisection once the target is bracketed), their
+        logs are read back and the search stops when the rate is within
+        tolerance or statistically compatible with the target.
+        This command keeps running until the search is over.""",
+        epilog="""Example: \n 
+        search-trigger-threshold 
+        --input-dir data/
+        --output-dir output/
+        --sim_telarray_cfg pSCT.cfg
+        --target-rate 1000
+        --threshold-low 5
+        --threshold-high 15
+        --trigger_pixels 3
+        --night_type DARK
+        --NSB 60MHz
+        --output threshold_search.csv
+        """
+        )
+    # sim_telarray options
+    parser.add_argument(
+        "-i",
+        "--input-dir",
+        help="path to CORSIKA file directory"
+    )
+    parser.add_argument(
+        "--output-dir",
+        help="""path for simtelarray output log
+                and slurm scripts.
+                """
+    )
+    parser.add_argument(
+        "--search-pattern",
+        default="*telescope.tar.gz",
+        help="Search pattern for CORSIKA files."
+    )
+    parser.add_argument(
+        "-c",
+        "--sim_telarray_cfg",
+        help="path to sim_telarray config file"
+    )
+    parser.add_argument(
+        "--trigger_pixels", 
+        default=3,  
+        help="trigger pixel multiplicity"
+        )
+    parser.add_argument(
+        "--fadc_bins", 
+        default=100,  
+        help="""Number of time intervals simulated 
+        for ADC."""
+        )
+    parser.add_argument(
+        "--fadc_sum_bins", 
+        default=100,  
+        help="""Number of ADC time intervals 
+        actually read out."""
+        )
+    parser.add_argument(
+        "--disc_bins", 
+        default=100,  
+        help="""Number of time intervals simulated
+        for trigger."""
+        )
+    parser.add_argument(
+        "--disc_start", 
+        default=0,  
+        help="""How many intervals the trigger 
+        simulation starts before the ADC."""
+        )
+    parser.add_argument(
+        "--night_type", 
+        default="DARK",  
+        help="""For output file naming purposes
+        DARK, HALF-MOON,MOON, by default "DARK"""
+        )
+    parser.add_argument(
+        "--NSB", 
+        default="60MHz",  
+        help="""For output file naming purposes #MHz"""
+        )
+    # Search options
+    parser.add_argument(
+        "--target-rate",
+        type=float,
+        help="NSB trigger rate wanted [Hz]."
+    )
+    parser.add_argument(
+        "--threshold-low",
+        type=float,
+        help="First threshold simulated, ideally giving a rate above target."
+    )
+    parser.add_argument(
+        "--threshold-high",
+        type=float,
+        help="Second threshold simulated, ideally giving a rate below target."
+    )
+    parser.add_argument(
+        "--tolerance",
+        default=0.05,
+        type=float,
+        help="Relative tolerance on the rate."
+    )
+    parser.add_argument(
+        "--threshold-tolerance",
+        default=0.05,
+        type=float,
+        help="Stop once the target is bracketed within this threshold width."
+    )
+    parser.add_argument(
+        "--max-iterations",
+        default=10,
+        type=int,
+        help="Maximum number of thresholds simulated after the first two."
+    )
+    parser.add_argument(
+        "--n-events",
+        default=None,
+        type=int,
+        help="""Events simulated per log. By default read from
+        the CORSIKA dummy file name in each log."""
+    )
+    parser.add_argument(
+        "--poll-interval",
+        default=60.,
+        type=float,
+        help="Seconds between checks of the running jobs."
+    )
+    parser.add_argument(
+        "--timeout",
+        default=86400.,
+        type=float,
+        help="""Maximum wait in seconds for the runs of one threshold,
+        by default one day."""
+    )
+    parser.add_argument(
+        "--stall-time",
+        default=1800.,
+        type=float,
+        help="""Seconds without log growth after which a started
+        run is considered failed."""
+    )
+    parser.add_argument(
+        "-o",
+        "--output",
+        default=None,
+        help="CSV file for the thresholds measured during the search."
+    )
+    # SLURM options
+    parser.add_argument(
+        "--email", 
+        default="",
+        help="Email for job notifications"
+        )
+    parser.add_argument(
+        "--mem", 
+        default="8G", 
+        help="Memory per node (e.g., 1G, 10G, etc.)"
+        )
+    parser.add_argument(
+        "-t", 
+        "--t_exp", 
+        default="2:00:00", 
+        help="Time allocated before job expires (e.g., HH:MM:SS)"
+        )
+    parser.add_argument(
+        "--partition", 
+        default="128x24",
+        help="Partition/queue name"
+        )
+    parser.add_argument(
+        "--qos",
+        default="",
+        help="Required to target VERITAS/SCT HB node. Set it to g-veritas if this is the case."
+    )
+    parser.add_argument(
+        "--account",
+        default="",
+        help="Required to target VERITAS/SCT HB node. Set it to g-veritas if this is the case"
+    )
+    parser.add_argument(
+        "--mail-type", 
+        default="FAIL",
+        help="Type of email notification to receive"
+        )
+    args = parser.parse_args()
+
+    corsika_files = find_files(args.input_dir, args.search_pattern)
+    print(f"{len(corsika_files)} files ending with {args.search_pattern} found in {args.input_dir}")
+
+    trigger_options = {
+        "trigger_pixels": args.trigger_pixels,
+        "fadc_bins": args.fadc_bins,
+        "fadc_sum_bins": args.fadc_sum_bins,
+        "disc_bins": args.disc_bins,
+        "disc_start": args.disc_start,
+        "night_type": args.night_type,
+        "NSB": args.NSB,
+    }
+    slurm_options = {
+        "email": args.email,
+        "mem": args.mem,
+        "t_exp": args.t_exp,
+        "partition": args.partition,
+        "qos": args.qos,
+        "account": args.account,
+        "mail_type": args.mail_type,
+    }
+
+    proposal, measurements = adaptive_threshold_search(
+        corsika_files,
+        args.sim_telarray_cfg,
+        args.output_dir,
+        args.target_rate,
+        args.threshold_low,
+        args.threshold_high,
+        trigger_options,
+        slurm_options,
+        n_events=args.n_events,
+        tolerance=args.tolerance,
+        threshold_tolerance=args.threshold_tolerance,
+        max_iterations=args.max_iterations,
+        poll_interval=args.poll_interval,
+        timeout=args.timeout,
+        stall_time=args.stall_time
+    )
+
+    print(measurements.to_string())
+    print(f"discriminator_threshold = {proposal['threshold']} ({proposal['reason']})")
+
+    if args.output:
+        measurements.to_csv(args.output, index=False)
+        print(f"Search history written to {args.output}")
+
+if __name__ == "__main__":
+    main()
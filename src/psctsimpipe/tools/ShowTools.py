@@ -14,7 +14,17 @@ def main():
     submit-all-psct-simtelarray-SLURM-run 
     submit-multi-psct-simtelarray-SLURM-run 
     submit-simtelarray-trigger-rate-SLURM-run
+    calculate-nsb-trigger-rates
+    calculate-bias-curves
+    search-trigger-threshold
+    build-rate-table
+    query-rate-table
+    offline-trigger-scan
+    emulate-nsb-trigger-rates
+    propose-trigger-runs
+    summarize-proton-trigger-rates
     check-sim_telarray-logs-status 
+    compact-finished-logs
     resubmit-psct-simtelarray-failed-SLURM-runs
     add-histograms
     submit-single-ctapipe-process-SLURM-run
@@ -25,6 +35,7 @@ def main():
     submit-single-corsika-SLURM-run
     submit-multi-corsika-SLURM-run
     compress-corsika-binaries
+    corsika-log-timing
     check-corsika-logs-status"""
     )
 
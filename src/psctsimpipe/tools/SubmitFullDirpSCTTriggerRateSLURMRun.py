@@ -3,6 +3,7 @@ import argparse
 import re
 
 from psctsimpipe.Helpers import find_files
+from psctsimpipe.OfflineTrigger import waveform_dump_command
 from psctsimpipe.pSCTTriggerRate import trigger_rate_command
 from psctsimpipe.SLURMScriptGen import create_slurm_script, submit_job
 
@@ -126,6 +127,21 @@ def main():
         default="60MHz",  
         help="""For output file naming purposes #MHz"""
         )
+    parser.add_argument(
+        "--no-list-triggers",
+        action="store_true",
+        help="""Do not list every trigger in the log (-C list=all).
+        Count triggers from the .simtel output with
+        calculate-nsb-trigger-rates --source simtel instead."""
+        )
+    parser.add_argument(
+        "--waveform-dump",
+        action="store_true",
+        help="""Record the waveforms of every event above
+        --discriminator_threshold in a single pixel, reading out
+        all fadc_bins, for offline-trigger-scan. --trigger_pixels,
+        --fadc_sum_bins and --no-list-triggers are ignored."""
+        )
     # SLURM options
     parser.add_argument(
         "--email", 
@@ -189,6 +205,9 @@ def main():
     args = parser.parse_args()
 
     corsika_files = find_files(args.input_dir,args.search_pattern)
+    if args.waveform_dump:
+        # Names of the dump jobs and outputs
+        args.trigger_pixels, args.fadc_sum_bins = 1, args.fadc_bins
 
     print(f"{len(corsika_files)} files ending with {args.search_pattern} found in {args.input_dir}")
 
@@ -199,23 +218,40 @@ def main():
         if match:
             seed_num = int(match.group(1))
 
-        command = trigger_rate_command(
-            corsika_f,
-            args.sim_telarray_cfg,
-            args.output_dir,
-            args.trigger_pixels,
-            args.discriminator_threshold,
-            args.fadc_bins,
-            args.fadc_sum_bins,
-            args.disc_bins,
-            args.disc_start,
-            args.trigger_current_limit,
-            args.maximum_telescopes,
-            args.trigger_telescopes,
-            # args.ignore_telescopes,
-            args.night_type,
-            args.NSB
-        )
+        if args.waveform_dump:
+            command = waveform_dump_command(
+                corsika_f,
+                args.sim_telarray_cfg,
+                args.output_dir,
+                args.discriminator_threshold,
+                args.fadc_bins,
+                args.disc_bins,
+                args.disc_start,
+                args.trigger_current_limit,
+                args.maximum_telescopes,
+                args.trigger_telescopes,
+                args.night_type,
+                args.NSB
+            )
+        else:
+            command = trigger_rate_command(
+                corsika_f,
+                args.sim_telarray_cfg,
+                args.output_dir,
+                args.trigger_pixels,
+                args.discriminator_threshold,
+                args.fadc_bins,
+                args.fadc_sum_bins,
+                args.disc_bins,
+                args.disc_start,
+                args.trigger_current_limit,
+                args.maximum_telescopes,
+                args.trigger_telescopes,
+                # args.ignore_telescopes,
+                args.night_type,
+                args.NSB,
+                not args.no_list_triggers
+            )
 
         job_name=f"seed{seed_num}_triggthresh{args.discriminator_threshold}pe_pixmult{args.trigger_pixels}_fadc_bins{args.fadc_bins}_fadc_sum_bins{args.fadc_sum_bins}_disc_bins{args.disc_bins}"
         
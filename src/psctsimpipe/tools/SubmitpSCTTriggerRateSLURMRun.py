@@ -119,6 +119,13 @@ def main():
         default="60MHz",  
         help="""For output file naming purposes #MHz"""
         )
+    parser.add_argument(
+        "--no-list-triggers",
+        action="store_true",
+        help="""Do not list every trigger in the log (-C list=all).
+        Count triggers from the .simtel output with
+        calculate-nsb-trigger-rates --source simtel instead."""
+        )
     # SLURM options
     parser.add_argument(
         "--email", 
@@ -196,7 +203,8 @@ def main():
         args.trigger_telescopes,
         # args.ignore_telescopes,
         args.night_type,
-        args.NSB
+        args.NSB,
+        not args.no_list_triggers
     )
 
     job_name=f"triggthresh{args.discriminator_threshold}pe_pixmult{args.trigger_pixels}_fadc_bins{args.fadc_bins}_fadc_sum_bins{args.fadc_sum_bins}_disc_bins{args.disc_bins}"
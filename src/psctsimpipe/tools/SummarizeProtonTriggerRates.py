@@ -0,0 +1,103 @@
+import argparse
+
+import numpy as np
+import pandas as pd
+
+from psctsimpipe.CalculateTriggerRate import cone_solid_angle
+from psctsimpipe.TriggerRateSummary import proton_summary_to_hdf5, summarize_proton_trigger_rates
+
+def main():
+    """
+    Energy threshold, effective area and integral
+    proton trigger rate of many configurations.
+    """
+    parser = argparse.ArgumentParser(
+        usage = """summarize-proton-trigger-rates \\
+            --input-table <proton_files.csv> \\
+            --output <summary.csv or summary.h5>
+            """,
+        description="""Computes for every proton histogram the integral trigger
+        rate, the peak of the differential rate (energy threshold) with its
+        half maximum range, and the maximum effective area, in one vectorised
+        pass, and writes one table. HDF5 outputs also hold the effective
+        area curves.""",
+        epilog="""The input table is a CSV with an input_file column
+        (1007/1006 export or .hdata.gz) and any parameter columns,
+        e.g. discriminator_threshold and trigger_pixels.
+        Example: \n
+        summarize-proton-trigger-rates
+        --input-table proton_files.csv
+        --output proton_summary.h5
+        """
+        )
+    parser.add_argument(
+        "--input-table",
+        default=None,
+        help="CSV with an input_file column and the configuration parameters."
+    )
+    parser.add_argument(
+        "--input-files",
+        nargs="*",
+        default=[],
+        help="Histogram files, used instead of --input-table."
+    )
+    parser.add_argument(
+        "-o",
+        "--output",
+        default=None,
+        help="CSV or HDF5 (.h5) output. Printed to terminal if not given."
+    )
+    parser.add_argument(
+        "--radius",
+        default=833.,
+        type=float,
+        help="Radius [m] of the area over which protons were generated."
+    )
+    parser.add_argument(
+        "--viewcone",
+        default=10.,
+        type=float,
+        help="Half angle [deg] of the cone over which protons were generated."
+    )
+    parser.add_argument(
+        "--flux-model",
+        default="DAMPE_proton",
+        help="Registered flux model."
+    )
+    parser.add_argument(
+        "--n-workers",
+        default=None,
+        type=int,
+        help="Number of parallel processes, by default number of CPUs."
+    )
+    args = parser.parse_args()
+
+    params = None
+    input_files = list(args.input_files)
+    if args.input_table:
+        table = pd.read_csv(args.input_table)
+        input_files = table["input_file"].tolist()
+        params = table.drop(columns="input_file")
+    if not input_files:
+        parser.error("Give --input-table or --input-files.")
+
+    summary, curves = summarize_proton_trigger_rates(
+        input_files,
+        area=np.pi*args.radius**2,
+        solid_angle=cone_solid_angle(args.viewcone),
+        flux_model=args.flux_model,
+        params=params,
+        n_workers=args.n_workers
+    )
+
+    if args.output and args.output.endswith((".h5", ".hdf5")):
+        proton_summary_to_hdf5(summary, curves, args.output)
+        print(f"{len(summary)} configurations written to {args.output}")
+    elif args.output:
+        summary.to_csv(args.output, index=False)
+        print(f"{len(summary)} configurations written to {args.output}")
+    else:
+        print(summary.to_string())
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+import numpy as np
+import pytest
+
+def _write_histo_export(path, logE):
+    """
+    Text export of a 1007/1006 y projection: ten
+    header lines then LogE, N_frac, N_trigg, N_total.
+    """
+    N_total = np.full(len(logE), 1000.)
+    N_trigg = np.round(np.linspace(10, 900, len(logE)))
+    with open(path, "w") as f:
+        f.write("#\n"*10)
+        for row in zip(logE, N_trigg/N_total, N_trigg, N_total):
+            f.write("\t".join(str(value) for value in row) + "\n")
+    return str(path)
+
+@pytest.fixture
+def histo_export(tmp_path):
+    return lambda name, logE: _write_histo_export(tmp_path/name, logE)
+
+@pytest.fixture
+def mixed_binning_files(histo_export):
+    return [
+        histo_export("fine.txt", np.round(np.arange(-1.975, 2, 0.05), 6)),
+        histo_export("coarse.txt", np.round(np.arange(-1.95, 2, 0.1), 6)),
+    ]
+
+def _make_histogram(ident, counts, x_limits=(0., 8.), y_limits=(-2., 2.), type="R"):
+    """
+    2D histogram as returned by EventIOReader.parse_histograms,
+    counts of shape (n_bins_y, n_bins_x).
+    """
+    counts = np.asarray(counts)
+    histo = {
+        "type": type,
+        "title": f"Histogram {ident}",
+        "id": ident,
+        "n_bins_x": counts.shape[1],
+        "n_bins_y": counts.shape[0],
+        "entries": int(counts.sum()),
+        "tentries": int(counts.sum()),
+        "underflow_x": 0,
+        "overflow_x": 0,
+        "underflow_y": 0,
+        "overflow_y": 0,
+        "lower_x": x_limits[0],
+        "upper_x": x_limits[1],
+        "sum_x": 0.,
+        "tsum_x": 0.,
+        "lower_y": y_limits[0],
+        "upper_y": y_limits[1],
+        "sum_y": 0.,
+        "tsum_y": 0.,
+        "counts": counts,
+    }
+    return histo
+
+@pytest.fixture
+def trigger_histograms():
+    """
+    Simulated (1006) and triggered (1007) events with 
+    16 log10(E) bins between -2 and 2, the first one empty.
+    """
+    rng = np.random.default_rng(1)
+    total = rng.integers(100, 1000, size=(16, 4))
+    total[0] = 0
+    triggered = rng.binomial(total, np.linspace(0, 0.9, 16)[:, None])
+    return {
+        1006: _make_histogram(1006, total),
+        1007: _make_histogram(1007, triggered),
+    }
@@ -0,0 +1,58 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from psctsimpipe.BiasCurve import _log_crossing, bias_curves_to_hdf5, find_bias_crossover, read_bias_curves
+
+@pytest.fixture
+def curves():
+    """
+    Bias curves linear in log10(rate): the NSB rate falls
+    a decade per p.e., the proton rate a decade per 10 p.e.
+    With 4 pixels the NSB rate is always below protons.
+    """
+    rows = []
+    for NSB, offset in [("60MHz", 0.), ("150MHz", 1.)]:
+        for multiplicity, nsb_start in [(3, 8.), (4, 2.)]:
+            for threshold in np.arange(1., 11.):
+                rows.append({
+                    "trigger_pixels": multiplicity,
+                    "discriminator_threshold": threshold,
+                    "fadc_bins": 100, "fadc_sum_bins": 100, "disc_bins": 100,
+                    "night_type": "DARK", "NSB": NSB,
+                    "nsb_rate": 10**(nsb_start + offset - threshold),
+                    "proton_rate": 10**(3 - 0.1*threshold),
+                })
+    return pd.DataFrame(rows)
+
+def test_log_crossing():
+    threshold = np.array([1., 2., 3., 4.])
+    crossing, i, fraction = _log_crossing(threshold, np.array([2., 1., -1., -2.]))
+    assert (crossing, i, fraction) == (2.5, 1, 0.5)
+    assert np.isnan(_log_crossing(threshold, np.ones(4))[0])
+
+@pytest.mark.parametrize("nsb_fraction, expected", [(1., 5/0.9), (0.1, 6/0.9)])
+def test_crossover_of_known_curves(curves, nsb_fraction, expected):
+    crossovers = find_bias_crossover(curves, nsb_fraction).set_index(["NSB", "trigger_pixels"])
+
+    dark = crossovers.loc[("60MHz", 3)]
+    assert dark["crossover_threshold"] == pytest.approx(expected)
+    assert dark["proton_rate"] == pytest.approx(10**(3 - 0.1*expected))
+    assert dark["nsb_rate"] == pytest.approx(nsb_fraction*dark["proton_rate"])
+    # One more decade of NSB moves the crossover by 1/0.9 p.e.
+    assert crossovers.loc[("150MHz", 3), "crossover_threshold"] == pytest.approx(expected + 1/0.9)
+    assert np.isnan(crossovers.loc[("60MHz", 4), "crossover_threshold"])
+
+def test_hdf5_round_trip(tmp_path, curves):
+    crossovers = find_bias_crossover(curves)
+    output = str(tmp_path/"bias.h5")
+    bias_curves_to_hdf5(curves, crossovers, output)
+
+    all_curves, all_crossovers = read_bias_curves(output)
+    assert len(all_curves) == len(curves)
+    pd.testing.assert_frame_equal(all_crossovers, crossovers, check_dtype=False)
+
+    selected, selected_crossovers = read_bias_curves(output, trigger_pixels=3, NSB="150MHz")
+    expected = curves[(curves["trigger_pixels"] == 3) & (curves["NSB"] == "150MHz")]
+    pd.testing.assert_frame_equal(selected, expected.reset_index(drop=True), check_dtype=False)
+    assert len(selected_crossovers) == 1
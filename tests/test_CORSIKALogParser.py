@@ -0,0 +1,53 @@
+import gzip
+import os
+import shutil
+
+import numpy as np
+import pytest
+
+from psctsimpipe.CORSIKALogParser import (
+    fit_corsika_cpu_time,
+    parse_corsika_log,
+    parse_corsika_log_files,
+    predict_corsika_cpu_time
+)
+
+# Three showers printed (MAXPRT 3) with cpu_time = 0.5 s*(E/1 TeV)**1.1
+CORSIKA_LOG = os.path.join(os.path.dirname(__file__), "data", "corsika_run000001.out")
+
+def test_parse_corsika_log():
+    showers, run = parse_corsika_log(CORSIKA_LOG)
+
+    assert [shower["shower"] for shower in showers] == [1, 2, 3]
+    np.testing.assert_allclose([shower["energy"] for shower in showers], [100., 1000., 10000.])
+    np.testing.assert_allclose([shower["first_interaction_height"] for shower in showers], [2.4e6, 2.3e6, 2.2e6])
+    np.testing.assert_allclose([shower["cpu_time"] for shower in showers], [0.039716, 0.5, 6.294627])
+    assert all(shower["run_number"] == 1 for shower in showers)
+
+    assert run["finished"]
+    assert (run["run_number"], run["particle_id"], run["n_showers"], run["n_generated"]) == (1, 14, 3, 3)
+    assert (run["emin"], run["emax"], run["spectral_slope"]) == (100., 10000., -2.)
+    assert run["cpu_time_per_shower"] == pytest.approx(6.834343/3)
+
+def test_fit_and_predict_cpu_time(tmp_path):
+    # Compressed logs are read the same way
+    with open(CORSIKA_LOG, "rb") as f_in, gzip.open(tmp_path/"corsika_run000001.out.gz", "wb") as f_out:
+        shutil.copyfileobj(f_in, f_out)
+    showers, runs = parse_corsika_log_files(str(tmp_path))
+    assert len(showers) == 3 and len(runs) == 1
+
+    fit = fit_corsika_cpu_time(showers, runs)
+    assert fit["index"] == pytest.approx(1.1, abs=1e-4)
+    assert fit["norm"] == pytest.approx(0.5, rel=1e-4)
+    assert fit["n_points"] == 3
+
+    # A narrow energy range costs the time of a shower at that energy
+    assert predict_corsika_cpu_time(fit, 1000., 1000.001, 10) == pytest.approx(5., rel=1e-3)
+    # E**-2 between 100 GeV and 10 TeV: 0.5 s*<E**1.1>
+    expected = 0.5*(10**0.1 - 0.1**0.1)/0.1/(1/0.1 - 1/10)
+    assert predict_corsika_cpu_time(fit, 100., 10000., 1) == pytest.approx(expected, rel=1e-3)
+
+def test_fit_needs_timed_showers():
+    showers, _ = parse_corsika_log_files(os.path.dirname(CORSIKA_LOG), "corsika_run000001.out")
+    with pytest.raises(ValueError):
+        fit_corsika_cpu_time(showers.iloc[:1])
@@ -0,0 +1,28 @@
+import numpy as np
+
+from psctsimpipe.CalculateTriggerRate import (
+    calculate_cosmic_ray_trigger_rates,
+    calculate_proton_trigger_rate,
+    calculate_proton_trigger_rates
+)
+
+def test_mixed_binning_proton_rates(mixed_binning_files):
+    totals, _ = calculate_proton_trigger_rates(mixed_binning_files, n_workers=1)
+    expected = [calculate_proton_trigger_rate(file) for file in mixed_binning_files]
+    np.testing.assert_allclose(totals["trigger_rate"], expected, rtol=1e-6)
+
+def test_mixed_binning_cosmic_ray_rates(mixed_binning_files):
+    species = {
+        name: {"input_file": file, "flux_model": "DAMPE_proton"}
+        for name, file in zip(["fine", "coarse"], mixed_binning_files)
+    }
+    rates, total = calculate_cosmic_ray_trigger_rates(species, n_workers=1)
+    expected = [calculate_proton_trigger_rate(file) for file in mixed_binning_files]
+    np.testing.assert_allclose(rates["trigger_rate"], expected, rtol=1e-6)
+    np.testing.assert_allclose(total, sum(expected), rtol=1e-6)
+
+def test_single_bin_export(histo_export):
+    single = histo_export("single.txt", [0.025])
+    rate = calculate_proton_trigger_rate(single)
+    totals, _ = calculate_proton_trigger_rates([single], n_workers=1, deltaE=0.05)
+    np.testing.assert_allclose(rate, totals["trigger_rate"][0], rtol=1e-6)
@@ -0,0 +1,83 @@
+import gzip
+
+from psctsimpipe.CheckSimTelArrayLogs import (
+    log_watch_status,
+    summarize_log_watch_state,
+    update_log_watch_state
+)
+
+def _append(path, text):
+    with open(path, "a") as f:
+        f.write(text)
+
+def test_watch_tails_new_bytes_and_carries_partial_lines(tmp_path):
+    log_file = tmp_path/"run.out"
+    log_file.write_text("Event 1\nEvent 2\nEve")
+    state = {}
+
+    assert update_log_watch_state(str(tmp_path), state, now=0.) == 2
+    log = state[str(log_file)]
+    assert log["carry"] == b"Eve"
+    assert log["offset"] == log_file.stat().st_size
+
+    _append(log_file, "nt 3\nEvent 4\n")
+    assert update_log_watch_state(str(tmp_path), state, now=10.) == 2
+    assert log["events"] == 4
+    assert log["carry"] == b""
+
+    assert update_log_watch_state(str(tmp_path), state, now=20.) == 0
+    assert log["last_growth"] == 10.
+
+def test_watch_rereads_truncated_log(tmp_path):
+    log_file = tmp_path/"run.out"
+    log_file.write_text("Event 1\nEvent 2\nEvent 3\n")
+    state = {}
+    update_log_watch_state(str(tmp_path), state, now=0.)
+
+    log_file.write_text("Event 1\n")
+    assert update_log_watch_state(str(tmp_path), state, now=10.) == 1
+    assert state[str(log_file)]["events"] == 1
+
+def test_watch_stalled_status(tmp_path):
+    log_file = tmp_path/"run.out"
+    log_file.write_text("Event 1\n")
+    state = {}
+    update_log_watch_state(str(tmp_path), state, now=0.)
+    update_log_watch_state(str(tmp_path), state, now=100.)
+
+    log = state[str(log_file)]
+    assert log_watch_status(log, stall_time=50., now=100.) == "stalled"
+    assert log_watch_status(log, stall_time=200., now=100.) == "running"
+
+    _append(log_file, "Event 2\n")
+    update_log_watch_state(str(tmp_path), state, now=110.)
+    assert log_watch_status(log, stall_time=50., now=110.) == "running"
+
+def test_watch_tracks_rerun_of_finished_log(tmp_path):
+    log_file = tmp_path/"run.out"
+    log_file.write_text("Event 1\nSim_telarray finished\n")
+    state = {}
+    update_log_watch_state(str(tmp_path), state, now=0.)
+    assert summarize_log_watch_state(state, now=0.)["finished"] == 1
+
+    # Unchanged terminal logs are not read again
+    update_log_watch_state(str(tmp_path), state, now=10.)
+    assert state[str(log_file)]["events"] == 1
+
+    log_file.write_text("Event 1\nEvent 2\n")
+    assert update_log_watch_state(str(tmp_path), state, now=20.) == 2
+    assert summarize_log_watch_state(state, now=20.)["running"] == 1
+
+def test_watch_follows_plain_rerun_next_to_compressed_log(tmp_path):
+    with gzip.open(tmp_path/"run.out.gz", "wt") as f:
+        f.write("Event 1\nSegmentation fault\n")
+    state = {}
+    update_log_watch_state(str(tmp_path), state, now=0.)
+    assert summarize_log_watch_state(state, now=0.)["failed"] == 1
+
+    (tmp_path/"run.out").write_text("Event 1\n")
+    update_log_watch_state(str(tmp_path), state, now=10.)
+    update_log_watch_state(str(tmp_path), state, now=20.)
+    assert list(state) == [str(tmp_path/"run.out")]
+    assert state[str(tmp_path/"run.out")]["events"] == 1
+    assert summarize_log_watch_state(state, now=20.)["running"] == 1
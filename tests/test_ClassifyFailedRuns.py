@@ -0,0 +1,58 @@
+import gzip
+import os
+import shutil
+
+import pytest
+
+from psctsimpipe.ClassifyFailedRuns import (
+    FAILURE_RULES,
+    UNKNOWN_FAILURE,
+    classify_failed_runs,
+    classify_failure,
+    count_failure_categories,
+    is_retryable_failure
+)
+
+# One .out/.error pair per failure category, named after it
+FAILED_RUNS = os.path.join(os.path.dirname(__file__), "data", "failed_runs")
+
+CATEGORIES = [category for category, _, _ in FAILURE_RULES] + [UNKNOWN_FAILURE]
+NOT_RETRYABLE = {"corrupt_corsika_input", "segfault", "missing_input", "config_error"}
+
+def _log_file(category):
+    return os.path.join(FAILED_RUNS, f"{category}.out")
+
+def test_every_category_has_a_fixture():
+    assert sorted(CATEGORIES) == sorted(
+        os.path.splitext(filename)[0]
+        for filename in os.listdir(FAILED_RUNS)
+        if filename.endswith(".out")
+    )
+
+@pytest.mark.parametrize("category", CATEGORIES)
+def test_classify_failure(category):
+    assert classify_failure(_log_file(category)) == category
+    assert is_retryable_failure(category) == (category not in NOT_RETRYABLE)
+
+def test_classify_compressed_log(tmp_path):
+    log_file = tmp_path/"segfault.out.gz"
+    with open(_log_file("segfault"), "rb") as f_in, gzip.open(log_file, "wb") as f_out:
+        shutil.copyfileobj(f_in, f_out)
+    shutil.copy(os.path.join(FAILED_RUNS, "segfault.error"), tmp_path/"segfault.error")
+
+    assert classify_failure(str(log_file)) == "segfault"
+
+def test_is_retryable_failure_with_chosen_categories():
+    assert is_retryable_failure("segfault", retry_categories={"segfault"})
+    assert not is_retryable_failure("walltime_exceeded", retry_categories={"segfault"})
+
+def test_classify_failed_runs():
+    log_status = {_log_file(category): False for category in CATEGORIES}
+    log_status[_log_file("unknown")] = True
+
+    classification = classify_failed_runs(log_status)
+    assert classification == {
+        _log_file(category): category
+        for category in CATEGORIES if category != UNKNOWN_FAILURE
+    }
+    assert set(count_failure_categories(classification).values()) == {1}
@@ -0,0 +1,41 @@
+import numpy as np
+import pandas as pd
+
+from psctsimpipe.CalculateTriggerRate import read_histo_output
+from psctsimpipe.EventIOReader import read_hdata_histograms, trigger_fraction_from_hdata
+from psctsimpipe.HESSioAddHistograms import write_hdata_histograms
+
+def test_hdata_round_trip(tmp_path, trigger_histograms):
+    hdata_file = str(tmp_path/"run.hdata.gz")
+    write_hdata_histograms(trigger_histograms, hdata_file)
+
+    histograms = read_hdata_histograms(hdata_file, ids=[1006, 1007])
+    assert sorted(histograms) == [1006, 1007]
+    for ident, histo in histograms.items():
+        np.testing.assert_array_equal(histo["counts"], trigger_histograms[ident]["counts"])
+        np.testing.assert_allclose(histo["x_edges"], np.linspace(0, 8, 5))
+        np.testing.assert_allclose(histo["y_edges"], np.linspace(-2, 2, 17))
+        assert histo["entries"] == trigger_histograms[ident]["entries"]
+
+def test_hdata_matches_text_export(tmp_path, trigger_histograms):
+    hdata_file = str(tmp_path/"run.hdata.gz")
+    write_hdata_histograms(trigger_histograms, hdata_file)
+
+    # Text export of the 1007/1006 y projection, "*" where nothing was simulated
+    N_total = trigger_histograms[1006]["counts"].sum(axis=1)
+    N_trigg = trigger_histograms[1007]["counts"].sum(axis=1)
+    logE = np.arange(-1.875, 2, 0.25)
+    export_file = tmp_path/"run.txt"
+    with open(export_file, "w") as f:
+        f.write("#\n"*10)
+        for row in zip(logE, N_trigg, N_total):
+            N_frac = row[1]/row[2] if row[2] else "*"
+            f.write(f"{row[0]}\t{N_frac}\t{row[1]}\t{row[2]}\n")
+
+    native = trigger_fraction_from_hdata(hdata_file)
+    np.testing.assert_allclose(native["LogE_high"] - native["LogE_low"], 0.25)
+    pd.testing.assert_frame_equal(
+        read_histo_output(hdata_file)[["LogE", "N_frac", "N_trigg", "N_total"]].reset_index(drop=True),
+        read_histo_output(export_file).reset_index(drop=True),
+        check_dtype=False
+    )
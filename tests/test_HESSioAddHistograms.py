@@ -0,0 +1,64 @@
+import copy
+
+import h5py
+import numpy as np
+import pytest
+
+from psctsimpipe.EventIOReader import read_hdata_histograms
+from psctsimpipe.HESSioAddHistograms import (
+    add_histogram,
+    sum_hdata_histograms,
+    write_hdata_histograms,
+    write_histograms_hdf5
+)
+
+@pytest.fixture
+def hdata_files(tmp_path, trigger_histograms):
+    second = copy.deepcopy(trigger_histograms)
+    for histo in second.values():
+        histo["counts"] = histo["counts"][::-1]
+    files = [str(tmp_path/"run1.hdata.gz"), str(tmp_path/"run2.hdata.gz")]
+    write_hdata_histograms(trigger_histograms, files[0])
+    write_hdata_histograms(second, files[1])
+    return files, [trigger_histograms, second]
+
+def test_sum_write_read_round_trip(tmp_path, hdata_files):
+    files, histograms = hdata_files
+    total = sum_hdata_histograms(files, n_workers=2)
+
+    output = str(tmp_path/"sum.hdata.gz")
+    write_hdata_histograms(total, output)
+    summed = read_hdata_histograms(output)
+
+    for ident in (1006, 1007):
+        np.testing.assert_array_equal(
+            summed[ident]["counts"],
+            histograms[0][ident]["counts"] + histograms[1][ident]["counts"]
+        )
+        assert summed[ident]["entries"] == histograms[0][ident]["entries"] + histograms[1][ident]["entries"]
+        np.testing.assert_array_equal(summed[ident]["y_edges"], read_hdata_histograms(files[0])[ident]["y_edges"])
+
+def test_int32_overflow(tmp_path, hdata_files):
+    files, _ = hdata_files
+    total = sum_hdata_histograms(files, n_workers=1)
+
+    counts = copy.deepcopy(total)
+    counts[1006]["counts"][1, 1] = np.iinfo(np.int32).max + 1
+    with pytest.raises(OverflowError):
+        write_hdata_histograms(counts, str(tmp_path/"counts.hdata.gz"))
+
+    entries = copy.deepcopy(total)
+    entries[1007]["entries"] = np.iinfo(np.int32).max + 1
+    with pytest.raises(OverflowError):
+        write_hdata_histograms(entries, str(tmp_path/"entries.hdata.gz"))
+
+    # HDF5 keeps 64 bit sums
+    write_histograms_hdf5(counts, str(tmp_path/"sum.h5"))
+    with h5py.File(tmp_path/"sum.h5", "r") as f:
+        assert f["histogram_1006/counts"][1, 1] == np.iinfo(np.int32).max + 1
+
+def test_different_binning_cannot_be_added(trigger_histograms):
+    other = copy.deepcopy(trigger_histograms[1006])
+    other["upper_y"] = 3.
+    with pytest.raises(ValueError):
+        add_histogram(trigger_histograms[1006], other)
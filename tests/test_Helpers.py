@@ -0,0 +1,27 @@
+import gzip
+
+import pytest
+
+from psctsimpipe.Helpers import count_phrases_in_file
+
+TEXT = b"a"*10 + b"\nEvent 1 has triggered!\nEvent 2 has triggered!\n" + b"aa"*3
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 3, 4, 7, 16, 1 << 24])
+def test_count_phrases_across_chunk_boundaries(tmp_path, chunk_size):
+    phrases = [b"aa", b"aaa", "has triggered!", "\n"]
+    expected = {phrase: TEXT.count(phrase.encode() if isinstance(phrase, str) else phrase) for phrase in phrases}
+    # Self-overlapping phrase straddling a boundary: 10 "a" are 5 "aa", not 6
+    assert expected[b"aa"] == 5 + 3
+
+    plain = tmp_path/"run.out"
+    plain.write_bytes(TEXT)
+    assert count_phrases_in_file(str(plain), phrases, chunk_size) == expected
+
+    compressed = tmp_path/"run.out.gz"
+    with gzip.open(compressed, "wb") as f:
+        f.write(TEXT)
+    assert count_phrases_in_file(str(compressed), phrases, chunk_size) == expected
+
+def test_self_overlapping_phrase_at_chunk_boundary(tmp_path):
+    (tmp_path/"a.txt").write_bytes(b"a"*10)
+    assert count_phrases_in_file(str(tmp_path/"a.txt"), [b"aa"], chunk_size=3) == {b"aa": 5}
@@ -0,0 +1,52 @@
+import gzip
+import os
+
+import pytest
+
+import psctsimpipe.LogCompaction as LogCompaction
+from psctsimpipe.CheckSimTelArrayLogs import return_log_file_status
+from psctsimpipe.LogCompaction import compact_finished_logs
+
+@pytest.fixture
+def compacted_logs(tmp_path):
+    (tmp_path/"run1.out").write_text("Event 1 has triggered!\nSim_telarray finished\n")
+    (tmp_path/"run2.out").write_text("Event 1 has triggered!\nSegmentation fault\n")
+    compact_finished_logs(str(tmp_path), n_workers=1)
+    return tmp_path
+
+def test_status_of_compacted_logs_uses_cache(compacted_logs, monkeypatch):
+    read_last_line = LogCompaction.read_last_line
+    def plain_only(file_path, *args):
+        assert not file_path.endswith(".gz"), f"{file_path} was decompressed"
+        return read_last_line(file_path, *args)
+    monkeypatch.setattr(LogCompaction, "read_last_line", plain_only)
+
+    status = {os.path.basename(name): value for name, value in return_log_file_status(str(compacted_logs)).items()}
+    assert status == {"run1.out.gz": True, "run2.out": False}
+
+def test_stale_cache_entry_is_ignored(compacted_logs):
+    with gzip.open(compacted_logs/"run1.out.gz", "wb") as f:
+        f.write(b"Segmentation fault\n")
+
+    status = {os.path.basename(name): value for name, value in return_log_file_status(str(compacted_logs)).items()}
+    assert status["run1.out.gz"] is False
+
+def test_metrics_cached_before_compression(tmp_path, monkeypatch):
+    (tmp_path/"run1.out").write_text("Event 1 has triggered!\nSim_telarray finished\n")
+    def no_space_left(*args):
+        raise OSError("No space left on device")
+    monkeypatch.setattr(LogCompaction, "compress_log_file", no_space_left)
+
+    compact_finished_logs(str(tmp_path), n_workers=1)
+
+    cache = LogCompaction.load_log_cache(str(tmp_path))
+    assert cache["run1.out"]["finished"]
+    assert cache["run1.out"]["phrase_counts"] == {"has triggered!": 1}
+    assert "size" not in cache["run1.out"]
+    assert (tmp_path/"run1.out").exists()
+
+def test_compressed_file_recorded_in_cache(compacted_logs):
+    cache = LogCompaction.load_log_cache(str(compacted_logs))
+    stat = os.stat(compacted_logs/"run1.out.gz")
+    assert (cache["run1.out"]["size"], cache["run1.out"]["mtime_ns"]) == (stat.st_size, stat.st_mtime_ns)
+    assert "size" not in cache["run2.out"]
@@ -0,0 +1,35 @@
+import numpy as np
+
+from psctsimpipe.NSBEmulator import emulate_nsb_trigger_rates, simulate_nsb_waveforms
+
+CONFIGURATIONS = [
+    {"NSB": "1MHz", "disc_bins": 20, "trigger_pixels": multiplicity, "discriminator_threshold": threshold}
+    for multiplicity in (1, 2) for threshold in (0.5, 1.5)
+]
+
+def _emulate(**kwargs):
+    # Delta pulse without amplitude spread: a pixel fires with every photoelectron
+    options = dict(n_events=4000, n_pixels=10, pulse=[1.], pe_spread=0., ac_coupling=False, seed=7, chunk_size=500)
+    options.update(kwargs)
+    return emulate_nsb_trigger_rates(CONFIGURATIONS, **options).set_index(["trigger_pixels", "discriminator_threshold"])
+
+def test_single_pixel_rate_matches_poisson():
+    table = _emulate(n_workers=1)
+    # P(at least one photoelectron in 10 pixels x 20 samples of 1 ns at 1 MHz)
+    probability = 1 - np.exp(-1e-3*10*20)
+    triggers = table.loc[(1, 0.5), "triggers"]
+    assert abs(triggers - 4000*probability) < 5*np.sqrt(4000*probability*(1 - probability))
+    assert table.loc[(1, 0.5), "exposure"] == 4000*20*1e-9
+
+def test_rates_fall_with_threshold_and_multiplicity():
+    triggers = _emulate(n_workers=1)["triggers"]
+    assert triggers[(1, 0.5)] > triggers[(2, 0.5)] > 0
+    assert triggers[(1, 0.5)] > triggers[(1, 1.5)]
+
+def test_reproducible_across_workers():
+    np.testing.assert_array_equal(_emulate(n_workers=1)["triggers"], _emulate(n_workers=2)["triggers"])
+
+def test_ac_coupled_waveforms_have_zero_mean():
+    waveforms = simulate_nsb_waveforms(np.random.default_rng(0), 20, 50, 100, 60., [0.5, 1., 0.5])
+    assert waveforms.shape == (20, 50, 100)
+    assert abs(waveforms.mean()) < 0.01
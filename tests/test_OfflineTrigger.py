@@ -0,0 +1,42 @@
+import numpy as np
+import pytest
+
+from psctsimpipe.OfflineTrigger import emulate_majority_trigger, majority_trigger_levels
+
+def _waveforms():
+    """
+    One event, four pixels: pixel 0 peaks at 5 at sample 0,
+    pixels 1 and 2 at 4 and 3 at sample 2, pixel 3 stays at 0.
+    """
+    waveforms = np.zeros((1, 4, 5))
+    waveforms[0, 0, 0] = 5
+    waveforms[0, 1, 2] = 4
+    waveforms[0, 2, 2] = 3
+    return waveforms
+
+def test_levels_without_gate():
+    levels = majority_trigger_levels(_waveforms(), 4)
+    np.testing.assert_array_equal(levels, [[5, 3, 0, 0]])
+
+def test_gate_stretches_signals():
+    # Pixel 0 is still above 4 two samples later
+    levels = majority_trigger_levels(_waveforms(), 4, gate_samples=3)
+    np.testing.assert_array_equal(levels, [[5, 4, 3, 0]])
+
+def test_trigger_groups_padded():
+    groups = [[0, 1, -1], [2, 3, -1]]
+    levels = majority_trigger_levels(_waveforms(), 4, gate_samples=3, trigger_groups=groups)
+    # Padding never counts as a pixel and no group holds four pixels
+    np.testing.assert_array_equal(levels, [[5, 4, -np.inf, -np.inf]])
+
+def test_multiplicity_larger_than_camera():
+    levels = majority_trigger_levels(_waveforms(), 6)
+    assert levels.shape == (1, 6)
+    assert np.all(levels[0, 4:] == -np.inf)
+
+def test_emulated_decisions():
+    triggered = emulate_majority_trigger(_waveforms(), [2.5, 3.5], [1, 2], gate_samples=3)
+    assert triggered.shape == (2, 2, 1)
+    np.testing.assert_array_equal(triggered[:, :, 0], [[True, True], [True, True]])
+    triggered = emulate_majority_trigger(_waveforms(), [4.5], [1, 2, 3], gate_samples=3)
+    np.testing.assert_array_equal(triggered[0, :, 0], [True, False, False])
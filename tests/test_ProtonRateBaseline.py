@@ -0,0 +1,69 @@
+"""
+The unit-free core must reproduce the astropy Quantity
+calculation it replaced (baseline calculate_proton_trigger_rate
+and proton_trigger_rate_pdtable, uniform bins of deltaE=0.05).
+"""
+import importlib.resources
+
+import astropy.units as u
+import numpy as np
+import pytest
+from scipy.interpolate import CubicSpline
+
+from psctsimpipe.CalculateTriggerRate import (
+    calculate_proton_trigger_rate,
+    cone_solid_angle,
+    proton_trigger_rate_pdtable,
+    read_histo_output
+)
+from psctsimpipe.FluxModels import read_DAMPE_flux
+
+AREA = np.pi*(833)**2
+SOLID_ANGLE = cone_solid_angle(10)
+
+def _baseline_DAMPE_flux(Energy):
+    with importlib.resources.files("psctsimpipe.data").joinpath("DAMPE_proton_flux.txt").open("rb") as f:
+        data = read_DAMPE_flux(f)
+    DAMPE_energy = data["E"]/1000
+    DAMPE_flux = data['F_invGeV_invsqmeter_inversec_invsr']*1000
+    interpolated_flux = CubicSpline(np.log10(DAMPE_energy), np.log10(DAMPE_flux))
+    return (10**interpolated_flux(np.log10(Energy)))*(u.m**(-2))*(u.sr**(-1))*(u.s**(-1))*(u.TeV**(-1))
+
+def _baseline_table(input_file):
+    data = read_histo_output(input_file)
+    deltaE = 0.05
+
+    # Plain arrays: recent pandas no longer keeps a Series of Quantity
+    logE = data["LogE"].to_numpy()
+    N_frac = data["N_frac"].to_numpy()
+    Elow = u.TeV*10**(logE-deltaE/2)
+    Ehigh = u.TeV*10**(logE+deltaE/2)
+    E_bin_widths = Ehigh-Elow
+
+    interp_flux = _baseline_DAMPE_flux(10**logE)
+    integral_flux = E_bin_widths*interp_flux
+
+    return {
+        "flux": interp_flux,
+        "integral_flux": integral_flux,
+        "Energy": u.TeV*10**logE,
+        "low_Ebin_edge": Elow,
+        "high_Ebin_edge": Ehigh,
+        "trigger_rate": (AREA*(u.m**2))*N_frac*(SOLID_ANGLE*u.sr)*integral_flux,
+        "Aeff": (AREA*(u.m**2))*N_frac*(SOLID_ANGLE*u.sr),
+    }
+
+@pytest.fixture
+def export_file(histo_export):
+    return histo_export("fine.txt", np.round(np.arange(-1.975, 2, 0.05), 6))
+
+def test_total_rate_matches_baseline(export_file):
+    baseline = np.sum(_baseline_table(export_file)["trigger_rate"])
+    assert baseline.unit == u.Hz
+    np.testing.assert_allclose(calculate_proton_trigger_rate(export_file), baseline.value, rtol=1e-14)
+
+def test_rate_table_matches_baseline(export_file):
+    table = proton_trigger_rate_pdtable(export_file)
+    for column, baseline in _baseline_table(export_file).items():
+        unit = u.Unit(table.attrs["units"][column])
+        np.testing.assert_allclose(table[column], baseline.to_value(unit), rtol=1e-14, err_msg=column)
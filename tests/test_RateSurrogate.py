@@ -0,0 +1,72 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from psctsimpipe.RateSurrogate import RateSurrogate, _negative_log_marginal_likelihood, propose_next_points
+
+FEATURES = ("discriminator_threshold", "trigger_pixels")
+
+def _log_rate(points):
+    threshold = points["discriminator_threshold"]
+    return 6 - 0.5*threshold - 0.05*threshold**2 - 0.3*points["trigger_pixels"]
+
+def _results(thresholds, pixels, seed=0):
+    grid = pd.DataFrame(
+        [(t, p) for t in thresholds for p in pixels],
+        columns=list(FEATURES)
+    )
+    rate = 10**_log_rate(grid)
+    grid["exposure"] = 1.
+    grid["triggers"] = np.random.default_rng(seed).poisson(rate)
+    return grid
+
+@pytest.fixture
+def surrogate():
+    return RateSurrogate(FEATURES).fit(_results([1, 2, 3, 4, 5], [2, 3, 4]), seed=1)
+
+def test_marginal_likelihood_gradient():
+    rng = np.random.default_rng(2)
+    X = rng.normal(size=(8, 2))
+    y = rng.normal(size=8)
+    noise = np.full(8, 0.01)
+    theta = np.array([0.2, -0.3, np.log(0.5), np.log(1e-3)])
+
+    _, gradient = _negative_log_marginal_likelihood(theta, X, y, noise)
+    step = 1e-6
+    numerical = [
+        (_negative_log_marginal_likelihood(theta + step*e, X, y, noise)[0]
+         - _negative_log_marginal_likelihood(theta - step*e, X, y, noise)[0])/(2*step)
+        for e in np.eye(len(theta))
+    ]
+    np.testing.assert_allclose(gradient, numerical, rtol=1e-5, atol=1e-8)
+
+def test_predict_single_configuration(surrogate):
+    point = {"discriminator_threshold": 2.5, "trigger_pixels": 3}
+    mean, std = surrogate.predict(point)
+    frame_mean, frame_std = surrogate.predict(pd.DataFrame([point]))
+    assert mean.shape == (1,)
+    np.testing.assert_allclose([mean[0], std[0]], [frame_mean[0], frame_std[0]])
+    assert mean[0] == pytest.approx(_log_rate(point), abs=0.1)
+    assert len(surrogate.predict_rate(point)) == 1
+
+def test_proposals_shrink_posterior_variance(surrogate):
+    candidates = pd.DataFrame(
+        [(t, p) for t in np.arange(1, 8.5, 0.5) for p in [2, 3, 4]],
+        columns=list(FEATURES)
+    )
+    _, std_before = surrogate.predict(candidates)
+    proposals = propose_next_points(surrogate, candidates, n_points=3, target_std=0.)
+
+    # The most uncertain candidate comes first
+    assert proposals["log10_rate_std"][0] == pytest.approx(std_before.max())
+
+    # Simulating the proposals leaves the candidates better known
+    new = proposals[list(FEATURES)].copy()
+    new["exposure"] = 1.
+    new["triggers"] = np.random.default_rng(5).poisson(10**_log_rate(new))
+    results = pd.concat([_results([1, 2, 3, 4, 5], [2, 3, 4]), new], ignore_index=True)
+    refitted = RateSurrogate(FEATURES).fit(results, seed=1)
+    _, std_after = refitted.predict(candidates)
+    assert std_after.max() < std_before.max()
+    _, std_at_proposals = refitted.predict(proposals)
+    assert np.all(std_at_proposals < proposals["log10_rate_std"])
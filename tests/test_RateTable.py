@@ -0,0 +1,30 @@
+import itertools
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from psctsimpipe.RateTable import build_rate_table
+
+@pytest.fixture
+def single_zenith_table():
+    rows = [
+        {"thr": thr, "NSB": f"{nsb}MHz", "zen": 20, "night_type": night, "trigger_rate": 10**(5 - thr + nsb/100)}
+        for thr, nsb, night in itertools.product([1.0, 1.5, 2.0], [60, 120], ["DARK", "HALFMOON"])
+    ]
+    return build_rate_table(pd.DataFrame(rows), ["thr", "NSB", "zen", "night_type"])
+
+def test_array_matches_scalar_queries(single_zenith_table):
+    points = {
+        "thr": [1.5, 1.2, 0.5, 2.0],
+        "NSB": [90, "60MHz", 100, 120],
+        "zen": [20, 20, 20, 25],
+        "night_type": ["DARK", "HALFMOON", "DARK", "DARK"],
+    }
+    for extrapolate in [False, True]:
+        rates, extrapolated = single_zenith_table.evaluate(extrapolate, **points)
+        for i in range(len(rates)):
+            rate, flag = single_zenith_table.evaluate(extrapolate, **{name: values[i] for name, values in points.items()})
+            assert flag == extrapolated[i]
+            np.testing.assert_allclose(rate, rates[i], rtol=1e-12)
+    assert extrapolated.tolist() == [False, False, True, True]
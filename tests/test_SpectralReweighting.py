@@ -0,0 +1,81 @@
+import h5py
+import numpy as np
+import pytest
+
+from psctsimpipe.FluxModels import register_power_law_flux_model
+from psctsimpipe.SpectralReweighting import (
+    RUN_TABLE,
+    SHOWER_TABLE,
+    WEIGHTS_GROUP,
+    read_generation_parameters,
+    reweight_dl1_file
+)
+
+ENERGY_MIN, ENERGY_MAX = 0.01, 100.
+
+@pytest.fixture
+def dl1_file(tmp_path):
+    """
+    ctapipe-like DL1 file: two runs of 500 showers reused 
+    10 times, E**-2 between 10 GeV and 100 TeV, and 1000 
+    true energies stored in GeV.
+    """
+    runs = np.array(
+        [(ENERGY_MIN, ENERGY_MAX, 1000., 0., 10., -2., 500, 10)]*2,
+        dtype=[
+            ("energy_range_min", "f8"), ("energy_range_max", "f8"),
+            ("max_scatter_range", "f8"), ("min_viewcone_radius", "f8"),
+            ("max_viewcone_radius", "f8"), ("spectral_index", "f8"),
+            ("n_showers", "i8"), ("shower_reuse", "i8"),
+        ]
+    )
+    rng = np.random.default_rng(3)
+    energy = ENERGY_MIN*(ENERGY_MAX/ENERGY_MIN)**rng.random(1000)
+    energy[0] = 2*ENERGY_MAX
+    showers = np.zeros(1000, dtype=[("event_id", "i8"), ("true_energy", "f8")])
+    showers["event_id"] = np.arange(1000)
+    showers["true_energy"] = energy*1000
+
+    path = str(tmp_path/"dl1.h5")
+    with h5py.File(path, "w") as f:
+        run_table = f.create_dataset(RUN_TABLE, data=runs)
+        for column, unit in [("energy_range_min", "TeV"), ("energy_range_max", "TeV"),
+                             ("max_scatter_range", "m"), ("min_viewcone_radius", "deg"),
+                             ("max_viewcone_radius", "deg")]:
+            run_table.attrs[f"{column}_UNIT"] = unit
+        shower_table = f.create_dataset(SHOWER_TABLE, data=showers)
+        shower_table.attrs["true_energy_UNIT"] = "GeV"
+    return path
+
+def test_generation_parameters(dl1_file):
+    generation = read_generation_parameters(dl1_file)
+    assert generation["n_showers"] == 10000
+    assert generation["area"] == pytest.approx(np.pi*1000.**2)
+    assert generation["solid_angle"] == pytest.approx(2*np.pi*(1 - np.cos(np.radians(10))))
+
+def test_weights_follow_power_law_ratio(dl1_file):
+    register_power_law_flux_model("test_power_law", 1e-4, 2.7)
+    generation = read_generation_parameters(dl1_file)
+    total = reweight_dl1_file(dl1_file, "test_power_law")
+
+    with h5py.File(dl1_file, "r") as f:
+        weights = f[WEIGHTS_GROUP]["test_power_law"][:]
+        energy = f[SHOWER_TABLE]["true_energy"]/1000
+
+    # flux/pdf of an E**-2.7 target over an E**-2 simulation
+    norm = 1/ENERGY_MIN - 1/ENERGY_MAX
+    phase_space = generation["area"]*generation["solid_angle"]/generation["n_showers"]
+    expected = np.where(energy <= ENERGY_MAX, 1e-4*norm*phase_space*energy**-0.7, 0.)
+    np.testing.assert_allclose(weights, expected, rtol=1e-12)
+    assert weights[0] == 0
+    assert total == pytest.approx(expected.sum(), rel=1e-12)
+
+def test_chunked_weights_match(dl1_file, tmp_path):
+    whole = str(tmp_path/"whole.h5")
+    chunked = str(tmp_path/"chunked.h5")
+    total = reweight_dl1_file(dl1_file, output_file=whole)
+    total_chunked = reweight_dl1_file(dl1_file, output_file=chunked, chunk_size=7)
+
+    assert total_chunked == pytest.approx(total, rel=1e-12)
+    with h5py.File(whole, "r") as f, h5py.File(chunked, "r") as g:
+        np.testing.assert_array_equal(f[WEIGHTS_GROUP]["DAMPE_proton"][:], g[WEIGHTS_GROUP]["DAMPE_proton"][:])
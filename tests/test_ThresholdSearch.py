@@ -0,0 +1,67 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from psctsimpipe.ThresholdSearch import propose_next_threshold, wait_for_logs
+
+def _measurements(thresholds, rates, exposure=1.):
+    return pd.DataFrame({
+        "discriminator_threshold": thresholds,
+        "triggers": np.asarray(rates, dtype=float)*exposure,
+        "exposure": exposure,
+    })
+
+def test_secant_step_inside_bracket():
+    # log(rate) is linear in the threshold: the secant lands on the target
+    proposal = propose_next_threshold(_measurements([5, 15], [10000, 100]), 1000)
+    assert proposal["reason"] == "bracketed"
+    assert not proposal["converged"]
+    assert proposal["threshold"] == pytest.approx(10)
+
+def test_bisection_when_secant_hugs_the_bracket_edge():
+    proposal = propose_next_threshold(_measurements([5, 15], [1e6, 900]), 1000)
+    assert proposal["reason"] == "bracketed"
+    assert proposal["threshold"] == pytest.approx(10)
+
+def test_extrapolation_before_bracketing():
+    proposal = propose_next_threshold(_measurements([5, 10], [1e5, 1e4]), 1000)
+    assert proposal["reason"] == "extrapolated"
+    assert proposal["threshold"] == pytest.approx(15)
+
+@pytest.mark.parametrize("measurements, reason", [
+    (_measurements([5, 15], [10000, 1020]), "within tolerance"),
+    (_measurements([5, 15], [10000, 1200], exposure=0.01), "within statistical uncertainty"),
+    (_measurements([5, 5.04], [10000, 100]), "bracket below threshold_tolerance"),
+])
+def test_stopping_rules(measurements, reason):
+    proposal = propose_next_threshold(measurements, 1000)
+    assert proposal["converged"]
+    assert proposal["reason"] == reason
+
+def test_single_measurement_cannot_start_the_search():
+    with pytest.raises(ValueError):
+        propose_next_threshold(_measurements([5], [10000]), 1000)
+
+def test_wait_for_logs(tmp_path):
+    (tmp_path/"done.log").write_text("Event 1\nSim_telarray finished\n")
+    (tmp_path/"killed.log").write_text("Event 1\n")
+    (tmp_path/"seed2_1.error").write_text(
+        "slurmstepd: error: *** JOB 1 ON node CANCELLED AT 2024-01-01 DUE TO TIME LIMIT ***\n"
+    )
+    (tmp_path/"stuck.log").write_text("Event 1\n")
+    log_files = {
+        str(tmp_path/"done.log"): str(tmp_path/"seed1_*.error"),
+        str(tmp_path/"killed.log"): str(tmp_path/"seed2_*.error"),
+        str(tmp_path/"stuck.log"): str(tmp_path/"seed3_*.error"),
+    }
+
+    finished, failed = wait_for_logs(log_files, poll_interval=0.01, stall_time=0., error_files=log_files)
+    assert finished == [str(tmp_path/"done.log")]
+    assert failed == {
+        str(tmp_path/"killed.log"): "walltime_exceeded",
+        str(tmp_path/"stuck.log"): "stalled",
+    }
+
+def test_wait_for_logs_timeout(tmp_path):
+    with pytest.raises(TimeoutError):
+        wait_for_logs([str(tmp_path/"queued.log")], poll_interval=0.01, timeout=0.05)
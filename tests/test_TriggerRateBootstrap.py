@@ -0,0 +1,36 @@
+import numpy as np
+import pytest
+
+from psctsimpipe.TriggerRateBootstrap import bootstrap_proton_trigger_rate
+
+N_REPLICAS = 20000
+
+def test_single_bin_matches_binomial_variance():
+    result = bootstrap_proton_trigger_rate(
+        [0.], [300], [1000], deltaE=0.05, n_replicas=N_REPLICAS,
+        flux_errors=(), seed=1, return_replicas=True
+    )
+    p = 0.3
+    expected_std = result["trigger_rate"]*np.sqrt((1 - p)/(p*1000))
+
+    replicas = result["replicas"]
+    assert abs(replicas.mean() - result["trigger_rate"]) < 5*expected_std/np.sqrt(N_REPLICAS)
+    # Relative precision of a standard deviation from n replicas is 1/sqrt(2n)
+    assert result["trigger_rate_std"] == pytest.approx(expected_std, rel=5/np.sqrt(2*N_REPLICAS))
+    assert result["trigger_rate_low"] < result["trigger_rate"] < result["trigger_rate_high"]
+
+def test_replica_mean_matches_central_rate():
+    logE = np.round(np.arange(-1.975, 2, 0.05), 6)
+    N_total = np.full(len(logE), 1000)
+    N_trigg = np.round(np.linspace(10, 900, len(logE)))
+    result = bootstrap_proton_trigger_rate(
+        logE, N_trigg, N_total, n_replicas=N_REPLICAS, seed=2, return_replicas=True
+    )
+    standard_error = result["trigger_rate_std"]/np.sqrt(N_REPLICAS)
+    assert abs(result["replicas"].mean() - result["trigger_rate"]) < 5*standard_error
+
+def test_seed_reproducibility():
+    kwargs = dict(deltaE=0.05, n_replicas=100, return_replicas=True)
+    first = bootstrap_proton_trigger_rate([0., 0.05], [10, 20], [100, 100], seed=3, **kwargs)
+    second = bootstrap_proton_trigger_rate([0., 0.05], [10, 20], [100, 100], seed=3, **kwargs)
+    np.testing.assert_array_equal(first["replicas"], second["replicas"])
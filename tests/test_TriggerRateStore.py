@@ -0,0 +1,72 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from psctsimpipe.CalculateTriggerRate import calculate_proton_trigger_rate
+from psctsimpipe.TriggerRateStore import (
+    append_proton_trigger_rate,
+    append_trigger_rate_table,
+    lookup_trigger_rate,
+    read_store_index,
+    read_trigger_rates
+)
+
+@pytest.fixture
+def store(tmp_path, histo_export):
+    """
+    Store with the proton rates of two configurations
+    differing by their discriminator threshold.
+    """
+    store_file = str(tmp_path/"rates.h5")
+    files = {
+        5.0: histo_export("low.txt", np.round(np.arange(-1.975, 2, 0.05), 6)),
+        6.5: histo_export("high.txt", np.round(np.arange(-1.95, 2, 0.1), 6)),
+    }
+    for threshold, input_file in files.items():
+        params = {"trigger_pixels": 3, "discriminator_threshold": threshold, "night_type": "dark"}
+        append_proton_trigger_rate(store_file, params, input_file)
+    return store_file, files
+
+def test_append_two_configurations(store):
+    store_file, files = store
+    index = read_store_index(store_file)
+
+    assert index["discriminator_threshold"].tolist() == list(files)
+    assert index["night_type"].tolist() == ["dark", "dark"]
+    assert index["start"].tolist() == [0, 80]
+    assert index["stop"].tolist() == [80, 120]
+    np.testing.assert_allclose(
+        index["total_trigger_rate"],
+        [calculate_proton_trigger_rate(input_file) for input_file in files.values()],
+        rtol=1e-6
+    )
+
+def test_duplicate_configuration_is_rejected(store):
+    store_file, _ = store
+    table = lookup_trigger_rate(store_file, trigger_pixels=3, discriminator_threshold=5.0, night_type="dark")
+    params = {"trigger_pixels": 3, "discriminator_threshold": 5.0, "night_type": "dark"}
+
+    with pytest.raises(ValueError, match="already in"):
+        append_trigger_rate_table(store_file, params, table)
+    assert len(read_store_index(store_file)) == 2
+
+def test_read_trigger_rates(store):
+    store_file, _ = store
+    rates = read_trigger_rates(store_file)
+
+    assert len(rates) == 120
+    assert list(rates.columns[:3]) == ["trigger_pixels", "discriminator_threshold", "night_type"]
+    for threshold, rows in rates.groupby("discriminator_threshold"):
+        table = lookup_trigger_rate(store_file, trigger_pixels=3, discriminator_threshold=threshold, night_type="dark")
+        pd.testing.assert_frame_equal(rows[table.columns].reset_index(drop=True), table)
+
+    selected = read_trigger_rates(store_file, discriminator_threshold=6.5)
+    pd.testing.assert_frame_equal(selected, rates[rates["discriminator_threshold"] == 6.5].reset_index(drop=True))
+
+def test_lookup_trigger_rate_errors(store):
+    store_file, _ = store
+
+    with pytest.raises(ValueError, match="matches 2 configurations"):
+        lookup_trigger_rate(store_file, trigger_pixels=3)
+    with pytest.raises(KeyError):
+        lookup_trigger_rate(store_file, trigger_pixels=4, discriminator_threshold=5.0, night_type="dark")
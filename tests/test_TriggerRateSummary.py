@@ -0,0 +1,12 @@
+import pandas as pd
+
+from psctsimpipe.TriggerRateSummary import summarize_proton_trigger_rates
+
+def test_mixed_binning_summary(mixed_binning_files):
+    stacked, curves = summarize_proton_trigger_rates(mixed_binning_files, n_workers=1)
+    alone = pd.concat(
+        [summarize_proton_trigger_rates([file], n_workers=1)[0] for file in mixed_binning_files],
+        ignore_index=True
+    )
+    pd.testing.assert_frame_equal(stacked, alone, rtol=1e-6)
+    assert curves.notna().sum(axis=1).tolist() == [80, 40]